@@ -1,4 +1,5 @@
 import streamlit as st
+import json
 import time
 import os
 import sys
@@ -10,9 +11,8 @@ if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 
 # src 패키지 내부 모듈 임포트
-from src.utils import get_video_id, get_video_title
-from src.agents import VideoAnalyst
-from src.comment_scraper import scrape_comments
+from src.utils import get_video_id
+from src.jobs import JobQueue, ensure_workers
 
 
 # --- [2. 페이지 설정] ---
@@ -24,10 +24,14 @@ st.set_page_config(
 
 
 # --- [3. 헬퍼 함수: 썸네일 표시] ---
-def safe_display_thumbnail(video_id: str) -> None:
+def safe_display_thumbnail(video_id: str, url: str = None) -> None:
     """
-    썸네일을 고화질부터 저화질 순으로 시도
+    썸네일 표시: 작업에서 확인한 URL 이 있으면 그대로, 없으면 고화질부터 저화질 순으로 시도
     """
+    if url:
+        st.image(url, width=720)
+        return
+
     candidate_urls = [
         f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",  # 최대 해상도
         f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg",      # 고화질
@@ -44,7 +48,333 @@ def safe_display_thumbnail(video_id: str) -> None:
     st.warning("썸네일 이미지를 불러올 수 없지만, 분석은 계속 진행합니다.")
 
 
-# --- [4. 메인 UI 헤더] ---
+# --- [4. 헬퍼 함수: 리포트 섹션 렌더링] ---
+def get_summary_lines(res: dict):
+    if not isinstance(res, dict):
+        return []
+    for key in ["summary_3lines", "summary_3_lines", "summary", "summary_lines"]:
+        value = res.get(key)
+        if isinstance(value, list) and value:
+            return value
+    return []
+
+
+def render_summary(summary_res: dict, video_id: str = None) -> None:
+    """2. 핵심 요약 & 키워드 / 3. 챕터 섹션 (챕터 시각이 있으면 해당 위치로 가는 링크 표시)"""
+    st.markdown("### 2. 핵심 요약 & 키워드")
+
+    if "error" in summary_res:
+        st.error(f"요약 분석 실패: {summary_res['error']}")
+        st.divider()
+        return
+
+    sum_col1, sum_col2 = st.columns([2, 1])
+    with sum_col1:
+        st.subheader("📌 3줄 요약")
+        lines = get_summary_lines(summary_res)
+        if lines:
+            for line in lines:
+                st.markdown(f"- {line}")
+        else:
+            st.info("요약 정보를 생성하지 못했습니다.")
+
+    with sum_col2:
+        st.subheader("🏷️ 키워드")
+        keywords = summary_res.get("keywords", [])
+        if keywords:
+            st.markdown(" ".join([f"`#{k}`" for k in keywords]))
+        else:
+            st.info("키워드 정보를 생성하지 못했습니다.")
+
+    st.divider()
+
+    # 챕터 분석
+    st.markdown("### 3. 영상 구조 (챕터)")
+
+    chapters = summary_res.get("chapters", [])
+    if chapters:
+        for idx, chap in enumerate(chapters, start=1):
+            title = chap.get("title", f"챕터 {idx}")
+            time_label = chap.get("time", "흐름상 위치 미상")
+            start_seconds = chap.get("start_seconds")
+            with st.container(border=True):
+                st.markdown(f"**[{idx}] {title}**")
+                if video_id and start_seconds is not None:
+                    link = f"https://www.youtube.com/watch?v={video_id}&t={start_seconds}s"
+                    st.markdown(f"⏱️ 위치: [{time_label}]({link})")
+                else:
+                    st.caption(f"⏱️ 위치: {time_label}")
+    else:
+        st.info("챕터 정보를 생성하지 못했습니다.")
+
+    st.divider()
+
+
+def render_creative(creative_res: dict) -> None:
+    """4. 블로그 포스팅 / 5. 쇼츠 대본 섹션"""
+    st.markdown("### 4. 블로그 포스팅 초안")
+
+    if "error" not in creative_res:
+        blog = creative_res.get("blog_post", {})
+        blog_title = blog.get("title", "제목 없음")
+        blog_content = blog.get("content", "내용 없음")
+
+        with st.container(border=True):
+            st.markdown(f"#### 📝 {blog_title}")
+            st.markdown(blog_content)
+    else:
+        st.error(f"블로그 포스팅 생성 실패: {creative_res['error']}")
+
+    st.divider()
+
+    st.markdown("### 5. 쇼츠(Shorts) 대본")
+
+    if "error" not in creative_res:
+        shorts_script = creative_res.get("shorts_script", "")
+        if shorts_script:
+            st.text_area(
+                "복사해서 바로 쇼츠 제작에 활용하세요 👇",
+                value=shorts_script,
+                height=260,
+            )
+        else:
+            st.info("쇼츠 대본이 생성되지 않았습니다.")
+    else:
+        st.error("쇼츠 대본 생성 실패로 인해 표시할 수 없습니다.")
+
+    st.divider()
+
+
+def render_creative_preview(partial: dict) -> None:
+    """창작 결과 스트리밍 중 미리보기 (도착한 부분까지 표시)"""
+    st.markdown("### 4. 블로그 포스팅 초안")
+    blog = partial.get("blog_post") or {}
+    with st.container(border=True):
+        st.markdown(f"#### 📝 {blog.get('title', '')}")
+        st.markdown(blog.get("content", "") + " ▌")
+    st.caption("✍️ 생성 중...")
+
+    st.divider()
+
+    shorts_script = partial.get("shorts_script")
+    if shorts_script:
+        st.markdown("### 5. 쇼츠(Shorts) 대본")
+        st.text(shorts_script)
+        st.divider()
+
+
+def render_comment_analytics(analytics: dict) -> None:
+    """댓글 분석: 중복/도배, 키워드, 좋아요 가중 감성, 작성 시각별 추이"""
+    if "error" in analytics:
+        st.caption(f"댓글 분석 생략: {analytics['error']}")
+        return
+
+    st.markdown("**📊 댓글 분석**")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("전체 댓글", f"{analytics['total']:,}")
+    m2.metric("고유 댓글", f"{analytics['unique']:,}")
+    m3.metric("중복/도배", f"{analytics['exact_duplicates'] + analytics['near_duplicates']:,}")
+
+    spam_groups = analytics.get("spam_groups", [])
+    if spam_groups:
+        st.caption("반복 댓글: " + " / ".join(f"“{g['text']}” ×{g['count']}" for g in spam_groups))
+
+    keywords = analytics.get("keywords", [])
+    if keywords:
+        st.markdown(" ".join(f"`#{k['keyword']} {k['comments']}`" for k in keywords))
+
+    by_label = analytics.get("sentiment", {}).get("by_label", [])
+    if by_label:
+        st.table([
+            {
+                "감성": row["label"],
+                "댓글 수": row["count"],
+                "비율": f"{row['share']:.0%}",
+                "좋아요 가중 비율": f"{row['like_weighted_share']:.0%}",
+            }
+            for row in by_label
+        ])
+
+    volume = analytics.get("volume", {})
+    series = volume.get("series", [])
+    if len(series) > 1:
+        unit = {"hour": "시간", "day": "일", "week": "주"}.get(volume["bucket"], "")
+        st.caption(f"{unit}별 댓글 수")
+        st.bar_chart(
+            {"시작": [row["start"] for row in series], "댓글 수": [row["comments"] for row in series]},
+            x="시작", y="댓글 수",
+        )
+
+
+def render_comment_clusters(clusters: dict) -> None:
+    """댓글 주제 묶음: 주제별 댓글 수/비율, 키워드, 대표 댓글"""
+    if "error" in clusters:
+        st.caption(f"댓글 주제 분석 생략: {clusters['error']}")
+        return
+
+    st.markdown("**🧩 댓글 주제**")
+    st.caption(
+        f"좋아요 많은 댓글 {clusters['total']:,}개 기준 "
+        f"(새로 임베딩 {clusters['embedded']:,}개 / 캐시 {clusters['cached']:,}개)"
+    )
+    for cluster in clusters["clusters"]:
+        title = f"주제 {cluster['id']} · 댓글 {cluster['size']:,}개 ({cluster['share']:.0%})"
+        if cluster["keywords"]:
+            title += " · " + ", ".join(f"#{k}" for k in cluster["keywords"])
+        with st.expander(title):
+            for rep in cluster["representatives"]:
+                st.write(f"• {rep['text']} (👍 {rep['like_count']:,})")
+
+
+# --- [5. 백그라운드 작업 큐] ---
+# 분석은 별도 워커 프로세스에서 실행하고, 화면은 작업 상태/결과를 조회해서 그리기만 함
+# (rerun / 새로고침 / 여러 사용자의 같은 요청이 분석을 다시 실행하지 않음)
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    ensure_workers()
+    return JobQueue()
+
+
+# 이 시간 넘게 대기 중인 작업이 있으면 워커가 죽었는지 다시 확인 (죽었으면 새로 실행)
+QUEUED_WORKER_CHECK_SECONDS = 30
+
+
+def job_progress(progress: dict) -> int:
+    done = 10 * ("title" in progress) + 10 * ("transcript" in progress) + 15 * ("comments" in progress)
+    done += 3 * ("sentiment" in progress) + 2 * ("analytics" in progress) + 2 * ("clusters" in progress)
+    done += 30 * ("summary" in progress) + 30 * ("creative" in progress)
+    return min(done, 100)
+
+
+def job_status_text(job: dict, queue: JobQueue) -> str:
+    progress = job["progress"]
+    if job["status"] == "queued":
+        return f"⏳ 분석 대기 중입니다... (앞에 {queue.position(job['id'])}개)"
+    # 단계들이 동시에 진행되므로 아직 끝나지 않은 단계를 모두 표시
+    running = []
+    if "transcript" not in progress:
+        running.append("자막 수집")
+    if "comments" not in progress:
+        running.append("댓글 수집")
+    elif "[ERROR]" not in progress["comments"]["message"]:
+        if "sentiment" not in progress:
+            running.append("댓글 감성 분석")
+        elif "analytics" not in progress:
+            running.append("댓글 통계 집계")
+        if job["options"].get("clusters") and "clusters" not in progress:
+            running.append("댓글 주제 묶기")
+    if "transcript" in progress and not ("summary" in progress and "creative" in progress):
+        running.append("핵심 요약 / 블로그 글·쇼츠 대본 생성")
+    return "⚡ 진행 중: " + " · ".join(running or ["결과 정리"])
+
+
+def render_job(job: dict, queue: JobQueue) -> None:
+    """작업에 저장된 단계 결과(progress)로 리포트를 그림 (진행 중이면 도착한 부분까지)"""
+    video_id = job["video_id"]
+    progress = job["progress"]
+    active = job["status"] in ("queued", "running")
+
+    # 썸네일 영역
+    st.markdown("### 🎞️ 영상 썸네일")
+    safe_display_thumbnail(video_id, (progress.get("thumbnail") or {}).get("url"))
+
+    video_title = (progress.get("title") or {}).get("title")
+    if video_title:
+        st.markdown(f"#### 🏷️ {video_title}")
+    elif not active:
+        st.caption("영상 제목을 불러오지 못했습니다.")
+
+    st.divider()
+
+    if active:
+        st.progress(job_progress(progress))
+        st.info(job_status_text(job, queue))
+    elif job["status"] == "failed":
+        st.error(f"예상치 못한 시스템 오류가 발생했습니다: {job['error']}")
+        return
+
+    if not any(name in progress for name in ("comments", "summary", "creative", "creative_partial")):
+        return
+
+    # --- [7. 분석 리포트 출력] ---
+    st.markdown("## 📄 분석 리포트")
+
+    # 7-1. 기본 정보 / 댓글 수집 결과
+    st.markdown("### 1. 기본 정보")
+    info_col1, info_col2 = st.columns(2)
+    with info_col1:
+        st.write(f"• **Video ID**: `{video_id}`")
+        st.write(f"• **원본 링크**: https://www.youtube.com/watch?v={video_id}")
+    with info_col2:
+        comment_result = (progress.get("comments") or {}).get("message")
+        if comment_result is None:
+            st.info("댓글을 수집하고 있습니다...")
+        elif "[ERROR]" in comment_result:
+            st.warning("댓글 수집: " + comment_result.replace("[ERROR]", "⚠️"))
+        else:
+            st.success("댓글 수집: " + comment_result.replace("[SUCCESS]", "완료"))
+
+        sentiment_res = progress.get("sentiment")
+        if sentiment_res is not None:
+            if "error" in sentiment_res:
+                st.caption(f"댓글 감성 분석 생략: {sentiment_res['error']}")
+            else:
+                total = sentiment_res["total"]
+                st.markdown("**💬 댓글 감성 분포**")
+                for label, count in sentiment_res["label_counts"].items():
+                    st.write(f"• {label}: {count}개 ({count / total:.0%})")
+
+    analytics_res = progress.get("analytics")
+    if analytics_res is not None:
+        render_comment_analytics(analytics_res)
+
+    clusters_res = progress.get("clusters")
+    if clusters_res is not None:
+        render_comment_clusters(clusters_res)
+
+    st.divider()
+
+    # 요약/창작 결과는 먼저 끝나는 쪽부터 표시, 창작은 완성 전까지 미리보기
+    if "summary" in progress:
+        render_summary(progress["summary"], video_id)
+    if "creative" in progress:
+        render_creative(progress["creative"])
+    elif "creative_partial" in progress:
+        render_creative_preview(progress["creative_partial"])
+
+    if job["status"] != "done":
+        return
+
+    result = job["result"] or {}
+    trace = result.get("trace", [])
+
+    # 7-2. 원시 JSON (디버깅용)
+    with st.expander("⚙️ 원시 JSON 데이터 보기 (디버깅용)"):
+        raw_col1, raw_col2 = st.columns(2)
+        with raw_col1:
+            st.caption("Summary JSON")
+            st.json(result.get("summary", {}))
+        with raw_col2:
+            st.caption("Creative JSON")
+            st.json(result.get("creative", {}))
+
+        st.caption("단계별 계측 (wall time / 크기 / 토큰 / 캐시 적중)")
+        st.dataframe(
+            [
+                {k: v for k, v in record.items() if k not in ("run_id", "started_at")}
+                for record in trace
+            ],
+            use_container_width=True,
+        )
+        st.download_button(
+            "📥 계측 기록 JSONL 내보내기",
+            data="".join(json.dumps(r, ensure_ascii=False) + "\n" for r in trace),
+            file_name=f"trace_{video_id}_{result.get('run_id', job['id'])}.jsonl",
+            mime="application/jsonl",
+        )
+
+
+# --- [6. 메인 UI 헤더] ---
 st.title("🎬 YouTube Creator Agent")
 st.markdown(
     """
@@ -73,186 +403,57 @@ with col_info:
         """
     )
 
+refresh_cache = st.checkbox(
+    "🔄 캐시된 분석 결과 무시하고 새로 생성",
+    help="같은 영상·같은 프롬프트의 이전 Gemini 응답을 재사용하지 않고 다시 요청합니다.",
+)
+
+combined_mode = st.checkbox(
+    "⚡ 요약과 창작을 한 번에 요청 (통합 모드)",
+    help="자막을 한 번만 보내 요약/챕터/키워드와 블로그/쇼츠를 함께 생성합니다. 토큰과 대기 시간이 줄어듭니다.",
+)
+
+cluster_mode = st.checkbox(
+    "🧩 댓글 주제를 묶어 요약/창작에 반영",
+    help="댓글을 의미별로 묶어 주제와 대표 댓글을 보여주고, 요약·창작 프롬프트에 참고용으로 넣습니다. (임베딩 모델 필요)",
+)
+
 analyze_btn = st.button("🚀 분석 시작", type="primary", use_container_width=True)
 
 
-# --- [5. 메인 실행 로직] ---
+# --- [8. 메인 실행 로직] ---
+job_queue = get_job_queue()
+
 if analyze_btn:
     if not url:
         st.error("URL을 입력해주세요.")
         st.stop()
 
-    # 1) URL → video_id, video_title
+    # URL → video_id
     video_id = get_video_id(url)
     if not video_id:
         st.error("올바르지 않은 유튜브 URL입니다.")
         st.stop()
 
-    video_title = get_video_title(video_id)
+    # 워커 프로세스가 중간에 죽었으면 다시 실행 (pid 파일 + 잠금으로 이미 떠 있으면 그대로)
+    ensure_workers()
 
-    # 썸네일 영역
-    st.markdown("### 🎞️ 영상 썸네일")
-    safe_display_thumbnail(video_id)
+    # 같은 요청이 이미 대기/실행 중이거나 최근에 끝났으면 그 작업을 그대로 사용
+    job_id = job_queue.submit(video_id, {"refresh": refresh_cache, "combined": combined_mode, "clusters": cluster_mode})
+    st.session_state["job_id"] = job_id
+    st.query_params["job"] = job_id
 
-    if video_title:
-        st.markdown(f"#### 🏷️ {video_title}")
+# 새로고침해도 URL 의 작업 ID 로 결과를 다시 표시
+job_id = st.session_state.get("job_id") or st.query_params.get("job")
+if job_id:
+    job = job_queue.get(job_id)
+    if job is None:
+        st.warning("분석 작업을 찾을 수 없습니다. 다시 분석을 시작해 주세요.")
     else:
-        st.caption("영상 제목을 불러오지 못했습니다.")
-        
-    st.divider()
-
-    # 진행 상태 표시
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    try:
-        # 2) 댓글 수집
-        status_text.info("📥 1/4단계 — 댓글 데이터를 수집하고 있습니다...")
-        progress_bar.progress(15)
-        comment_result = scrape_comments(video_id)
-
-        # 3) AI 에이전트 초기화
-        status_text.info("🧠 2/4단계 — AI 에이전트를 초기화하고 있습니다...")
-        analyst = VideoAnalyst()
-        progress_bar.progress(30)
-
-        # 4) 요약 분석
-        status_text.info("⚡ 3/4단계 — 자막을 기반으로 핵심 요약 및 구조를 분석 중입니다...")
-        summary_res = analyst.summarize(video_id)
-        progress_bar.progress(65)
-
-        if "error" in summary_res:
-            st.error(f"분석 중단: {summary_res['error']}")
-            progress_bar.empty()
-            status_text.empty()
-            st.stop()
-
-        # 5) 2차 창작
-        status_text.info("✍️ 4/4단계 — 블로그 글과 쇼츠 대본을 생성하고 있습니다...")
-        creative_res = analyst.create_content(video_id)
-        progress_bar.progress(100)
-
-        # 상태창 정리
-        status_text.success("✅ 분석이 완료되었습니다.")
-        time.sleep(0.8)
-        status_text.empty()
-        progress_bar.empty()
-
-        st.divider()
-
-        # --- [6. 분석 리포트 출력] ---
-        st.markdown("## 📄 분석 리포트")
-
-        # 6-1. 기본 정보 / 댓글 수집 결과
-        st.markdown("### 1. 기본 정보")
-        info_col1, info_col2 = st.columns(2)
-        with info_col1:
-            st.write(f"• **Video ID**: `{video_id}`")
-            st.write(f"• **원본 링크**: {url}")
-        with info_col2:
-            if "[ERROR]" in comment_result:
-                st.warning("댓글 수집: " + comment_result.replace("[ERROR]", "⚠️"))
-            else:
-                st.success("댓글 수집: " + comment_result.replace("[SUCCESS]", "완료"))
-
-        st.divider()
-
-        # 6-2. 3줄 요약 & 키워드
-        st.markdown("### 2. 핵심 요약 & 키워드")
-
-        sum_col1, sum_col2 = st.columns([2, 1])
-        with sum_col1:
-            st.subheader("📌 3줄 요약")
-
-            def get_summary_lines(res: dict):
-                if not isinstance(res, dict):
-                    return []
-                for key in ["summary_3lines", "summary_3_lines", "summary", "summary_lines"]:
-                    value = res.get(key)
-                    if isinstance(value, list) and value:
-                        return value
-                return []
-        
-        lines = get_summary_lines(summary_res)
-
-        if lines:
-            for line in lines:
-                st.markdown(f"- {line}")
-        
-        else:
-            st.info("요약 정보를 생성하지 못했습니다.")
-        
-        with sum_col2:
-            st.subheader("🏷️ 키워드")
-            keywords = summary_res.get("keywords", [])
-            if keywords:
-                st.markdown(" ".join([f"`#{k}`" for k in keywords]))
-            else:
-                st.info("키워드 정보를 생성하지 못했습니다.")
-
-        st.divider()
-
-        # 6-3. 챕터 분석
-        st.markdown("### 3. 영상 구조 (챕터)")
-
-        chapters = summary_res.get("chapters", [])
-        if chapters:
-            for idx, chap in enumerate(chapters, start=1):
-                title = chap.get("title", f"챕터 {idx}")
-                time_label = chap.get("time", "흐름상 위치 미상")
-                with st.container(border=True):
-                    st.markdown(f"**[{idx}] {title}**")
-                    st.caption(f"⏱️ 위치: {time_label}")
-        else:
-            st.info("챕터 정보를 생성하지 못했습니다.")
-
-        st.divider()
-
-        # 6-4. 블로그 포스팅
-        st.markdown("### 4. 블로그 포스팅 초안")
-
-        if "error" not in creative_res:
-            blog = creative_res.get("blog_post", {})
-            blog_title = blog.get("title", "제목 없음")
-            blog_content = blog.get("content", "내용 없음")
-
-            with st.container(border=True):
-                st.markdown(f"#### 📝 {blog_title}")
-                st.markdown(blog_content)
-        else:
-            st.error(f"블로그 포스팅 생성 실패: {creative_res['error']}")
-
-        st.divider()
-
-        # 6-5. 쇼츠 대본
-        st.markdown("### 5. 쇼츠(Shorts) 대본")
-
-        if "error" not in creative_res:
-            shorts_script = creative_res.get("shorts_script", "")
-            if shorts_script:
-                st.text_area(
-                    "복사해서 바로 쇼츠 제작에 활용하세요 👇",
-                    value=shorts_script,
-                    height=260,
-                )
-            else:
-                st.info("쇼츠 대본이 생성되지 않았습니다.")
-        else:
-            st.error("쇼츠 대본 생성 실패로 인해 표시할 수 없습니다.")
-
-        st.divider()
-
-        # 6-6. 원시 JSON (디버깅용)
-        with st.expander("⚙️ 원시 JSON 데이터 보기 (디버깅용)"):
-            raw_col1, raw_col2 = st.columns(2)
-            with raw_col1:
-                st.caption("Summary JSON")
-                st.json(summary_res)
-            with raw_col2:
-                st.caption("Creative JSON")
-                st.json(creative_res)
-
-    except Exception as e:
-        progress_bar.empty()
-        status_text.empty()
-        st.error(f"예상치 못한 시스템 오류가 발생했습니다: {e}")
+        render_job(job, job_queue)
+        if job["status"] == "queued" and time.time() - job["created_at"] > QUEUED_WORKER_CHECK_SECONDS:
+            st.caption("⚠️ 작업이 오래 대기 중입니다. 분석 워커 상태를 확인하고 필요하면 다시 실행합니다.")
+            ensure_workers()
+        if job["status"] in ("queued", "running"):
+            time.sleep(1.0)
+            st.rerun()
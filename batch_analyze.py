@@ -0,0 +1,86 @@
+# batch_analyze.py
+# Streamlit 없이 여러 영상 / 재생목록 / 채널을 한 번에 분석하는 헤드리스 실행 스크립트
+#
+# 사용 예:
+#   python batch_analyze.py https://youtu.be/VIDEO_ID PLxxxxxxxx @channel_handle
+#   python batch_analyze.py --file urls.txt --workers 8 --output data/batch_results.jsonl
+import argparse
+import csv
+import os
+import sys
+
+# 프로젝트 루트를 PYTHONPATH에 추가
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.batch import BatchRunner, expand_targets  # noqa: E402
+from src.comment_scraper import DEFAULT_MAX_COMMENTS, DEFAULT_MAX_PAGES  # noqa: E402
+from src.pipeline import StageLimits  # noqa: E402
+from src.quota import QuotaLimiter  # noqa: E402
+
+
+def read_targets_file(path):
+    """텍스트(한 줄에 하나) 또는 CSV(첫 번째 컬럼) 파일에서 입력 목록 읽기"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            return [row[0] for row in csv.reader(f) if row]
+        return [line.strip() for line in f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유튜브 영상 일괄 분석 (결과는 JSON lines)")
+    parser.add_argument("targets", nargs="*", help="영상 URL/ID, 재생목록 URL/ID, 채널 ID(UC...)/핸들(@...)")
+    parser.add_argument("--file", help="입력 목록 파일 (.txt 한 줄에 하나 / .csv 첫 번째 컬럼)")
+    parser.add_argument("--output", default=os.path.join("data", "batch_results.jsonl"), help="결과 JSONL 경로")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 영상 수")
+    parser.add_argument("--transcript-concurrency", type=int, default=4, help="자막 요청 동시 실행 상한")
+    parser.add_argument("--comment-concurrency", type=int, default=2, help="댓글 수집 동시 실행 상한")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Gemini 요청 동시 실행 상한 (영상 단위)")
+    parser.add_argument("--max-comments", type=int, default=DEFAULT_MAX_COMMENTS, help="영상당 최대 댓글 수")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help="영상당 최대 댓글 페이지 수")
+    parser.add_argument("--all-comments", action="store_true", help="상한 없이 모든 댓글 페이지 수집")
+    parser.add_argument("--include-replies", action="store_true", help="답글까지 수집")
+    parser.add_argument("--refresh", action="store_true", help="캐시된 Gemini 응답을 무시하고 새로 생성")
+    parser.add_argument("--combined", action="store_true", help="요약과 창작을 한 번의 Gemini 요청으로 생성")
+    parser.add_argument("--no-resume", action="store_true", help="이전 결과가 있어도 처음부터 다시 처리")
+    args = parser.parse_args()
+
+    targets = list(args.targets)
+    if args.file:
+        targets += read_targets_file(args.file)
+    if not targets:
+        parser.error("분석할 URL/ID 를 입력하거나 --file 로 목록 파일을 지정하세요.")
+
+    limiter = QuotaLimiter()
+    video_ids = expand_targets(targets, limiter)
+    if not video_ids:
+        sys.exit("처리할 영상이 없습니다.")
+
+    runner = BatchRunner(
+        args.output,
+        workers=args.workers,
+        limits=StageLimits(
+            transcript=args.transcript_concurrency,
+            comments=args.comment_concurrency,
+            llm=args.llm_concurrency,
+        ),
+        limiter=limiter,
+        resume=not args.no_resume,
+        refresh=args.refresh,
+        combined=args.combined,
+        max_comments=None if args.all_comments else args.max_comments,
+        max_pages=None if args.all_comments else args.max_pages,
+        include_replies=args.include_replies,
+    )
+    stats = runner.run(video_ids)
+
+    print(
+        f"\n완료: 성공 {stats['ok']}개 / 실패 {stats['error']}개 / 건너뜀 {stats['skipped']}개"
+        f" (YouTube API 쿼터 {stats['quota_units']} units 사용)"
+    )
+    print(f"결과 파일: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
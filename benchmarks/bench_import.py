@@ -0,0 +1,101 @@
+"""
+import 시간 벤치마크 (Streamlit 첫 화면 / rerun 이 지불하는 모듈 로딩 비용)
+
+- 모듈마다 새 파이썬 프로세스에서 import 하는 데 걸린 시간(중앙값)
+- import 만으로 함께 로드된 무거운 SDK 목록 (지연 import 가 깨졌는지 확인)
+
+사용법:
+    python benchmarks/bench_import.py                 # 결과 표 출력
+    python benchmarks/bench_import.py --check         # app.py 경로에서 무거운 SDK 가 로드되면 실패(exit 1)
+    python benchmarks/bench_import.py --max-ms 300    # app.py 경로 import 시간이 기준을 넘으면 실패
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# 프로젝트 루트 (하위 프로세스의 작업 디렉터리)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app.py 가 첫 화면을 그리기 전에 import 하는 src 모듈
+APP_IMPORTS = ["src.utils", "src.jobs"]
+
+# 첫 사용 시점까지 로드를 미뤄야 하는 모듈
+HEAVY_MODULES = [
+    "google.generativeai",
+    "googleapiclient",
+    "youtube_transcript_api",
+    "requests",
+    "pandas",
+    "numpy",
+    "torch",
+    "transformers",
+    "onnxruntime",
+]
+
+TARGETS = {
+    "app.py 경로": APP_IMPORTS,
+    "src.agents": ["src.agents"],
+    "src.comment_scraper": ["src.comment_scraper"],
+    "src.pipeline": ["src.pipeline"],
+}
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - started) * 1000
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(modules, repeat):
+    """새 프로세스에서 repeat 번 import 해서 (중앙값 ms, 로드된 무거운 모듈) 반환"""
+    code = PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+    samples = []
+    heavy = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BASE_DIR, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return None, [out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "import 실패"]
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        heavy = result["heavy"]
+    return statistics.median(samples), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="src 모듈 import 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="모듈당 측정 횟수 (중앙값 사용)")
+    parser.add_argument("--check", action="store_true", help="app.py 경로에서 무거운 SDK 가 로드되면 실패")
+    parser.add_argument("--max-ms", type=float, default=None, help="app.py 경로 import 시간 상한 (ms)")
+    args = parser.parse_args()
+
+    print(f"{'대상':<22} {'import(ms)':>12}  함께 로드된 무거운 모듈")
+    failed = False
+
+    for label, modules in TARGETS.items():
+        ms, heavy = measure(modules, args.repeat)
+        ms_text = f"{ms:.1f}" if ms is not None else "실패"
+        print(f"{label:<22} {ms_text:>12}  {', '.join(heavy) or '-'}")
+
+        if label == "app.py 경로":
+            if ms is None or (args.check and heavy):
+                failed = True
+            if args.max_ms is not None and ms is not None and ms > args.max_ms:
+                failed = True
+
+    if failed:
+        print("\napp.py 경로의 import 비용이 기준을 벗어났습니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+오프라인 성능 벤치마크 (외부 서비스 없이 로컬 대역으로 파이프라인 측정)
+
+- 대상: get_robust_transcript / scrape_comments / VideoAnalyst(요약+창작, 분리/통합 모드) / JSON 파싱 / 전체 파이프라인
+- 지표: 단계별 지연 시간 백분위(p50/p90/p99), 평균, 처리량(ops/sec)
+  VideoAnalyst 단계는 영상당 Gemini 요청 수와 프롬프트/응답 토큰 수도 기록 (통합 모드 절감량 비교)
+  전체 파이프라인은 Tracer 기록으로 세부 단계(span)별 백분위도 함께 집계
+- 대역(benchmarks/fakes.py)의 지연 시간과 응답 크기는 옵션으로 조절
+- 결과는 JSON 으로 저장하고, 기준선(baseline)과 비교해 변화율을 출력
+
+사용법:
+    python benchmarks/bench_offline.py --save-baseline            # 기준선 저장
+    python benchmarks/bench_offline.py --compare                  # 기준선 대비 비교
+    python benchmarks/bench_offline.py --llm-latency-ms 0 --stages json_parse analyst
+    python benchmarks/bench_offline.py --stages analyst analyst_combined   # 분리 vs 통합 모드
+    python benchmarks/bench_offline.py --stages analyst --iterations 50 --llm-tail-rate 0.1 --hedge   # 꼬리 지연
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from dataclasses import asdict, fields
+from concurrent.futures import ThreadPoolExecutor
+
+# 프로젝트 루트를 PYTHONPATH에 추가
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from benchmarks.fakes import FakeConfig, FakeGenerativeModel, install_fakes  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "results", "baseline_offline.json")
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "benchmarks", "results", "latest_offline.json")
+
+STAGES = ["transcript", "comments", "analyst", "analyst_combined", "json_parse", "end_to_end"]
+
+
+def percentile(samples, pct):
+    """nearest-rank 백분위"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples_ms, wall_s=None):
+    n = len(samples_ms)
+    wall_s = wall_s if wall_s is not None else sum(samples_ms) / 1000
+    return {
+        "n": n,
+        "mean_ms": round(sum(samples_ms) / n, 3) if n else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p90_ms": round(percentile(samples_ms, 90), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "ops_per_s": round(n / wall_s, 2) if wall_s else 0.0,
+    }
+
+
+def timed(fn, items, concurrency=1):
+    """items 마다 fn 실행 시간(ms)을 재고 (샘플, 전체 경과 초) 반환"""
+    def run(item):
+        started = time.perf_counter()
+        fn(item)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        samples = [run(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(run, items))
+    return samples, time.perf_counter() - started
+
+
+def token_usage(tracers):
+    """Tracer 기록의 Gemini 요청(llm.*)을 모아 영상당 평균 요청 수 / 토큰 수 반환"""
+    calls = prompt = response = 0
+    for tracer in tracers:
+        for record in tracer.records:
+            if record["stage"].startswith("llm.") and record.get("prompt_tokens") is not None:
+                calls += 1
+                prompt += record["prompt_tokens"]
+                response += record.get("response_tokens") or 0
+    n = max(1, len(tracers))
+    return {
+        "llm_calls_mean": round(calls / n, 2),
+        "prompt_tokens_mean": round(prompt / n, 1),
+        "response_tokens_mean": round(response / n, 1),
+    }
+
+
+def video_ids(prefix, n):
+    # 11자리 영상 ID 형식 (prefix + 일련번호)
+    return [f"{prefix}{i:010d}"[-11:] for i in range(n)]
+
+
+# -------------------------------
+# 단계별 측정
+# -------------------------------
+def bench_transcript(args, config):
+    from src.utils import get_robust_transcript
+
+    samples, wall = timed(lambda v: get_robust_transcript(v, max_chars=None), video_ids("t", args.iterations))
+    return summarize(samples, wall)
+
+
+def bench_comments(args, config):
+    from src.comment_scraper import scrape_comments
+    from src.comment_store import CommentStore
+    from src.quota import QuotaLimiter
+
+    store = CommentStore(os.path.join("data", "bench_comments.sqlite3"))
+    limiter = QuotaLimiter(rate=1e9, burst=1e9, budget=10 ** 12, shared=False)
+
+    def run(video_id):
+        result = scrape_comments(
+            video_id, max_pages=None, max_comments=None, store=store, limiter=limiter, incremental=False
+        )
+        if "[ERROR]" in result:
+            raise RuntimeError(result)
+
+    samples, wall = timed(run, video_ids("c", args.iterations))
+    return summarize(samples, wall)
+
+
+def bench_analyst(args, config, combined=False):
+    from src.agents import VideoAnalyst
+    from src.tracing import Tracer
+    from src.utils import get_robust_transcript
+
+    transcripts = {v: get_robust_transcript(v, max_chars=None) for v in video_ids("a", args.iterations)}
+    tracers = []
+
+    def run(video_id):
+        tracer = Tracer(video_id=video_id)
+        tracers.append(tracer)
+        analyst = VideoAnalyst(use_cache=False, tracer=tracer)
+        for _ in analyst.analyze_concurrently(
+            video_id, transcripts[video_id], stream=args.stream, combined=combined
+        ):
+            pass
+
+    samples, wall = timed(run, list(transcripts))
+    return {**summarize(samples, wall), **token_usage(tracers)}
+
+
+def bench_analyst_combined(args, config):
+    return bench_analyst(args, config, combined=True)
+
+
+def bench_json_parse(args, config):
+    from src.agents import VideoAnalyst
+    from src.utils import parse_partial_json
+
+    # 지연 없이 창작 응답 payload 만 만들어 파싱 비용 측정 (완성본 1회 + 스트리밍 청크 경계마다 부분 파싱)
+    quiet = FakeConfig(**{**asdict(config), "llm_latency_ms": 0, "llm_ms_per_1k_chars": 0})
+    model = FakeGenerativeModel("bench", quiet)
+    payloads = [
+        model.generate_content(f"창작 요청 {i}").text for i in range(max(1, args.json_iterations // 10))
+    ]
+    analyst = VideoAnalyst(use_cache=False)
+    step = max(1, len(payloads[0]) // config.llm_stream_chunks)
+
+    def run(idx):
+        text = payloads[idx % len(payloads)]
+        for end in range(step, len(text), step):
+            parse_partial_json(text[:end])
+        analyst._parse_json_response(text)
+
+    samples, wall = timed(run, range(args.json_iterations))
+    return summarize(samples, wall)
+
+
+def bench_end_to_end(args, config):
+    from src.llm_cache import LLMCache
+    from src.pipeline import StageLimits, analyze_video
+    from src.quota import QuotaLimiter
+    from src.tracing import Tracer
+
+    limits = StageLimits(transcript=args.concurrency, comments=args.concurrency, llm=args.concurrency)
+    limiter = QuotaLimiter(rate=1e9, burst=1e9, budget=10 ** 12, shared=False)
+    cache = LLMCache(os.path.join("data", "bench_llm_cache.sqlite3"))
+    tracers = []
+
+    def run(video_id):
+        tracer = Tracer(video_id=video_id)
+        tracers.append(tracer)
+        analyze_video(
+            video_id, limits=limits, limiter=limiter, llm_cache=cache,
+            refresh=True, tracer=tracer, stream=args.stream, combined=args.combined,
+        )
+
+    samples, wall = timed(run, video_ids("e", args.iterations), concurrency=args.concurrency)
+    result = summarize(samples, wall)
+
+    # Tracer 기록으로 세부 단계별 백분위 집계
+    spans = {}
+    for tracer in tracers:
+        for record in tracer.records:
+            spans.setdefault(record["stage"], []).append(record["wall_ms"])
+    result["spans"] = {stage: summarize(values) for stage, values in sorted(spans.items())}
+    return result
+
+
+BENCHES = {
+    "transcript": bench_transcript,
+    "comments": bench_comments,
+    "analyst": bench_analyst,
+    "analyst_combined": bench_analyst_combined,
+    "json_parse": bench_json_parse,
+    "end_to_end": bench_end_to_end,
+}
+
+
+# -------------------------------
+# 기준선 비교
+# -------------------------------
+def flatten(results):
+    """{"stage" 또는 "end_to_end/span": 지표 dict} 형태로 펼치기"""
+    flat = {}
+    for stage, metrics in results["stages"].items():
+        flat[stage] = {k: v for k, v in metrics.items() if k != "spans"}
+        for span, span_metrics in metrics.get("spans", {}).items():
+            flat[f"{stage}/{span}"] = span_metrics
+    return flat
+
+
+def compare(current, baseline):
+    print("\n[기준선 대비] (+ 는 느려짐 / 처리량은 + 가 좋아짐)")
+    print(f"{'단계':<34} {'p50(ms)':>10} {'변화':>8} {'p90(ms)':>10} {'변화':>8} {'ops/s':>9} {'변화':>8}")
+    base = flatten(baseline)
+    for name, metrics in flatten(current).items():
+        old = base.get(name)
+        if old is None:
+            print(f"{name:<34} {metrics['p50_ms']:>10.2f} {'(신규)':>8}")
+            continue
+
+        def delta(key):
+            if not old.get(key):
+                return "-"
+            return f"{(metrics[key] - old[key]) / old[key] * 100:+.1f}%"
+
+        print(
+            f"{name:<34} {metrics['p50_ms']:>10.2f} {delta('p50_ms'):>8} "
+            f"{metrics['p90_ms']:>10.2f} {delta('p90_ms'):>8} "
+            f"{metrics['ops_per_s']:>9.2f} {delta('ops_per_s'):>8}"
+        )
+
+
+def print_results(results):
+    print(f"{'단계':<34} {'n':>5} {'p50(ms)':>10} {'p90(ms)':>10} {'p99(ms)':>10} {'ops/s':>9}")
+    for name, m in flatten(results).items():
+        print(
+            f"{name:<34} {m['n']:>5} {m['p50_ms']:>10.2f} {m['p90_ms']:>10.2f} "
+            f"{m['p99_ms']:>10.2f} {m['ops_per_s']:>9.2f}"
+        )
+
+
+def print_combined_savings(results):
+    """분리 모드 대비 통합 모드의 지연 시간 / 토큰 절감량"""
+    stages = results["stages"]
+    if "analyst" not in stages or "analyst_combined" not in stages:
+        return
+    separate, combined = stages["analyst"], stages["analyst_combined"]
+
+    def saving(key):
+        if not separate.get(key):
+            return "-"
+        return f"{(separate[key] - combined[key]) / separate[key] * 100:.1f}%"
+
+    print("\n[통합 모드 절감량] (분리 → 통합)")
+    for key, label in [
+        ("p50_ms", "p50 지연(ms)"),
+        ("llm_calls_mean", "영상당 요청 수"),
+        ("prompt_tokens_mean", "영상당 프롬프트 토큰"),
+        ("response_tokens_mean", "영상당 응답 토큰"),
+    ]:
+        print(f"{label:<22} {separate[key]:>10} → {combined[key]:>10}  (절감 {saving(key)})")
+
+
+def install_call_policy(args):
+    """옵션에 맞는 호출 정책을 기본 정책으로 교체 (재시도 대기는 짧게)"""
+    from src import llm_policy
+
+    if args.no_call_policy:
+        policy = llm_policy.CallPolicy(deadline_s=None, max_retries=0, hedge=False, fallbacks={})
+    else:
+        deadline = args.llm_deadline_s if args.llm_deadline_s is not None else llm_policy.LLM_DEADLINE_SECONDS
+        policy = llm_policy.CallPolicy(
+            deadline_s=deadline, fallback_deadline_s=deadline, retry_base_s=0.05, retry_max_s=0.5,
+            hedge=args.hedge, hedge_min_samples=args.hedge_min_samples,
+        )
+    llm_policy._default_policy = policy
+
+
+def write_json(path, data):
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="외부 서비스 없이 로컬 대역으로 파이프라인 성능 측정")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="측정할 단계")
+    parser.add_argument("--iterations", type=int, default=10, help="단계별 영상 수")
+    parser.add_argument("--json-iterations", type=int, default=200, help="JSON 파싱 반복 횟수")
+    parser.add_argument("--concurrency", type=int, default=1, help="전체 파이프라인 동시 실행 영상 수")
+    parser.add_argument("--stream", action="store_true", help="창작 결과를 스트리밍으로 받기")
+    parser.add_argument("--combined", action="store_true", help="전체 파이프라인을 통합 모드로 실행")
+
+    # Gemini 호출 정책 (src/llm_policy.py)
+    parser.add_argument("--no-call-policy", action="store_true", help="마감 시간 / 재시도 / 대체 모델 없이 호출")
+    parser.add_argument("--hedge", action="store_true", help="p95 를 넘긴 요청에 중복 요청 보내기")
+    parser.add_argument("--hedge-min-samples", type=int, default=10, help="hedging 을 시작할 최소 지연 시간 표본 수")
+    parser.add_argument("--llm-deadline-s", type=float, default=None, help="모델별 호출 마감 시간(초)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="기준선 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준선으로 저장")
+    parser.add_argument("--compare", action="store_true", help="기준선 대비 변화율 출력")
+
+    # 대역 설정 (FakeConfig 필드를 그대로 옵션으로 노출)
+    for field in fields(FakeConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}", type=type(field.default), default=field.default,
+        )
+    args = parser.parse_args()
+
+    config = FakeConfig(**{f.name: getattr(args, f.name) for f in fields(FakeConfig)})
+    install_fakes(config)
+    install_call_policy(args)
+
+    results = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "stream": args.stream,
+            "combined": args.combined,
+            "call_policy": None if args.no_call_policy else {
+                "hedge": args.hedge, "deadline_s": args.llm_deadline_s,
+            },
+            "fakes": asdict(config),
+        },
+        "stages": {},
+    }
+
+    # CSV / SQLite 산출물은 임시 폴더에 기록 (저장소의 data/ 를 건드리지 않음)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            for stage in args.stages:
+                print(f"측정 중: {stage} ...", flush=True)
+                results["stages"][stage] = BENCHES[stage](args, config)
+        finally:
+            os.chdir(cwd)
+
+    print()
+    print_results(results)
+    print_combined_savings(results)
+    write_json(args.output, results)
+    print(f"\n결과 파일: {args.output}")
+
+    if args.compare:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                compare(results, json.load(f))
+        else:
+            print(f"\n기준선 파일이 없습니다: {args.baseline} (--save-baseline 으로 먼저 저장)")
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"기준선 저장: {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+감성 분석 백엔드 벤치마크 (PyTorch 원본 vs ONNX fp32 vs ONNX int8)
+
+- 처리량: comments/sec
+- 정확도 변화: 원본 대비 라벨 일치율, 점수 평균 절대 오차
+
+사용법:
+    python benchmarks/bench_sentiment.py                  # 내장 샘플 문장 사용
+    python benchmarks/bench_sentiment.py --video-id VIDEO_ID  # 저장된 댓글 사용
+"""
+import os
+import sys
+import time
+import argparse
+
+# 프로젝트 루트를 PYTHONPATH에 추가
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.sentiment import (  # noqa: E402
+    MODEL_PATH, ONNX_DIR_NAME, ONNX_FP32_FILE, ONNX_INT8_FILE, SentimentEngine,
+)
+
+SAMPLE_COMMENTS = [
+    "영상 너무 유익했어요 감사합니다!",
+    "이건 좀 아닌 것 같네요... 실망입니다",
+    "편집 퀄리티 미쳤다 ㅋㅋㅋ",
+    "광고가 너무 많아서 보기 불편해요",
+    "오늘도 잘 보고 갑니다",
+    "설명이 너무 빨라서 이해가 안 돼요. 천천히 해주세요",
+    "와 이런 정보는 처음 알았네요 대박",
+    "음악 선곡이 너무 좋아요",
+    "걱정되네요 앞으로 어떻게 될지",
+    "화가 난다 진짜 이게 말이 되나",
+]
+
+
+def load_texts(video_id, repeat):
+    if video_id:
+        from src.comment_store import CommentStore
+
+        texts = CommentStore().read(video_id, ["text"])["text"]
+        if not texts:
+            raise SystemExit(f"저장된 댓글이 없습니다: {video_id}")
+        return texts
+    return SAMPLE_COMMENTS * repeat
+
+
+def run(engine, texts):
+    engine.predict(texts[: engine.batch_size])  # 워밍업
+    started = time.perf_counter()
+    results = engine.predict(texts)
+    elapsed = time.perf_counter() - started
+    return results, len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="감성 분석 백엔드 벤치마크")
+    parser.add_argument("--video-id", help="댓글 저장소에서 읽어올 영상 ID")
+    parser.add_argument("--repeat", type=int, default=200, help="샘플 문장 반복 횟수")
+    args = parser.parse_args()
+
+    texts = load_texts(args.video_id, args.repeat)
+    print(f"댓글 {len(texts)}개로 측정합니다.\n")
+
+    baseline_engine = SentimentEngine(backend="torch")
+    baseline, baseline_rate = run(baseline_engine, texts)
+
+    rows = [("torch (원본)", baseline_rate, 1.0, 0.0)]
+    for file_name in (ONNX_FP32_FILE, ONNX_INT8_FILE):
+        path = os.path.join(MODEL_PATH, ONNX_DIR_NAME, file_name)
+        if not os.path.isfile(path):
+            print(f"건너뜀: {path} 없음 (python model_export.py 실행 필요)")
+            continue
+
+        results, rate = run(SentimentEngine(onnx_path=path), texts)
+        agreement = sum(a["label"] == b["label"] for a, b in zip(results, baseline)) / len(texts)
+        score_drift = sum(abs(a["score"] - b["score"]) for a, b in zip(results, baseline)) / len(texts)
+        rows.append((f"onnx {file_name}", rate, agreement, score_drift))
+
+    print(f"\n{'backend':<24}{'comments/sec':>14}{'speedup':>10}{'label 일치':>12}{'score 오차':>12}")
+    for name, rate, agreement, drift in rows:
+        print(f"{name:<24}{rate:>14.1f}{rate / baseline_rate:>9.2f}x{agreement:>12.2%}{drift:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
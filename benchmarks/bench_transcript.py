@@ -0,0 +1,106 @@
+"""
+자막 정리 / 압축 벤치마크
+
+- 정확도: benchmarks/data/transcript_cleaning.jsonl 의 입력/기대 결과를 clean_transcript 가 모두 맞히는지 확인
+- 처리량: 롤링 자동 자막 형태의 합성 자막에 대한 clean_transcript / compress_transcript 시간과 줄어든 토큰 수
+
+사용법:
+    python benchmarks/bench_transcript.py                 # 정확도 확인 + 처리량 표
+    python benchmarks/bench_transcript.py --lines 20000
+    python benchmarks/bench_transcript.py --check         # 정확도만 확인 (틀리면 exit 1)
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# 프로젝트 루트를 PYTHONPATH에 추가
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.utils import clean_transcript, compress_transcript, estimate_tokens  # noqa: E402
+
+CORPUS_PATH = os.path.join(BASE_DIR, "benchmarks", "data", "transcript_cleaning.jsonl")
+
+WORDS = (
+    "오늘은 요리를 해볼 건데요 재료는 양파 감자 당근 그리고 돼지고기 입니다 먼저 "
+    "물을 끓이고 채소를 썰어서 넣어 주세요 불은 중불로 맞추고 십분 정도 기다립니다"
+).split()
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_corpus(corpus):
+    """clean_transcript 가 틀린 항목 목록을 반환"""
+    failures = []
+    for case in corpus:
+        got = clean_transcript(case["input"])
+        if got != case["expected"]:
+            failures.append((case, got))
+
+    print(f"정확도: {len(corpus) - len(failures)}/{len(corpus)}")
+    for case, got in failures:
+        print(f"  ✗ [{case['note']}] 기대 {case['expected']!r}, 결과 {got!r}")
+    return failures
+
+
+def make_transcript(lines, seed):
+    """앞 줄 끝 단어가 다음 줄 앞에 반복되고, 가끔 같은 줄 / 비발화 표시가 끼는 자동 자막"""
+    rng = random.Random(seed)
+    out = []
+    prev = []
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.05:
+            out.append("[음악]")
+            continue
+        if roll < 0.1 and out:
+            out.append(out[-1])
+            continue
+        words = prev[-rng.randint(0, 2):] if prev else []
+        words = words + rng.sample(WORDS, 4)
+        out.append(" ".join(words))
+        prev = words
+    return "\n".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자막 정리 / 압축 벤치마크")
+    parser.add_argument("--lines", type=int, default=5000, help="합성 자막 줄 수")
+    parser.add_argument("--max-tokens", type=int, default=2000, help="compress_transcript 토큰 예산")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="정확도 확인용 입력/기대 결과 목록 (JSON lines)")
+    parser.add_argument("--check", action="store_true", help="정확도만 확인 (틀린 항목이 있으면 exit 1)")
+    args = parser.parse_args()
+
+    failures = check_corpus(load_corpus(args.corpus))
+    if args.check:
+        sys.exit(1 if failures else 0)
+
+    text = make_transcript(args.lines, args.seed)
+    print(f"\n합성 자막 {args.lines:,}줄, 약 {estimate_tokens(text):,} 토큰")
+
+    for name, fn in (
+        ("clean_transcript", lambda: clean_transcript(text)),
+        (f"compress_transcript({args.max_tokens})", lambda: compress_transcript(text, args.max_tokens)),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<28} {best * 1000:>9.1f} ms  → 약 {estimate_tokens(out):,} 토큰")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+유튜브 URL → Video ID 파싱 마이크로 벤치마크
+
+- 정확도: benchmarks/data/video_urls.jsonl 의 입력/기대 ID 목록을 모두 맞히는지 확인
+- 처리량: 이전 구현(정규식 3개를 차례로 시도) / get_video_id (캐시 없음 / LRU 캐시) / extract_video_ids
+  (스프레드시트처럼 같은 URL 이 반복되는 목록 기준, URLs/sec)
+
+사용법:
+    python benchmarks/bench_url_parse.py                       # 정확도 확인 + 처리량 표
+    python benchmarks/bench_url_parse.py --urls 100000 --unique-ratio 0.2
+    python benchmarks/bench_url_parse.py --check               # 정확도만 확인 (틀리면 exit 1)
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import string
+import argparse
+
+# 프로젝트 루트를 PYTHONPATH에 추가
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.utils import _cached_video_id, _match_video_id, extract_video_ids, get_video_id  # noqa: E402
+
+CORPUS_PATH = os.path.join(BASE_DIR, "benchmarks", "data", "video_urls.jsonl")
+
+# 처리량 측정용 URL 형식 (실제 공유 링크 비율을 대략 반영)
+URL_TEMPLATES = [
+    "https://www.youtube.com/watch?v={id}",
+    "https://www.youtube.com/watch?v={id}&t=42s",
+    "https://youtu.be/{id}?si=AbCdEf123",
+    "https://m.youtube.com/watch?v={id}",
+    "https://youtube.com/shorts/{id}?feature=share",
+    "https://www.youtube.com/embed/{id}",
+    "https://www.youtube.com/live/{id}",
+    "{id}",
+    "https://www.youtube.com/channel/UCuAXFkgsw1L7xaCfnd5JJOw",
+]
+
+ID_CHARS = string.ascii_letters + string.digits + "_-"
+
+
+def legacy_get_video_id(url):
+    """비교용: 이전 구현 (호출마다 정규식 3개를 차례로 검색)"""
+    if not url:
+        return None
+    if len(url) == 11 and "http" not in url:
+        return url
+    patterns = [
+        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
+        r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
+        r'(?:shorts\/)([0-9A-Za-z_-]{11})',
+    ]
+    for p in patterns:
+        match = re.search(p, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_corpus(corpus):
+    """새 파서와 이전 구현의 정답 수를 출력하고, 새 파서가 틀린 항목 목록을 반환"""
+    failures = []
+    legacy_ok = 0
+    for case in corpus:
+        got = get_video_id(case["input"])
+        if got != case["expected"]:
+            failures.append((case, got))
+        legacy_ok += legacy_get_video_id(case["input"]) == case["expected"]
+
+    print(f"정확도: {len(corpus) - len(failures)}/{len(corpus)} (이전 구현 {legacy_ok}/{len(corpus)})")
+    for case, got in failures:
+        print(f"  ✗ [{case['note']}] {case['input']!r}: 기대 {case['expected']!r}, 결과 {got!r}")
+    return failures
+
+
+def make_urls(count, unique_ratio, seed):
+    """count 개 URL 목록 (서로 다른 URL 은 약 count * unique_ratio 개)"""
+    rng = random.Random(seed)
+    pool = [
+        rng.choice(URL_TEMPLATES).format(id="".join(rng.choices(ID_CHARS, k=11)))
+        for _ in range(max(1, int(count * unique_ratio)))
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def measure(name, fn, urls, repeat):
+    """repeat 번 중 가장 빠른 실행 시간 기준 처리량"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(urls)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<34} {best * 1000:>9.1f} ms {len(urls) / best:>14,.0f} URLs/sec")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유튜브 URL 파싱 마이크로 벤치마크")
+    parser.add_argument("--urls", type=int, default=50000, help="측정할 URL 개수")
+    parser.add_argument("--unique-ratio", type=float, default=0.1, help="서로 다른 URL 비율 (반복 입력 정도)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="정확도 확인용 입력/기대 ID 목록 (JSON lines)")
+    parser.add_argument("--check", action="store_true", help="정확도만 확인 (틀린 항목이 있으면 exit 1)")
+    args = parser.parse_args()
+
+    failures = check_corpus(load_corpus(args.corpus))
+    if args.check:
+        sys.exit(1 if failures else 0)
+
+    urls = make_urls(args.urls, args.unique_ratio, args.seed)
+    print(f"\nURL {len(urls):,}개 (서로 다른 URL {len(set(urls)):,}개)")
+
+    def uncached(items):
+        for url in items:
+            _match_video_id(url)
+
+    def cold_lru(items):
+        _cached_video_id.cache_clear()
+        for url in items:
+            get_video_id(url)
+
+    def warm_lru(items):
+        for url in items:
+            get_video_id(url)
+
+    baseline = measure("이전 구현 (정규식 3개)", lambda items: [legacy_get_video_id(u) for u in items], urls, args.repeat)
+    for name, fn in (
+        ("단일 정규식 (캐시 없음)", uncached),
+        ("get_video_id (빈 LRU 캐시에서 시작)", cold_lru),
+        ("get_video_id (LRU 캐시 적중)", warm_lru),
+        ("extract_video_ids", extract_video_ids),
+        ("extract_video_ids(unique=True)", lambda items: extract_video_ids(items, unique=True)),
+    ):
+        elapsed = measure(name, fn, urls, args.repeat)
+        print(f"{'':<34} 이전 구현 대비 ×{baseline / elapsed:.1f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+오프라인 벤치마크용 외부 서비스 대역 (YouTube 자막 / Data API / oEmbed / Gemini)
+
+- 모든 대역은 지연 시간(latency)과 응답 크기를 설정할 수 있음
+- 같은 seed / video_id 면 항상 같은 데이터를 돌려줌 (측정 간 비교 가능)
+- install_fakes(config) 가 src 모듈의 클라이언트 진입점을 대역으로 교체
+"""
+import json
+import time
+import random
+import threading
+from dataclasses import dataclass
+
+WORDS = (
+    "오늘 영상 에서는 파이썬 성능 최적화 캐시 메모리 스레드 프로세스 데이터 분석 "
+    "모델 요약 구독 좋아요 알림 설정 정말 중요한 부분 입니다 그래서 이렇게 하면"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    seed: int = 42
+    # 자막 API
+    transcript_latency_ms: float = 120.0
+    transcript_segments: int = 600
+    words_per_segment: int = 8
+    # YouTube Data API (commentThreads / comments, 요청 1회당)
+    comment_latency_ms: float = 80.0
+    comments_per_video: int = 500
+    page_size: int = 100
+    replies_per_thread: int = 0
+    # oEmbed / 썸네일 HEAD
+    oembed_latency_ms: float = 40.0
+    # Gemini (요청 1회당 기본 지연 + 프롬프트 1천 자당 지연)
+    llm_latency_ms: float = 800.0
+    llm_ms_per_1k_chars: float = 15.0
+    llm_payload_chars: int = 3000
+    llm_stream_chunks: int = 20
+    # 통합 모드 응답에서 필드 하나가 빠질 확률 (누락 필드 재요청 경로 측정용)
+    llm_missing_field_rate: float = 0.0
+    # 꼬리 지연 / 일시적 오류 (요청마다 독립적으로 발생, 호출 정책 측정용)
+    llm_tail_rate: float = 0.0
+    llm_tail_ms: float = 5000.0
+    llm_error_rate: float = 0.0
+
+
+def _sleep_ms(ms):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def _sentence(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+# -------------------------------
+# 자막 API (YouTubeTranscriptApi)
+# -------------------------------
+class FakeSnippet:
+    __slots__ = ("text", "start", "duration")
+
+    def __init__(self, text, start, duration):
+        self.text = text
+        self.start = start
+        self.duration = duration
+
+
+class FakeTranscript:
+    language_code = "ko"
+    is_translatable = True
+
+    def __init__(self, video_id, config):
+        self.video_id = video_id
+        self.config = config
+
+    def fetch(self):
+        _sleep_ms(self.config.transcript_latency_ms)
+        rng = random.Random(f"{self.config.seed}:{self.video_id}")
+        snippets = []
+        prev = []
+        for i in range(self.config.transcript_segments):
+            words = [rng.choice(WORDS) for _ in range(self.config.words_per_segment)]
+            # 자동 자막처럼 앞 구간 끝부분이 다음 구간 앞에 반복되거나 [음악] 표시가 섞임
+            if prev and i % 3 == 0:
+                words = prev[-2:] + words
+            if i % 25 == 0:
+                words = ["[음악]"] + words
+            snippets.append(FakeSnippet(" ".join(words), i * 2.5, 2.5))
+            prev = words
+        return snippets
+
+    def translate(self, language):
+        return self
+
+
+class FakeTranscriptList:
+    def __init__(self, video_id, config):
+        self.transcript = FakeTranscript(video_id, config)
+
+    def find_manually_created_transcript(self, languages):
+        raise LookupError("수동 자막 없음")
+
+    def find_generated_transcript(self, languages):
+        return self.transcript
+
+    def __iter__(self):
+        return iter([self.transcript])
+
+
+class FakeTranscriptApi:
+    def __init__(self, config):
+        self.config = config
+
+    def list(self, video_id):
+        _sleep_ms(self.config.transcript_latency_ms / 4)
+        return FakeTranscriptList(video_id, self.config)
+
+
+# -------------------------------
+# YouTube Data API (commentThreads / comments)
+# -------------------------------
+class FakeRequest:
+    def __init__(self, client, kind, params, page=0):
+        self.client = client
+        self.kind = kind
+        self.params = params
+        self.page = page
+
+    def execute(self):
+        config = self.client.config
+        _sleep_ms(config.comment_latency_ms)
+        rng = random.Random(f"{config.seed}:{self.kind}:{json.dumps(self.params, sort_keys=True)}:{self.page}")
+
+        if self.kind == "threads":
+            total = config.comments_per_video
+            start = self.page * config.page_size
+            count = max(0, min(config.page_size, total - start))
+            items = [self._thread(rng, start + i) for i in range(count)]
+            has_next = start + count < total
+        else:
+            items = [self._comment(rng, f"{self.params['parentId']}.r{i}") for i in range(config.replies_per_thread)]
+            has_next = False
+
+        response = {"items": items}
+        if has_next:
+            response["nextPageToken"] = str(self.page + 1)
+        return response
+
+    def _comment(self, rng, comment_id):
+        day = 1 + rng.randrange(28)
+        return {
+            "id": comment_id,
+            "snippet": {
+                "authorDisplayName": f"user{rng.randrange(10000)}",
+                "textOriginal": _sentence(rng, rng.randint(3, 20)),
+                "likeCount": rng.randrange(500),
+                "publishedAt": f"2024-01-{day:02d}T{rng.randrange(24):02d}:00:00Z",
+                "updatedAt": f"2024-01-{day:02d}T{rng.randrange(24):02d}:00:00Z",
+            },
+        }
+
+    def _thread(self, rng, idx):
+        video_id = self.params.get("videoId", "")
+        top = self._comment(rng, f"{video_id}.t{idx}")
+        return {
+            "id": top["id"],
+            "snippet": {"topLevelComment": top, "totalReplyCount": self.client.config.replies_per_thread},
+            "replies": {"comments": []},
+        }
+
+
+class FakeResource:
+    def __init__(self, client, kind):
+        self.client = client
+        self.kind = kind
+
+    def list(self, **params):
+        return FakeRequest(self.client, self.kind, params)
+
+    def list_next(self, request, response):
+        if "nextPageToken" not in response:
+            return None
+        return FakeRequest(self.client, self.kind, request.params, request.page + 1)
+
+
+class FakeYouTubeClient:
+    def __init__(self, config):
+        self.config = config
+
+    def commentThreads(self):
+        return FakeResource(self, "threads")
+
+    def comments(self):
+        return FakeResource(self, "comments")
+
+
+# -------------------------------
+# oEmbed / 썸네일 (requests.Session)
+# -------------------------------
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeHttpSession:
+    def __init__(self, config):
+        self.config = config
+
+    def get(self, url, timeout=None):
+        _sleep_ms(self.config.oembed_latency_ms)
+        return FakeResponse({"title": f"오프라인 벤치마크 영상 ({url[-20:]})"})
+
+    def head(self, url, timeout=None):
+        _sleep_ms(self.config.oembed_latency_ms)
+        return FakeResponse(None)
+
+
+# -------------------------------
+# Gemini (GenerativeModel)
+# -------------------------------
+class FakeUsage:
+    def __init__(self, prompt_chars, response_chars):
+        self.prompt_token_count = prompt_chars // 2
+        self.candidates_token_count = response_chars // 2
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerateResponse:
+    def __init__(self, text, prompt_chars):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt_chars, len(text))
+
+
+class FakeStreamResponse:
+    def __init__(self, text, prompt_chars, chunks, delay_ms):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt_chars, len(text))
+        self._chunks = chunks
+        self._delay_ms = delay_ms
+
+    def __iter__(self):
+        size = max(1, -(-len(self.text) // self._chunks))
+        for i in range(0, len(self.text), size):
+            _sleep_ms(self._delay_ms)
+            yield FakeChunk(self.text[i:i + size])
+
+
+class FakeServiceUnavailable(Exception):
+    """503 대역 (이름으로 일시적 오류 판별)"""
+
+    code = 503
+
+
+class FakeDeadlineExceeded(Exception):
+    """요청 타임아웃 대역"""
+
+    code = 504
+
+
+class FakeGenerativeModel:
+    """프롬프트 종류(요약 map / reduce / 단일 요약 / 창작)에 맞는 JSON 을 돌려주는 대역"""
+
+    def __init__(self, model_name, config):
+        self.model_name = model_name
+        self.config = config
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _call_delay(self, delay, timeout):
+        """꼬리 지연 / 일시적 오류 주입. 응답 내용과 달리 같은 프롬프트라도 요청마다 달라짐"""
+        with self._lock:
+            self._calls += 1
+            rng = random.Random(f"{self.config.seed}:{self.model_name}:call:{self._calls}")
+        if rng.random() < self.config.llm_error_rate:
+            _sleep_ms(delay * rng.random() / 4)
+            raise FakeServiceUnavailable("503 Service Unavailable (fake)")
+        if rng.random() < self.config.llm_tail_rate:
+            delay += self.config.llm_tail_ms
+        if timeout is not None and delay > timeout * 1000:
+            _sleep_ms(timeout * 1000)
+            raise FakeDeadlineExceeded("504 Deadline Exceeded (fake)")
+        return delay
+
+    def _payload(self, prompt, rng):
+        if "요청한 항목" in prompt:
+            return self._combined_payload(prompt, rng)
+        return self._single_payload(prompt, rng)
+
+    def _combined_payload(self, prompt, rng):
+        """통합 모드 (누락 필드 재요청 포함): 스키마에 있는 필드만 (설정한 확률로 하나를 빠뜨림)"""
+        payload = {**self._single_payload("summary_3lines", rng), **self._single_payload("", rng)}
+        requested = [name for name in payload if f'"{name}"' in prompt]
+        payload = {name: payload[name] for name in requested}
+        if len(requested) > 1 and rng.random() < self.config.llm_missing_field_rate:
+            del payload[rng.choice(requested)]
+        return payload
+
+    def _single_payload(self, prompt, rng):
+        filler = self.config.llm_payload_chars
+        if '"part"' in prompt:
+            return {
+                "part": 1,
+                "summary": [_sentence(rng, 12)],
+                "topics": [{"segment": rng.randrange(100), "title": _sentence(rng, 4)}],
+                "keywords": [rng.choice(WORDS) for _ in range(4)],
+            }
+        if "summary_3lines" in prompt:
+            return {
+                "summary_3lines": [_sentence(rng, 10) for _ in range(3)],
+                "chapters": [{"segment": i * 50, "time": "초반", "title": _sentence(rng, 4)} for i in range(4)],
+                "keywords": [rng.choice(WORDS) for _ in range(6)],
+            }
+        words = max(1, filler // 4)
+        return {
+            "blog_post": {"title": _sentence(rng, 6), "content": _sentence(rng, words)},
+            "shorts_script": _sentence(rng, max(1, words // 4)),
+        }
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        rng = random.Random(f"{self.config.seed}:{len(prompt)}:{prompt[-200:]}")
+        text = json.dumps(self._payload(prompt, rng), ensure_ascii=False)
+        delay = self.config.llm_latency_ms + self.config.llm_ms_per_1k_chars * len(prompt) / 1000
+        delay = self._call_delay(delay, (request_options or {}).get("timeout"))
+
+        if stream:
+            # 첫 청크까지 지연의 절반, 나머지는 청크 사이에 나눠서 도착
+            _sleep_ms(delay / 2)
+            per_chunk = delay / 2 / max(1, self.config.llm_stream_chunks)
+            return FakeStreamResponse(text, len(prompt), self.config.llm_stream_chunks, per_chunk)
+
+        _sleep_ms(delay)
+        return FakeGenerateResponse(text, len(prompt))
+
+
+# -------------------------------
+# 설치
+# -------------------------------
+def install_fakes(config):
+    """
+    src 모듈의 외부 클라이언트 진입점을 대역으로 교체 (벤치마크 프로세스 안에서만 사용).
+    API 키 확인도 통과하도록 더미 키를 채운다.
+    """
+    from src import agents, clients, comment_scraper, utils
+
+    utils._ytt_api = FakeTranscriptApi(config)
+    clients._http_session = FakeHttpSession(config)
+
+    youtube = FakeYouTubeClient(config)
+    comment_scraper.get_youtube_client = lambda: youtube
+    comment_scraper.YOUTUBE_API_KEY = "offline-benchmark"
+
+    models = {}
+    lock = threading.Lock()
+
+    def get_generative_model(model_name, generation_config, safety_settings=None):
+        with lock:
+            return models.setdefault(model_name, FakeGenerativeModel(model_name, config))
+
+    agents.get_generative_model = get_generative_model
+    agents.API_KEY = "offline-benchmark"
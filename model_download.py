@@ -1,12 +1,16 @@
 # model_download.py
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
 import os
 
-# 1) 허깅페이스에 공개되어 있는 감정분석 모델
-MODEL_NAME = "nlp04/korean_sentiment_analysis_kcelectra"
+from src.sentiment import MODEL_NAME, MODEL_PATH
+from src.comment_clusters import EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_PATH
 
-# 2) 로컬에 저장할 폴더 경로 (본인이 사용할 로컬 주소로 변경할 것)
-SAVE_DIR = r"C:\Users\CGB\korean_sentiment_kcelectra"
+# 1) 허깅페이스에 공개되어 있는 감정분석 모델: MODEL_NAME
+
+# 2) 로컬에 저장할 폴더 경로
+#    기본값은 프로젝트 내 models/korean_sentiment_kcelectra 이며,
+#    .env 의 SENTIMENT_MODEL_PATH 로 변경 가능 (src/sentiment.py 도 같은 경로를 사용)
+SAVE_DIR = MODEL_PATH
 
 os.makedirs(SAVE_DIR, exist_ok=True)
 
@@ -17,3 +21,15 @@ model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
 tokenizer.save_pretrained(SAVE_DIR)
 model.save_pretrained(SAVE_DIR)
 print(f"다운로드 완료, 여기 저장됨: {SAVE_DIR}")
+
+# 3) 댓글 주제 묶기용 문장 임베딩 모델 (src/comment_clusters.py)
+#    기본값은 models/ko_sroberta_multitask, .env 의 EMBEDDING_MODEL_PATH 로 변경 가능
+os.makedirs(EMBEDDING_MODEL_PATH, exist_ok=True)
+
+print(f"▼ 모델 다운로드 시작: {EMBEDDING_MODEL_NAME}")
+tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME)
+model = AutoModel.from_pretrained(EMBEDDING_MODEL_NAME)
+
+tokenizer.save_pretrained(EMBEDDING_MODEL_PATH)
+model.save_pretrained(EMBEDDING_MODEL_PATH)
+print(f"다운로드 완료, 여기 저장됨: {EMBEDDING_MODEL_PATH}")
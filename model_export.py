@@ -0,0 +1,49 @@
+# model_export.py
+# model_download.py 로 받은 KcELECTRA 모델을 CPU 추론용 ONNX / int8 동적 양자화 ONNX 로 변환
+import os
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from src.sentiment import MODEL_PATH, ONNX_DIR_NAME, ONNX_FP32_FILE, ONNX_INT8_FILE
+
+# 1) 입력: model_download.py 로 저장한 로컬 모델 폴더
+if not os.path.isdir(MODEL_PATH):
+    raise SystemExit(f"모델 폴더가 없습니다: {MODEL_PATH}\n먼저 python model_download.py 를 실행하세요.")
+
+# 2) 출력: 모델 폴더 아래 onnx/ (src/sentiment.py 가 자동으로 찾는 위치)
+ONNX_DIR = os.path.join(MODEL_PATH, ONNX_DIR_NAME)
+FP32_PATH = os.path.join(ONNX_DIR, ONNX_FP32_FILE)
+INT8_PATH = os.path.join(ONNX_DIR, ONNX_INT8_FILE)
+
+os.makedirs(ONNX_DIR, exist_ok=True)
+
+tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
+model.eval()
+
+# 배치 크기 / 문장 길이는 가변 (동적 패딩 배치를 그대로 넣을 수 있도록)
+sample = tokenizer(["샘플 댓글입니다", "내보내기용 더미 입력"], padding=True, return_tensors="pt")
+input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+dynamic_axes["logits"] = {0: "batch"}
+
+print(f"▼ ONNX 내보내기 시작: {FP32_PATH}")
+with torch.inference_mode():
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in input_names),
+        FP32_PATH,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+
+print(f"▼ int8 동적 양자화 시작: {INT8_PATH}")
+quantize_dynamic(FP32_PATH, INT8_PATH, weight_type=QuantType.QInt8)
+
+for path in (FP32_PATH, INT8_PATH):
+    print(f"  - {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+print("변환 완료. src/sentiment.py 는 int8 모델을 자동으로 사용합니다. (SENTIMENT_BACKEND=torch 로 비활성화)")
@@ -1,23 +1,88 @@
 import os
 import json
-import google.generativeai as genai
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Any, Dict
-
-from .utils import get_robust_transcript, clean_json_text
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import (
+    TranscriptIndex,
+    TranscriptSession,
+    clean_json_text,
+    compress_transcript,
+    estimate_tokens,
+    parse_partial_json,
+    split_transcript,
+)
+from .clients import GEMINI_API_KEY, get_generative_model
+from .llm_cache import LLMCache, make_cache_key, open_llm_cache
+from .llm_policy import CallDeadlineExceeded, CallPolicy, get_call_policy, is_transient, iter_with_deadline
+from .tracing import Tracer, get_tracer
 
 load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = GEMINI_API_KEY
 
+# genai.configure 는 첫 모델 생성 시 clients.get_generative_model 에서 호출
 if not API_KEY:
     print("경고: .env 파일에 GEMINI_API_KEY가 없습니다.")
-else:
-    genai.configure(api_key=API_KEY)
 
 # 모델 설정
 CREATIVE_MODEL_NAME = "gemini-2.5-pro"
 SUMMARY_MODEL_NAME = "gemini-2.5-flash"
 
+# 단일 프롬프트에 넣는 자막 최대 길이 (이보다 길면 요약은 map-reduce 로 처리)
+MAX_TRANSCRIPT_CHARS = 30000
+
+# 단일 프롬프트에 넣는 자막 토큰 예산 (넘으면 compress_transcript 로 추출 요약)
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "12000"))
+
+# map-reduce 요약 설정 (환경 변수로 덮어쓰기 가능)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+# 통합 모드 (요약 + 창작을 한 번의 요청으로) 설정
+COMBINED_MODEL_NAME = os.getenv("COMBINED_MODEL_NAME", CREATIVE_MODEL_NAME)
+COMBINED_MAX_RETRIES = int(os.getenv("COMBINED_MAX_RETRIES", "1"))  # 누락 필드만 다시 요청하는 횟수
+
+
+# -------------------------------
+# 통합 응답 스키마 (필드 → 검사 함수)
+# -------------------------------
+def _is_text(value: Any) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _is_text_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(_is_text(v) for v in value)
+
+
+def _is_chapter_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(
+        isinstance(c, dict) and _is_text(c.get("title")) for c in value
+    )
+
+
+def _is_blog_post(value: Any) -> bool:
+    return isinstance(value, dict) and _is_text(value.get("title")) and _is_text(value.get("content"))
+
+
+SUMMARY_FIELDS = ("summary_3lines", "chapters", "keywords")
+CREATIVE_FIELDS = ("blog_post", "shorts_script")
+
+COMBINED_SCHEMA: Dict[str, Callable[[Any], bool]] = {
+    "summary_3lines": _is_text_list,
+    "chapters": _is_chapter_list,
+    "keywords": _is_text_list,
+    "blog_post": _is_blog_post,
+    "shorts_script": _is_text,
+}
+
+
+def missing_fields(result: Dict[str, Any], fields: Sequence[str] = tuple(COMBINED_SCHEMA)) -> List[str]:
+    """스키마 검사를 통과하지 못한(없거나 형식이 틀린) 필드 목록"""
+    return [name for name in fields if not COMBINED_SCHEMA[name](result.get(name))]
+
 
 class VideoAnalyst:
     """
@@ -27,9 +92,40 @@ class VideoAnalyst:
     을 담당하는 에이전트 클래스
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        transcript_session: Optional[TranscriptSession] = None,
+        llm_cache: Optional[LLMCache] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
+        chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+        map_concurrency: int = SUMMARY_MAP_CONCURRENCY,
+        tracer: Optional[Tracer] = None,
+        call_policy: Optional[CallPolicy] = None,
+        comment_context: Optional[str] = None,
+    ) -> None:
         self.api_key_exists = bool(API_KEY)
 
+        # Gemini 호출 마감 시간 / 재시도 / hedging / 대체 모델 정책 (기본값은 프로세스 공유)
+        self.policy = call_policy or get_call_policy()
+
+        # 댓글 주제 묶음 요약 (comment_clusters.format_cluster_context). 있으면 요약/창작 프롬프트에 참고용으로 추가
+        self.comment_context = comment_context
+
+        # 단계별 시간/토큰/캐시 적중 계측 (None 이면 기록하지 않음)
+        self.tracer = get_tracer(tracer)
+
+        # summarize / create_content 가 같은 자막을 공유 (영상당 한 번만 요청)
+        self.transcripts = transcript_session or TranscriptSession()
+
+        # 디스크 응답 캐시 (refresh=True 면 캐시를 읽지 않고 새로 생성한 결과로 덮어씀)
+        self.cache = (llm_cache or open_llm_cache()) if use_cache else None
+        self.refresh = refresh
+
+        # 긴 자막 요약(map-reduce) 시 청크 크기 / 동시 요청 수 상한
+        self.chunk_tokens = chunk_tokens
+        self.map_concurrency = max(1, map_concurrency)
+
         # 공통 safety 설정
         self.safety_settings = [
             {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -49,6 +145,11 @@ class VideoAnalyst:
             "response_mime_type": "application/json",
         }
 
+        self.combined_generation_config = {
+            "temperature": 0.7,  # 통합 모드는 요약 안정성과 창작 다양성의 중간
+            "response_mime_type": "application/json",
+        }
+
     # -------------------------------
     # 내부 유틸: 공통 JSON 파싱 함수
     # -------------------------------
@@ -71,24 +172,211 @@ class VideoAnalyst:
                     "raw_response_preview": response_text[:500],
                 }
 
+    # -------------------------------
+    # 내부 유틸: 캐시를 거치는 Gemini 호출
+    # -------------------------------
+    def _generate(
+        self, model_name: str, generation_config: Dict[str, Any], prompt: str, stage: str
+    ) -> Dict[str, Any]:
+        """
+        (모델명, 생성 설정, safety 설정, 프롬프트) 해시로 캐시를 먼저 조회하고,
+        없을 때만 generate_content 호출. 파싱에 성공한 응답만 저장한다.
+        stage 이름으로 "llm.<stage>" 구간의 시간/크기/토큰 수/캐시 적중을 기록한다.
+        """
+        key = make_cache_key(model_name, generation_config, self.safety_settings, prompt)
+
+        with self.tracer.span(f"llm.{stage}", model=model_name) as record:
+            record["chars_in"] = len(prompt)
+            record["bytes_in"] = len(prompt.encode("utf-8"))
+            record["cache_hit"] = False
+
+            if self.cache is not None and not self.refresh:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    parsed = self._parse_json_response(cached)
+                    if "error" not in parsed:
+                        record["cache_hit"] = True
+                        record["chars_out"] = len(cached)
+                        return parsed
+
+            def request(name: str, timeout: Optional[float]) -> Any:
+                model = get_generative_model(name, generation_config, self.safety_settings)
+                return model.generate_content(prompt, **self._request_options(timeout))
+
+            response, call = self.policy.call(model_name, request)
+            self._record_call(record, call)
+            parsed = self._parse_json_response(response.text)
+
+            record["chars_out"] = len(response.text)
+            record["bytes_out"] = len(response.text.encode("utf-8"))
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None:
+                record["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+                record["response_tokens"] = getattr(usage, "candidates_token_count", None)
+
+            # 대체 모델 응답은 원래 모델 키로 캐시하지 않음 (다음 실행에서 원래 모델로 다시 시도)
+            if self.cache is not None and "error" not in parsed and "fallback_from" not in call:
+                self.cache.set(key, response.text)
+            return parsed
+
+    @staticmethod
+    def _request_options(timeout: Optional[float]) -> Dict[str, Any]:
+        """남은 마감 시간을 SDK 요청 타임아웃으로 전달 (포기한 요청이 계속 붙잡고 있지 않도록)"""
+        if timeout is None:
+            return {}
+        return {"request_options": {"timeout": max(1.0, timeout)}}
+
+    @staticmethod
+    def _record_call(record: Dict[str, Any], call: Dict[str, Any]) -> None:
+        """호출 정책 결과(요청 횟수 / hedging / 대체 모델)를 계측 기록에 추가"""
+        record["attempts"] = call["attempts"]
+        record["hedged"] = call["hedged"]
+        if "fallback_from" in call:
+            record["model"] = call["model"]
+            record["fallback_from"] = call["fallback_from"]
+            record["fallback_reason"] = call["fallback_reason"]
+
+    def _generate_stream(
+        self, model_name: str, generation_config: Dict[str, Any], prompt: str, stage: str
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        _generate 의 스트리밍 버전: 받은 조각을 이어 붙이며 ("partial", 지금까지 파싱된 dict) 를,
+        마지막에 ("final", 파싱 결과) 를 돌려준다. (캐시 적중 시 partial 없이 바로 final)
+        조각 수신도 호출 정책의 마감 시간 안에서만 기다리고, 수신 중 마감 시간 초과 / 일시적 오류가 나면
+        대체 모델(없으면 같은 모델)의 스트리밍 없는 _generate 로 마무리.
+        그 밖의 요청 중 예외는 "llm.<stage>" 구간에 기록한 뒤 그대로 다시 발생
+        """
+        key = make_cache_key(model_name, generation_config, self.safety_settings, prompt)
+
+        with self.tracer.span(f"llm.{stage}", model=model_name, stream=True) as record:
+            record["chars_in"] = len(prompt)
+            record["bytes_in"] = len(prompt.encode("utf-8"))
+            record["cache_hit"] = False
+
+            if self.cache is not None and not self.refresh:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    parsed = self._parse_json_response(cached)
+                    if "error" not in parsed:
+                        record["cache_hit"] = True
+                        record["chars_out"] = len(cached)
+                        yield "final", parsed
+                        return
+
+            def request(name: str, timeout: Optional[float]) -> Any:
+                model = get_generative_model(name, generation_config, self.safety_settings)
+                return model.generate_content(prompt, stream=True, **self._request_options(timeout))
+
+            # 스트림 연결은 정책(마감 시간 / 재시도 / 대체 모델)을 그대로 적용 (중복 요청은 보내지 않음),
+            # 조각 수신은 연결한 모델의 남은 마감 시간 안에서만 기다림
+            started = time.perf_counter()
+            buffer = ""
+            last_partial = None
+            response, call = self.policy.call(model_name, request, hedge=False)
+            self._record_call(record, call)
+
+            try:
+                for chunk in iter_with_deadline(response, call["deadline_at"], call["model"]):
+                    if not buffer:
+                        record["first_chunk_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    buffer += chunk.text
+
+                    partial = parse_partial_json(buffer)
+                    if partial and partial != last_partial:
+                        last_partial = partial
+                        yield "partial", partial
+            except Exception as e:
+                if not (isinstance(e, CallDeadlineExceeded) or is_transient(e)):
+                    raise
+                # 이미 보낸 partial 은 최종 결과로 덮어쓰이므로 스트리밍 없는 요청으로 다시 받음
+                recovery_model = self.policy.fallbacks.get(call["model"], call["model"])
+                record["stream_error"] = type(e).__name__
+                record["recovered_with"] = recovery_model
+                yield "final", self._generate(recovery_model, generation_config, prompt, f"{stage}.recovery")
+                return
+
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None:
+                record["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+                record["response_tokens"] = getattr(usage, "candidates_token_count", None)
+
+            record["chars_out"] = len(buffer)
+            record["bytes_out"] = len(buffer.encode("utf-8"))
+
+            parsed = self._parse_json_response(buffer)
+            if self.cache is not None and "error" not in parsed and "fallback_from" not in call:
+                self.cache.set(key, buffer)
+            yield "final", parsed
+
+    # -------------------------------
+    # 내부 유틸: 자막 조회 (세션 공유)
+    # -------------------------------
+    def _get_transcript(self, video_id: str, transcript: Optional[str]) -> Optional[str]:
+        """
+        호출자가 자막을 넘겨주면 세션에 등록 후 그대로 사용하고,
+        없으면 세션에서 조회 (최초 1회만 실제 요청)
+        """
+        if transcript is not None:
+            self.transcripts.put(video_id, transcript)
+            return transcript
+        return self.transcripts.get(video_id, tracer=self.tracer)
+
+    def _comment_block(self) -> str:
+        """프롬프트에 덧붙일 시청자 댓글 주제 (없으면 빈 문자열)"""
+        if not self.comment_context:
+            return ""
+        return f"""
+[VIEWER_COMMENTS]  (시청자 댓글을 의미별로 묶은 주제와 대표 댓글 — 참고용)
+- 시청자가 주로 반응한 부분/궁금해하는 점을 파악하는 데만 사용한다.
+- 자막과 다르거나 자막에 없는 내용은 사실로 쓰지 않는다.
+{self.comment_context}
+[END_VIEWER_COMMENTS]
+"""
+
+    def _fit_transcript(self, text: str) -> str:
+        """
+        단일 요청 프롬프트용 자막: 토큰 예산과 글자 수 상한을 둘 다 넘지 않도록
+        앞부분을 자르는 대신 전체에서 핵심 줄을 골라 압축
+        """
+        budget = min(TRANSCRIPT_TOKEN_BUDGET, estimate_tokens(text[:MAX_TRANSCRIPT_CHARS]))
+        return compress_transcript(text, budget, tracer=self.tracer)[:MAX_TRANSCRIPT_CHARS]
+
     # -------------------------------
     # [Module 1] 요약 에이전트
     # -------------------------------
-    def summarize(self, video_id: str) -> Dict[str, Any]:
-        """영상 자막 기반 요약/챕터/키워드 추출"""
+    def summarize(
+        self, video_id: str, transcript: Optional[str] = None, mode: str = "auto"
+    ) -> Dict[str, Any]:
+        """
+        영상 자막 기반 요약/챕터/키워드 추출
+        - mode="auto": 자막이 MAX_TRANSCRIPT_CHARS 보다 길면 map-reduce, 아니면 단일 요청
+        - mode="single": 자막을 토큰 예산 안으로 압축(compress_transcript)한 단일 요청
+        - mode="map_reduce": 길이와 관계없이 청크 요약 후 병합
+        """
+        with self.tracer.span("summarize", video_id=video_id, mode=mode) as record:
+            result = self._summarize(video_id, transcript, mode)
+            if "error" in result:
+                record["error"] = result["error"]
+            return result
 
+    def _summarize(self, video_id: str, transcript: Optional[str], mode: str) -> Dict[str, Any]:
         if not self.api_key_exists:
             return {"error": "GEMINI_API_KEY가 설정되지 않았습니다."}
 
-        text = get_robust_transcript(video_id)
+        text = self._get_transcript(video_id, transcript)
         if not text:
             return {"error": "자막을 가져올 수 없습니다. (자막 미지원 영상 또는 추출 실패)"}
 
-        model = genai.GenerativeModel(
-            model_name=SUMMARY_MODEL_NAME,
-            generation_config=self.summary_generation_config,
-            safety_settings=self.safety_settings,
-        )
+        # 구간 시각이 있으면 [구간 번호] 를 붙여 보내고 챕터 시작 구간을 번호로 받음
+        index = self.transcripts.get_index(video_id, tracer=self.tracer)
+        if index is None or not index.has_timestamps:
+            index = None
+
+        if mode == "map_reduce" or (mode == "auto" and len(text) > MAX_TRANSCRIPT_CHARS):
+            return self._summarize_map_reduce(text, index)
+
+        text = self._fit_transcript(index.marked_text() if index else text)
+        chapter_rule, chapter_example = self._chapter_format(index is not None)
 
         prompt = f"""
 너는 유튜브 영상의 자막을 기반으로 콘텐츠를 분석하는 **전문 영상 분석가**이다.
@@ -106,8 +394,7 @@ class VideoAnalyst:
 
 2. chapters
    - 영상 흐름을 2~6개 구간으로 나눈다.
-   - time 필드는 "초반", "중반", "후반", "도입부", "결론부" 등
-     **상대적인 흐름 표현**만 사용한다. (구체적인 분 단위/초 단위 시간은 쓰지 않는다.)
+{chapter_rule}
    - title은 해당 구간의 내용을 한 문장으로 요약한 소제목 형태로 작성한다.
 
 3. keywords
@@ -119,46 +406,189 @@ class VideoAnalyst:
 [출력 JSON 스키마]  (필드명은 절대 바꾸지 말 것)
 {{
   "summary_3lines": ["문장1", "문장2", "문장3"],
-  "chapters": [
-    {{"time": "초반", "title": "소제목1"}},
-    {{"time": "중반", "title": "소제목2"}}
-  ],
+  "chapters": {chapter_example},
   "keywords": ["키워드1", "키워드2", "키워드3", "키워드4", "키워드5"]
 }}
 
 위 스키마를 반드시 그대로 따르고, 추가 필드나 주석을 넣지 마라.
-
+{self._comment_block()}
 [TRANSCRIPT]
 {text}
 [END_TRANSCRIPT]
         """
 
         try:
-            response = model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            result = self._generate(
+                SUMMARY_MODEL_NAME, self.summary_generation_config, prompt, "summary"
+            )
         except Exception as e:
             return {"error": f"AI 분석 실패: {str(e)}"}
+        return self._resolve_chapters(result, index)
+
+    @staticmethod
+    def _chapter_format(timed: bool) -> Tuple[str, str]:
+        """챕터 위치 지시문과 스키마 예시 (구간 시각이 있으면 구간 번호, 없으면 상대 표현)"""
+        if timed:
+            rule = (
+                "   - 자막 각 줄 앞의 [숫자] 는 구간 번호이다.\n"
+                "     segment 필드에는 챕터가 시작되는 줄의 구간 번호(정수)를 그대로 쓴다. (시간을 직접 쓰지 않는다.)"
+            )
+            example = '[\n    {"segment": 0, "title": "소제목1"},\n    {"segment": 42, "title": "소제목2"}\n  ]'
+        else:
+            rule = (
+                '   - time 필드는 "초반", "중반", "후반", "도입부", "결론부" 등\n'
+                "     **상대적인 흐름 표현**만 사용한다. (구체적인 분 단위/초 단위 시간은 쓰지 않는다.)"
+            )
+            example = '[\n    {"time": "초반", "title": "소제목1"},\n    {"time": "중반", "title": "소제목2"}\n  ]'
+        return rule, example
+
+    @staticmethod
+    def _resolve_chapters(result: Dict[str, Any], index: Optional[TranscriptIndex]) -> Dict[str, Any]:
+        """모델이 고른 구간 번호를 자막 색인으로 실제 시각(mm:ss)으로 변환"""
+        if index is not None and "error" not in result and "chapters" in result:
+            result["chapters"] = index.resolve_chapters(result["chapters"])
+        return result
+
+    # -------------------------------
+    # [Module 1-1] 긴 자막 요약 (map-reduce)
+    # -------------------------------
+    def _summarize_map_reduce(self, text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+        """
+        전체 자막을 토큰 기준 청크로 나눠 Flash 로 병렬 요약(map)한 뒤,
+        부분 결과를 하나의 summary_3lines / chapters / keywords 로 병합(reduce)
+        - index 가 있으면 청크에 [구간 번호] 를 붙여 보내고 챕터 시작 구간을 번호로 받음
+        """
+        timed = index is not None
+        chunks = split_transcript(index.marked_text() if timed else text, self.chunk_tokens)
+        total = len(chunks)
+
+        with ThreadPoolExecutor(max_workers=min(self.map_concurrency, total)) as pool:
+            partials = list(
+                pool.map(
+                    lambda args: self._summarize_chunk(*args),
+                    [(idx, total, chunk, timed) for idx, chunk in enumerate(chunks, start=1)],
+                )
+            )
+
+        valid = [p for p in partials if "error" not in p]
+        if not valid:
+            first_error = partials[0].get("error", "알 수 없는 오류") if partials else "빈 자막"
+            return {"error": f"AI 분석 실패 (청크 요약): {first_error}"}
+
+        partials_json = json.dumps(valid, ensure_ascii=False)
+        if timed:
+            chapter_rule = (
+                "   - 각 챕터의 segment 는 [PARTIALS] 의 topics 에 있는 segment(구간 번호) 중 "
+                "그 챕터가 시작되는 번호를 그대로 쓴다."
+            )
+            chapter_example = '[\n    {"segment": 0, "title": "소제목1"},\n    {"segment": 420, "title": "소제목2"}\n  ]'
+        else:
+            chapter_rule = '   - time 필드는 "초반", "중반", "후반", "도입부", "결론부" 등 상대적인 흐름 표현만 사용한다.'
+            chapter_example = '[\n    {"time": "초반", "title": "소제목1"},\n    {"time": "중반", "title": "소제목2"}\n  ]'
+
+        prompt = f"""
+너는 유튜브 영상의 자막을 기반으로 콘텐츠를 분석하는 **전문 영상 분석가**이다.
+
+긴 영상을 {total}개 구간으로 나누어 구간별로 요약한 결과가 [PARTIALS] 에 **시간 순서대로** 있다.
+이 부분 결과만을 근거로 영상 전체를 분석하여, **정확한 JSON만** 출력하라.
+- 부분 결과에 없는 정보는 추측해서 만들지 말 것.
+- 설명 문장, 마크다운, ```json 등의 코드블록은 절대 포함하지 말 것.
+- 모든 값은 **자연스러운 한국어**로 작성할 것.
+
+[요청사항]
+1. summary_3lines: 영상 전체 내용을 3문장(각 40자 내외)으로, 서로 겹치지 않게 요약한다.
+2. chapters: 영상 전체 흐름을 2~6개 구간으로 나눈다.
+{chapter_rule}
+   - title은 해당 구간의 내용을 한 문장으로 요약한 소제목 형태로 작성한다.
+3. keywords: 영상 전체의 핵심 주제를 나타내는 명사/구 3~8개. 비슷한 표현은 하나로 통합한다.
+
+[출력 JSON 스키마]  (필드명은 절대 바꾸지 말 것)
+{{
+  "summary_3lines": ["문장1", "문장2", "문장3"],
+  "chapters": {chapter_example},
+  "keywords": ["키워드1", "키워드2", "키워드3"]
+}}
+
+[PARTIALS]
+{partials_json}
+[END_PARTIALS]
+        """
+
+        try:
+            result = self._generate(
+                SUMMARY_MODEL_NAME, self.summary_generation_config, prompt, "summary.reduce"
+            )
+        except Exception as e:
+            return {"error": f"AI 분석 실패 (병합): {str(e)}"}
+        return self._resolve_chapters(result, index)
+
+    def _summarize_chunk(self, idx: int, total: int, chunk: str, timed: bool = False) -> Dict[str, Any]:
+        """map 단계: 자막 한 구간을 부분 요약 (실패 시 에러 dict)"""
+        if timed:
+            topics_example = (
+                '[{"segment": 소주제가 시작되는 줄의 구간 번호(정수), "title": "소제목"}] '
+                "(1~3개, 자막 각 줄 앞의 [숫자] 가 구간 번호)"
+            )
+        else:
+            topics_example = '["이 구간에서 다루는 소주제 1~3개 (소제목 형태)"]'
+
+        prompt = f"""
+너는 긴 유튜브 영상의 자막을 구간별로 정리하는 **전문 영상 분석가**이다.
+
+아래 [TRANSCRIPT] 는 전체 {total}개 구간 중 {idx}번째 구간이다.
+이 구간만을 근거로 분석하여, **정확한 JSON만** 출력하라. (코드블록, 설명 문장 금지, 한국어로 작성)
+
+[출력 JSON 스키마]
+{{
+  "part": {idx},
+  "summary": ["이 구간의 핵심 내용 1~3문장"],
+  "topics": {topics_example},
+  "keywords": ["핵심 명사/구 3~6개"]
+}}
+
+[TRANSCRIPT]
+{chunk}
+[END_TRANSCRIPT]
+        """
+
+        try:
+            return self._generate(
+                SUMMARY_MODEL_NAME, self.summary_generation_config, prompt, "summary.map"
+            )
+        except Exception as e:
+            return {"error": str(e)}
 
     # -------------------------------
     # [Module 2] 창작 에이전트
     # -------------------------------
-    def create_content(self, video_id: str) -> Dict[str, Any]:
+    def create_content(self, video_id: str, transcript: Optional[str] = None) -> Dict[str, Any]:
         """영상 자막 기반 2차 창작 (블로그 글 + 쇼츠 스크립트)"""
+        with self.tracer.span("create_content", video_id=video_id) as record:
+            result = self._create_content(video_id, transcript)
+            if "error" in result:
+                record["error"] = result["error"]
+            return result
 
+    def _create_content(self, video_id: str, transcript: Optional[str]) -> Dict[str, Any]:
         if not self.api_key_exists:
             return {"error": "GEMINI_API_KEY가 설정되지 않았습니다."}
 
-        text = get_robust_transcript(video_id)
+        text = self._get_transcript(video_id, transcript)
         if not text:
             return {"error": "자막 데이터가 없어 콘텐츠를 생성할 수 없습니다."}
 
-        model = genai.GenerativeModel(
-            model_name=CREATIVE_MODEL_NAME,
-            generation_config=self.creative_generation_config,
-            safety_settings=self.safety_settings,
-        )
+        prompt = self._creative_prompt(self._fit_transcript(text))
 
-        prompt = f"""
+        try:
+            return self._generate(
+                CREATIVE_MODEL_NAME, self.creative_generation_config, prompt, "creative"
+            )
+        except Exception as e:
+            return {"error": f"콘텐츠 생성 실패: {str(e)}"}
+
+    def _creative_prompt(self, text: str) -> str:
+        """2차 창작(블로그 + 쇼츠) 프롬프트"""
+        return f"""
 너는 100만 구독자를 보유한 **한국어 유튜브 인플루언서**이자
 블로그·쇼츠 콘텐츠 제작에 능숙한 크리에이터다.
 
@@ -205,14 +635,250 @@ class VideoAnalyst:
 
 위 스키마 이외의 필드는 추가하지 말고,
 문자열 내부에만 마크다운을 사용하라.
+{self._comment_block()}
+[TRANSCRIPT]
+{text}
+[END_TRANSCRIPT]
+        """
+
+    # -------------------------------
+    # [Module 2-1] 창작 에이전트 (스트리밍)
+    # -------------------------------
+    def create_content_stream(
+        self, video_id: str, transcript: Optional[str] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        generate_content(stream=True) 로 받은 조각을 이어 붙이며
+        ("partial", 지금까지 파싱된 dict) 를 순서대로 돌려주고, 마지막에 ("final", 결과 dict) 를 돌려준다.
+        - 캐시 적중 시 partial 없이 바로 final
+        - final 은 create_content 와 같은 형식 (실패 시 {"error": ...})
+        """
+        with self.tracer.span("create_content", video_id=video_id, stream=True) as record:
+            for kind, data in self._create_content_stream(video_id, transcript):
+                if kind == "final" and "error" in data:
+                    record["error"] = data["error"]
+                yield kind, data
+
+    def _create_content_stream(
+        self, video_id: str, transcript: Optional[str]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if not self.api_key_exists:
+            yield "final", {"error": "GEMINI_API_KEY가 설정되지 않았습니다."}
+            return
+
+        text = self._get_transcript(video_id, transcript)
+        if not text:
+            yield "final", {"error": "자막 데이터가 없어 콘텐츠를 생성할 수 없습니다."}
+            return
 
+        prompt = self._creative_prompt(self._fit_transcript(text))
+        try:
+            yield from self._generate_stream(
+                CREATIVE_MODEL_NAME, self.creative_generation_config, prompt, "creative"
+            )
+        except Exception as e:
+            yield "final", {"error": f"콘텐츠 생성 실패: {str(e)}"}
+
+    # -------------------------------
+    # [Module 3] 통합 에이전트 (요약 + 창작 한 번에)
+    # -------------------------------
+    def analyze_combined(self, video_id: str, transcript: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        자막을 한 번만 보내 요약/챕터/키워드와 블로그/쇼츠를 함께 생성.
+        반환: {"summary": summarize 와 같은 형식, "creative": create_content 와 같은 형식}
+        """
+        events = dict(self._combined_events(video_id, transcript, stream=False))
+        return events["final"]
+
+    def _combined_events(
+        self, video_id: str, transcript: Optional[str], stream: bool
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        통합 요청 실행: stream=True 면 ("partial", 부분 dict) 를 먼저 돌려주고,
+        마지막에 ("final", {"summary": ..., "creative": ...}) 를 돌려준다.
+        - 응답을 COMBINED_SCHEMA 로 검사해서 빠지거나 형식이 틀린 필드만 다시 요청
+          (최대 COMBINED_MAX_RETRIES 회, 재요청에도 빠진 필드는 해당 결과의 error 로 표시)
+        - 긴 자막도 map-reduce 없이 토큰 예산 안으로 압축해서 한 번에 보냄
+        """
+        with self.tracer.span("analyze_combined", video_id=video_id) as record:
+            if not self.api_key_exists:
+                yield "final", self._split_combined({"error": "GEMINI_API_KEY가 설정되지 않았습니다."}, None)
+                return
+
+            text = self._get_transcript(video_id, transcript)
+            if not text:
+                yield "final", self._split_combined(
+                    {"error": "자막을 가져올 수 없습니다. (자막 미지원 영상 또는 추출 실패)"}, None
+                )
+                return
+
+            index = self.transcripts.get_index(video_id, tracer=self.tracer)
+            if index is None or not index.has_timestamps:
+                index = None
+            text = self._fit_transcript(index.marked_text() if index else text)
+            config = self.combined_generation_config
+            prompt = self._combined_prompt(text, list(COMBINED_SCHEMA), index is not None)
+
+            try:
+                if stream:
+                    result: Dict[str, Any] = {}
+                    for kind, data in self._generate_stream(COMBINED_MODEL_NAME, config, prompt, "combined"):
+                        if kind == "partial":
+                            yield "partial", data
+                        else:
+                            result = data
+                else:
+                    result = self._generate(COMBINED_MODEL_NAME, config, prompt, "combined")
+            except Exception as e:
+                result = {"error": f"AI 분석 실패: {str(e)}"}
+
+            record["retries"] = 0
+            if "error" not in result:
+                for _ in range(COMBINED_MAX_RETRIES):
+                    missing = missing_fields(result)
+                    if not missing:
+                        break
+                    record["retries"] += 1
+                    try:
+                        repair = self._generate(
+                            COMBINED_MODEL_NAME, config,
+                            self._combined_prompt(text, missing, index is not None), "combined.repair",
+                        )
+                    except Exception as e:
+                        repair = {"error": str(e)}
+                    if "error" in repair:
+                        break
+                    result.update({name: repair[name] for name in missing if name in repair})
+
+                record["missing"] = missing_fields(result)
+
+            yield "final", self._split_combined(result, index)
+
+    def _split_combined(self, result: Dict[str, Any], index: Optional[TranscriptIndex]) -> Dict[str, Dict[str, Any]]:
+        """통합 응답을 summary / creative 결과로 나누고, 스키마를 통과하지 못한 쪽은 error 로 표시"""
+        if "error" in result:
+            return {"summary": dict(result), "creative": dict(result)}
+
+        parts: Dict[str, Dict[str, Any]] = {}
+        for name, fields in (("summary", SUMMARY_FIELDS), ("creative", CREATIVE_FIELDS)):
+            missing = missing_fields(result, fields)
+            if missing:
+                parts[name] = {"error": f"통합 응답에 필요한 항목이 없습니다: {', '.join(missing)}"}
+            else:
+                parts[name] = {field: result[field] for field in fields}
+        parts["summary"] = self._resolve_chapters(parts["summary"], index)
+        return parts
+
+    def _combined_prompt(self, text: str, fields: Sequence[str], timed: bool) -> str:
+        """통합 프롬프트 (fields 에 있는 항목만 요청 — 재요청 시에는 누락 필드만)"""
+        chapter_rule, chapter_example = self._chapter_format(timed)
+        rules = {
+            "summary_3lines": "영상 전체 내용을 서로 겹치지 않는 3문장(각 40자 내외)으로 요약한다.",
+            "chapters": "영상 흐름을 2~6개 구간으로 나누고, title 은 구간 내용을 담은 소제목으로 쓴다.\n"
+                        + chapter_rule,
+            "keywords": "영상만의 핵심 주제를 나타내는 명사/구 3~8개. 비슷한 표현은 하나로 통합한다.",
+            "blog_post": "클릭을 부르되 핵심 가치를 드러내는 title 과, 도입-본문-정리 구조의 "
+                         "마크다운 content (## 소제목 3~7개, 문단은 2~4문장).",
+            "shorts_script": '60초 분량 8~15줄, 각 줄은 "[화면] ... / [나레이션] ..." 형태. '
+                             "초반 3초 안에 훅을 넣고 마지막에 핵심 메시지/행동을 다시 강조한다.",
+        }
+        examples = {
+            "summary_3lines": '["문장1", "문장2", "문장3"]',
+            "chapters": chapter_example,
+            "keywords": '["키워드1", "키워드2", "키워드3"]',
+            "blog_post": '{"title": "제목", "content": "마크다운 본문"}',
+            "shorts_script": '"60초 분량 쇼츠 대본"',
+        }
+        request_lines = "\n".join(f"{i}. {name}\n   - {rules[name]}" for i, name in enumerate(fields, start=1))
+        schema = ",\n".join(f'  "{name}": {examples[name]}' for name in fields)
+
+        return f"""
+너는 유튜브 영상의 자막을 분석하는 **전문 영상 분석가**이자
+블로그·쇼츠 콘텐츠 제작에 능숙한 **한국어 크리에이터**다.
+
+아래 [TRANSCRIPT] 만을 근거로 요청한 항목을 **정확한 JSON 하나**로 출력하라.
+- 자막에 없는 내용을 지어내지 말 것.
+- 설명 문장, ```json 등의 코드블록은 쓰지 말고, 마크다운은 문자열 값 안에서만 쓸 것.
+- 모든 값은 자연스러운 한국어로 작성할 것.
+- 자막 줄 앞의 [숫자] 는 구간 번호이며, 블로그/쇼츠 본문에는 쓰지 않는다.
+
+[요청사항]
+{request_lines}
+
+[출력 JSON 스키마]  (필드명은 절대 바꾸지 말고, 다른 필드는 추가하지 말 것)
+{{
+{schema}
+}}
+{self._comment_block()}
 [TRANSCRIPT]
 {text}
 [END_TRANSCRIPT]
         """
 
+    # -------------------------------
+    # [동시 실행] 요약 + 창작 병렬 요청
+    # -------------------------------
+    def analyze_concurrently(
+        self, video_id: str, transcript: Optional[str] = None, stream: bool = False, combined: bool = False
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        summarize / create_content 는 서로 의존하지 않으므로 동시에 요청하고,
+        끝나는 순서대로 ("summary" | "creative", 결과 dict) 를 돌려준다.
+        - 자막은 요청 전에 한 번만 가져와서 두 작업이 공유
+        - 각 결과는 기존과 동일한 형식 (실패 시 {"error": ...})
+        - stream=True 면 창작 결과가 완성되기 전에도 ("creative_partial", 부분 dict) 를 돌려준다
+        - combined=True 면 두 결과를 한 번의 요청(analyze_combined)으로 받아 같은 형식으로 나눠 돌려준다
+        """
+        text = self._get_transcript(video_id, transcript)
+        if combined:
+            yield from self._analyze_combined_events(video_id, text, stream)
+            return
+
+        events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+
+        def run_summary() -> None:
+            try:
+                events.put(("summary", self.summarize(video_id, text)))
+            except Exception as e:
+                events.put(("summary", {"error": f"AI 요청 실패: {str(e)}"}))
+
+        def run_creative() -> None:
+            try:
+                if not stream:
+                    events.put(("creative", self.create_content(video_id, text)))
+                    return
+                for kind, data in self.create_content_stream(video_id, text):
+                    events.put(("creative" if kind == "final" else "creative_partial", data))
+            except Exception as e:
+                events.put(("creative", {"error": f"AI 요청 실패: {str(e)}"}))
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            pool.submit(run_summary)
+            pool.submit(run_creative)
+
+            finished = 0
+            while finished < 2:
+                name, result = events.get()
+                if name in ("summary", "creative"):
+                    finished += 1
+                yield name, result
+
+    def _analyze_combined_events(
+        self, video_id: str, text: Optional[str], stream: bool
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """통합 요청 결과를 analyze_concurrently 와 같은 이벤트로 변환 (창작 부분만 미리보기)"""
+        last_partial = None
         try:
-            response = model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            for kind, data in self._combined_events(video_id, text, stream):
+                if kind == "partial":
+                    partial = {name: data[name] for name in CREATIVE_FIELDS if name in data}
+                    if partial and partial != last_partial:
+                        last_partial = partial
+                        yield "creative_partial", partial
+                    continue
+                yield "summary", data["summary"]
+                yield "creative", data["creative"]
         except Exception as e:
-            return {"error": f"콘텐츠 생성 실패: {str(e)}"}
+            error = {"error": f"AI 요청 실패: {str(e)}"}
+            yield "summary", error
+            yield "creative", dict(error)
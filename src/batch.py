@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .utils import extract_video_ids
+from .clients import get_youtube_client
+from .llm_cache import open_llm_cache
+from .pipeline import StageLimits, analyze_video
+from .quota import QuotaLimiter
+
+# 재생목록 / 채널 식별자 패턴
+PLAYLIST_URL_PATTERN = re.compile(r'[?&]list=([0-9A-Za-z_-]+)')
+PLAYLIST_ID_PATTERN = re.compile(r'^(?:PL|UU|OL|FL|LL|RD)[0-9A-Za-z_-]{10,}$')
+CHANNEL_ID_PATTERN = re.compile(r'(?:^|/channel/)(UC[0-9A-Za-z_-]{22})')
+CHANNEL_HANDLE_PATTERN = re.compile(r'(?:^|youtube\.com/)(@[0-9A-Za-z_.-]+)')
+
+
+# -------------------------------
+# 입력 → 영상 ID 목록 펼치기
+# -------------------------------
+def iter_playlist_video_ids(youtube, playlist_id: str, limiter: QuotaLimiter) -> Iterator[str]:
+    """재생목록의 영상 ID 를 페이지 단위로 끝까지 순회"""
+    request = youtube.playlistItems().list(
+        part="contentDetails", playlistId=playlist_id, maxResults=50
+    )
+    while request is not None:
+        response = limiter.execute(request)
+        for item in response.get('items', []):
+            yield item['contentDetails']['videoId']
+        request = youtube.playlistItems().list_next(request, response)
+
+
+def get_uploads_playlist_id(youtube, channel: str, limiter: QuotaLimiter) -> Optional[str]:
+    """채널 ID(UC...) 또는 핸들(@...)로 '업로드한 동영상' 재생목록 ID 조회"""
+    if channel.startswith('@'):
+        request = youtube.channels().list(part="contentDetails", forHandle=channel)
+    else:
+        request = youtube.channels().list(part="contentDetails", id=channel)
+
+    items = limiter.execute(request).get('items', [])
+    if not items:
+        return None
+    return items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+
+def expand_targets(targets: Iterable[str], limiter: QuotaLimiter) -> List[str]:
+    """
+    URL / 영상 ID / 재생목록 / 채널 입력을 중복 없는 영상 ID 목록으로 변환 (입력 순서 유지).
+    인식하지 못한 입력은 경고만 출력하고 건너뛴다.
+    영상 URL 은 extract_video_ids 로 한 번에 파싱 (반복되는 줄은 한 번만, 공유 LRU 캐시를 채우지 않음)
+    """
+    youtube = None
+    video_ids: List[str] = []
+    seen: Set[str] = set()
+
+    def add(video_id: str) -> None:
+        if video_id not in seen:
+            seen.add(video_id)
+            video_ids.append(video_id)
+
+    rows = [raw.strip() for raw in targets]
+    rows = [target for target in rows if target and not target.startswith('#')]
+
+    for target, parsed_id in zip(rows, extract_video_ids(rows)):
+        playlist_match = PLAYLIST_URL_PATTERN.search(target)
+        playlist_id = playlist_match.group(1) if playlist_match else None
+        if playlist_id is None and PLAYLIST_ID_PATTERN.match(target):
+            playlist_id = target
+
+        channel_match = CHANNEL_ID_PATTERN.search(target) or CHANNEL_HANDLE_PATTERN.search(target)
+
+        # watch?v=...&list=... 처럼 영상 링크에 재생목록이 붙은 경우는 영상 하나만 처리
+        if 'v=' in target or (playlist_id is None and channel_match is None):
+            if parsed_id:
+                add(parsed_id)
+                continue
+
+        if playlist_id or channel_match:
+            youtube = youtube or get_youtube_client()
+            if playlist_id is None:
+                playlist_id = get_uploads_playlist_id(youtube, channel_match.group(1), limiter)
+                if playlist_id is None:
+                    print(f"채널을 찾을 수 없습니다: {target}")
+                    continue
+            for item_id in iter_playlist_video_ids(youtube, playlist_id, limiter):
+                add(item_id)
+        else:
+            print(f"인식할 수 없는 입력을 건너뜁니다: {target}")
+
+    return video_ids
+
+
+# -------------------------------
+# 체크포인트 (JSON lines 결과 파일)
+# -------------------------------
+def load_completed(output_path: str) -> Set[str]:
+    """결과 파일에서 이미 성공(status=ok)한 영상 ID 목록 읽기 (이어하기용)"""
+    completed: Set[str] = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 중단되며 잘린 마지막 줄 등
+            if record.get('status') == 'ok':
+                completed.add(record['video_id'])
+    return completed
+
+
+class BatchRunner:
+    """
+    여러 영상을 워커 풀에서 병렬 분석하고 결과를 JSON lines 로 누적 저장.
+    - 영상 단위 워커 수(workers) + 단계별 동시 실행 상한(StageLimits)
+    - 쿼터 버킷 / LLM 응답 캐시는 모든 워커가 공유
+    - resume=True 면 결과 파일에 이미 성공한 영상은 건너뜀
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        workers: int = 4,
+        limits: Optional[StageLimits] = None,
+        limiter: Optional[QuotaLimiter] = None,
+        resume: bool = True,
+        **analyze_options: Any,
+    ) -> None:
+        self.output_path = output_path
+        self.workers = workers
+        self.limits = limits or StageLimits()
+        self.limiter = limiter or QuotaLimiter()
+        self.llm_cache = open_llm_cache()
+        self.resume = resume
+        self.analyze_options = analyze_options
+        self._write_lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._write_lock:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def _run_one(self, video_id: str) -> Dict[str, Any]:
+        try:
+            return analyze_video(
+                video_id,
+                limits=self.limits,
+                limiter=self.limiter,
+                llm_cache=self.llm_cache,
+                **self.analyze_options,
+            )
+        except Exception as e:
+            return {"video_id": video_id, "status": "error", "error": str(e)}
+
+    def run(self, video_ids: List[str]) -> Dict[str, int]:
+        folder = os.path.dirname(self.output_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        done = load_completed(self.output_path) if self.resume else set()
+        todo = [v for v in video_ids if v not in done]
+        print(f"전체 {len(video_ids)}개 중 {len(video_ids) - len(todo)}개는 이미 완료, {len(todo)}개 처리 시작")
+
+        stats = {"ok": 0, "error": 0, "skipped": len(video_ids) - len(todo)}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_one, v): v for v in todo}
+            for idx, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                self._write(record)
+                stats[record["status"]] += 1
+                print(
+                    f"[{idx}/{len(todo)}] {record['video_id']} {record['status']} "
+                    f"({record.get('elapsed_s', 0)}s, 누적 {time.perf_counter() - started:.1f}s)"
+                )
+
+        stats["quota_units"] = self.limiter.used
+        return stats
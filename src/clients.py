@@ -0,0 +1,116 @@
+import os
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# requests / googleapiclient / google.generativeai 는 import 비용이 커서
+# (Streamlit 첫 화면, rerun 마다 지불) 실제로 클라이언트를 만들 때 함수 안에서 import
+if TYPE_CHECKING:
+    import requests
+
+load_dotenv()
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# keep-alive 연결 풀 크기 (동시에 나가는 HTTP 요청 수보다 크게)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_lock = threading.Lock()
+_http_session: Optional["requests.Session"] = None
+_youtube_document: Optional[Dict[str, Any]] = None
+_thread_local = threading.local()
+_models: Dict[str, Any] = {}
+_genai_configured = False
+
+
+# -------------------------------
+# HTTP (oEmbed, 자막 등)
+# -------------------------------
+def new_http_session(pool_size: int = HTTP_POOL_SIZE) -> "requests.Session":
+    """연결 풀 크기를 지정한 keep-alive 세션 생성 (헤더/쿠키를 따로 쓰는 라이브러리용)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> "requests.Session":
+    """프로세스 전체가 공유하는 HTTP 세션 (같은 호스트 재요청 시 TLS 연결 재사용)"""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                _http_session = new_http_session()
+    return _http_session
+
+
+# -------------------------------
+# YouTube Data API
+# -------------------------------
+def get_youtube_client():
+    """
+    현재 스레드의 YouTube Data API 클라이언트.
+    googleapiclient(httplib2) 객체는 스레드 간 공유가 안전하지 않으므로 스레드마다 하나씩 두고,
+    디스커버리 문서는 처음 한 번만 읽어서 이후 클라이언트는 build_from_document 로 생성
+    """
+    global _youtube_document
+    youtube = getattr(_thread_local, "youtube", None)
+    if youtube is not None:
+        return youtube
+
+    from googleapiclient.discovery import build, build_from_document
+
+    with _lock:
+        document = _youtube_document
+    if document is None:
+        youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY, cache_discovery=False)
+        with _lock:
+            _youtube_document = getattr(youtube, "_rootDesc", None)
+    else:
+        youtube = build_from_document(document, developerKey=YOUTUBE_API_KEY)
+
+    _thread_local.youtube = youtube
+    return youtube
+
+
+# -------------------------------
+# Gemini
+# -------------------------------
+def get_generative_model(
+    model_name: str,
+    generation_config: Dict[str, Any],
+    safety_settings: Optional[List[Dict[str, Any]]] = None,
+):
+    """
+    모델 이름 + 설정 조합별로 GenerativeModel 을 한 번만 만들어 재사용
+    (genai.configure 는 처음 모델을 만들 때 한 번만 호출)
+    """
+    global _genai_configured
+    key = json.dumps(
+        {"model": model_name, "config": generation_config, "safety": safety_settings},
+        sort_keys=True,
+        default=str,
+    )
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                import google.generativeai as genai
+
+                if not _genai_configured:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                    _genai_configured = True
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    generation_config=generation_config,
+                    safety_settings=safety_settings,
+                )
+                _models[key] = model
+    return model
@@ -0,0 +1,210 @@
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from .comment_store import CommentStore
+
+# 댓글들은 줄바꿈으로 이어 붙여 정규식을 한 번에 적용 (댓글 텍스트에는 줄바꿈이 없음)
+SEPARATOR = "\n"
+# 키워드 후보: 한글 2자 이상 / 영문 3자 이상 (+ 댓글 경계 표시)
+TOKEN_PATTERN = re.compile(r"[가-힣]{2,}|[a-z][a-z0-9]{2,}|\n")
+# 거의 같은 댓글 판별용 정규화: 한글/영문/숫자 외 제거 후 같은 글자 반복을 하나로
+NEAR_DUP_STRIP = re.compile(r"[^0-9a-z가-힣\n]+")
+NEAR_DUP_REPEAT = re.compile(r"([^\n])(?=\1)")
+
+STOPWORDS = frozenset(
+    "진짜 정말 너무 그냥 이거 이건 저는 제가 근데 그리고 그래서 하는 있는 없는 같은 같아요 "
+    "합니다 있어요 없어요 하고 해서 이런 저런 그런 영상 댓글 the and for you this that with".split()
+)
+
+TOP_KEYWORDS = 20
+TOP_SPAM_GROUPS = 5
+SPAM_MIN_COUNT = 3
+
+
+def _near_dup_keys(joined: str, texts: List[str]) -> List[str]:
+    """이어 붙인 소문자 텍스트에 정규화를 한 번에 적용한 뒤 댓글별 키로 분리"""
+    # 대부분의 제거 대상인 공백은 str.replace 로 먼저 지워 정규식 치환 횟수를 줄임
+    stripped = NEAR_DUP_STRIP.sub("", joined.replace(" ", ""))
+    keys = NEAR_DUP_REPEAT.sub("", stripped).split(SEPARATOR)
+    # 이모지/기호만 있는 댓글은 정규화하면 빈 문자열이 되므로 원문 그대로 비교
+    return [key or text.strip() for key, text in zip(keys, texts)]
+
+
+def _volume(np, published: List[Optional[str]], likes) -> Dict[str, Any]:
+    """작성 시각을 기간 길이에 맞는 단위(시간/일/주)로 묶어 댓글 수와 좋아요 합계 집계"""
+    valid = np.array([p is not None for p in published], dtype=bool)
+    if not valid.any():
+        return {"bucket": None, "series": []}
+
+    # ISO 8601 ("2024-01-01T12:34:56Z") → datetime64[s]
+    stamps = np.array([p[:19] for p in published if p is not None], dtype="datetime64[s]")
+    span = stamps.max() - stamps.min()
+
+    if span <= np.timedelta64(3, "D"):
+        unit, name = "h", "hour"
+    elif span <= np.timedelta64(120, "D"):
+        unit, name = "D", "day"
+    else:
+        unit, name = "W", "week"
+
+    buckets, inverse, counts = np.unique(stamps.astype(f"datetime64[{unit}]"), return_inverse=True, return_counts=True)
+    like_sums = np.bincount(inverse, weights=likes[valid], minlength=len(buckets))
+
+    return {
+        "bucket": name,
+        "series": [
+            {"start": str(b.astype("datetime64[s]")), "comments": int(c), "likes": int(l)}
+            for b, c, l in zip(buckets, counts, like_sums)
+        ],
+    }
+
+
+def _sentiment(np, labels: List[Optional[str]], scores: List[Optional[float]], likes) -> Dict[str, Any]:
+    """라벨별 댓글 수 / 비율, 좋아요 가중 비율, 평균 확신도"""
+    scored = np.array([label is not None for label in labels], dtype=bool)
+    if not scored.any():
+        return {"scored": 0, "by_label": []}
+
+    # 라벨 종류는 몇 개뿐이므로 문자열 배열 정렬 대신 dict 로 정수 코드화
+    codes = {name: i for i, name in enumerate(dict.fromkeys(label for label in labels if label is not None))}
+    names = list(codes)
+    inverse = np.fromiter(
+        (codes[label] for label in labels if label is not None), dtype=np.int64, count=int(scored.sum())
+    )
+    score_arr = np.array([s for s, ok in zip(scores, scored) if ok], dtype=float)
+    like_arr = likes[scored]
+    # 좋아요 0 인 댓글도 한 표로 계산
+    weights = like_arr + 1.0
+
+    counts = np.bincount(inverse, minlength=len(names))
+    weighted = np.bincount(inverse, weights=weights, minlength=len(names))
+    like_sums = np.bincount(inverse, weights=like_arr, minlength=len(names))
+    score_sums = np.bincount(inverse, weights=score_arr, minlength=len(names))
+
+    order = np.argsort(-counts, kind="stable")
+    return {
+        "scored": int(scored.sum()),
+        "by_label": [
+            {
+                "label": names[i],
+                "count": int(counts[i]),
+                "share": round(float(counts[i] / counts.sum()), 4),
+                "like_weighted_share": round(float(weighted[i] / weighted.sum()), 4),
+                "likes": int(like_sums[i]),
+                "mean_score": round(float(score_sums[i] / counts[i]), 4),
+            }
+            for i in order
+        ],
+    }
+
+
+def _keywords(np, joined: str, likes, top_n: int) -> List[Dict[str, Any]]:
+    """
+    키워드별 언급 댓글 수와 좋아요 가중 점수 (댓글 하나에서 여러 번 나와도 1회).
+    토큰화는 이어 붙인 텍스트에 정규식 한 번, 집계는 (댓글, 단어) 정수 쌍 배열로 처리
+    """
+    tokens = TOKEN_PATTERN.findall(joined)
+    vocab = {word: i for i, word in enumerate(dict.fromkeys(tokens))}
+    if len(vocab) <= 1:
+        return []
+
+    ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    boundary = ids == vocab.get(SEPARATOR, -1)
+    comment_of = np.cumsum(boundary)[~boundary]
+    word_ids = ids[~boundary]
+
+    # 같은 댓글 안의 중복 언급 제거 (정렬 후 인접 비교)
+    pairs = np.sort(comment_of * len(vocab) + word_ids)
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    pair_words = pairs % len(vocab)
+    pair_comments = pairs // len(vocab)
+
+    mentions = np.bincount(pair_words, minlength=len(vocab))
+    weighted = np.bincount(pair_words, weights=np.log1p(likes)[pair_comments], minlength=len(vocab))
+
+    words = list(vocab)
+    keep = np.fromiter((w not in STOPWORDS and w != SEPARATOR for w in words), dtype=bool, count=len(words))
+    candidates = np.flatnonzero(keep)
+    top = candidates[np.lexsort((-weighted[candidates], -mentions[candidates]))][:top_n]
+    return [
+        {"keyword": words[i], "comments": int(mentions[i]), "like_weighted": round(float(weighted[i]), 2)}
+        for i in top
+    ]
+
+
+def analyze_comments(video_id: str, store: Optional[CommentStore] = None,
+                     top_keywords: int = TOP_KEYWORDS) -> Dict[str, Any]:
+    """
+    scrape_comments 로 저장된 댓글을 컬럼 배열(numpy)로 한 번에 분석.
+    - 중복: 완전히 같은 댓글 / 공백·기호·반복 글자만 다른 댓글(도배) 묶음
+    - 키워드: 중복을 제거한 댓글 기준 언급 댓글 수와 좋아요 가중 점수
+    - 감성: 라벨별 비율과 좋아요 가중 비율 (score_comments 결과가 있을 때)
+    - 작성 시각별 댓글 수 / 좋아요 추이 (전체 댓글 기준)
+    반환: 결과 dict (실패 시 {"error": ...})
+    """
+    # numpy 미설치 / 저장소 오류 / 잘못된 작성 시각 형식 등도 예외 대신 error dict 로 반환
+    try:
+        return _analyze_comments(video_id, store, top_keywords)
+    except Exception as e:
+        return {"error": f"댓글 분석 실패: {str(e)}"}
+
+
+def _analyze_comments(video_id: str, store: Optional[CommentStore], top_keywords: int) -> Dict[str, Any]:
+    import numpy as np
+
+    started = time.perf_counter()
+    store = store or CommentStore()
+    columns = store.read(
+        video_id, ["text", "like_count", "published_at", "sentiment_label", "sentiment_score"]
+    )
+    texts = columns["text"]
+    if not texts:
+        return {"error": "분석할 댓글이 없습니다."}
+
+    texts = [t or "" for t in texts]
+    joined = SEPARATOR.join(texts)
+    if joined.count(SEPARATOR) != len(texts) - 1:
+        # 줄바꿈이 들어 있는 댓글이 있으면 공백으로 바꿔 댓글 경계를 유지
+        texts = [t.replace(SEPARATOR, " ") for t in texts]
+        joined = SEPARATOR.join(texts)
+    joined = joined.lower()
+    likes = np.array([c or 0 for c in columns["like_count"]], dtype=float)
+    read_ms = (time.perf_counter() - started) * 1000
+
+    # 1) 중복 묶기: 문자열 해시를 배열로 만들어 np.unique 로 그룹화
+    exact_hash = np.fromiter(map(hash, map(str.strip, texts)), dtype=np.int64, count=len(texts))
+    near_hash = np.fromiter(map(hash, _near_dup_keys(joined, texts)), dtype=np.int64, count=len(texts))
+
+    _, exact_first = np.unique(exact_hash, return_index=True)
+    near_ids, near_first, near_inverse, near_counts = np.unique(
+        near_hash, return_index=True, return_inverse=True, return_counts=True
+    )
+    # 도배 묶음 안의 좋아요는 대표 댓글에 합산
+    unique_rows = np.sort(near_first)
+    group_likes = np.bincount(near_inverse, weights=likes, minlength=len(near_ids))
+    unique_likes = group_likes[near_inverse[unique_rows]]
+
+    spam = np.flatnonzero(near_counts >= SPAM_MIN_COUNT)
+    spam = spam[np.argsort(-near_counts[spam], kind="stable")][:TOP_SPAM_GROUPS]
+
+    lowered = joined.split(SEPARATOR)
+    unique_joined = SEPARATOR.join([lowered[i] for i in unique_rows])
+    unique_labels = [columns["sentiment_label"][i] for i in unique_rows]
+    unique_scores = [columns["sentiment_score"][i] for i in unique_rows]
+
+    result = {
+        "total": len(texts),
+        "unique": int(len(unique_rows)),
+        "exact_duplicates": int(len(texts) - len(exact_first)),
+        "near_duplicates": int(len(exact_first) - len(near_ids)),
+        "spam_groups": [
+            {"text": texts[near_first[g]][:80], "count": int(near_counts[g])} for g in spam
+        ],
+        "keywords": _keywords(np, unique_joined, unique_likes, top_keywords),
+        "sentiment": _sentiment(np, unique_labels, unique_scores, unique_likes),
+        "volume": _volume(np, columns["published_at"], likes),
+    }
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["read_ms"] = round(read_ms, 1)
+    return result
@@ -0,0 +1,470 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from .comment_analytics import STOPWORDS, TOKEN_PATTERN
+from .comment_store import CommentStore
+
+load_dotenv()
+
+# 허깅페이스에 공개되어 있는 한국어 문장 임베딩 모델
+EMBEDDING_MODEL_NAME = "jhgan/ko-sroberta-multitask"
+
+# 로컬 모델 경로 (model_download.py 저장 위치, 환경 변수로 변경 가능)
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", os.path.join("models", "ko_sroberta_multitask"))
+
+# 배치 임베딩 설정
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_MAX_LENGTH = 128
+
+# 임베딩 캐시 폴더 (모델별 float32 배열 파일 + comment_id → 행 번호 색인)
+DEFAULT_EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("data", "embeddings"))
+# 색인에서 빠진 행이 이만큼(최소 행 수, 살아 있는 행 대비 비율) 쌓이면 배열 파일 정리
+EMBEDDING_COMPACT_MIN_ROWS = int(os.getenv("EMBEDDING_COMPACT_MIN_ROWS", "5000"))
+EMBEDDING_COMPACT_RATIO = 0.5
+EMBEDDING_COMPACT_CHUNK = 10000
+
+# 클러스터링 설정
+CLUSTER_MAX_COMMENTS = int(os.getenv("CLUSTER_MAX_COMMENTS", "5000"))  # 좋아요 많은 순으로 최대 N개
+CLUSTER_MAX_K = int(os.getenv("CLUSTER_MAX_K", "8"))
+CLUSTER_MIN_COMMENTS = 20
+REPRESENTATIVES_PER_CLUSTER = 3
+CLUSTER_KEYWORDS = 3
+
+
+# -------------------------------
+# 임베딩 엔진 (로컬 CPU 모델)
+# -------------------------------
+class EmbeddingEngine:
+    """
+    문장 임베딩 모델을 한 번만 로드해서 CPU 배치 추론하는 엔진.
+    - 길이순 정렬 후 배치별 최장 길이까지만 패딩 (SentimentEngine 과 같은 방식)
+    - 토큰 임베딩을 attention mask 로 평균(mean pooling)한 뒤 L2 정규화 → 내적 = 코사인 유사도
+    - 결과는 입력 순서대로 (N, dim) float32 배열
+    """
+
+    def __init__(self, model_path: str = EMBEDDING_MODEL_PATH, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 max_length: int = EMBEDDING_MAX_LENGTH) -> None:
+        # transformers / torch 는 클러스터링을 쓸 때만 필요하므로 여기서 로드
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        # 로컬 경로에 모델이 없으면 허깅페이스에서 직접 받음
+        source = model_path if os.path.isdir(model_path) else EMBEDDING_MODEL_NAME
+
+        self.name = EMBEDDING_MODEL_NAME if source == EMBEDDING_MODEL_NAME else os.path.basename(
+            os.path.normpath(model_path)
+        )
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        self.model = AutoModel.from_pretrained(source)
+        self.model.eval()
+        self.dim = int(self.model.config.hidden_size)
+
+    def encode(self, texts: Sequence[str]):
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i] or ""))
+
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] or "" for i in indices], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="pt",
+            )
+            with self.torch.inference_mode():
+                hidden = self.model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+            vectors[indices] = pooled
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+_ENGINE: Optional[EmbeddingEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_embedding_engine(model_path: Optional[str] = None) -> EmbeddingEngine:
+    """임베딩 엔진 싱글턴 반환 (model_path 는 최초 로드 시에만 적용)"""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = EmbeddingEngine(model_path or EMBEDDING_MODEL_PATH)
+    return _ENGINE
+
+
+# -------------------------------
+# 임베딩 캐시 (memmap)
+# -------------------------------
+class EmbeddingCache:
+    """
+    comment_id 별 임베딩을 디스크에 보관하는 캐시 (모델마다 별도 파일).
+    - <모델>[.<세대>].f32: (행 수, dim) float32 배열을 이어 붙인 파일 (np.memmap 으로 읽기)
+    - <모델>.sqlite3: comment_id → (행 번호, 텍스트 crc32) 색인 + 현재 배열 파일 세대
+    - 댓글 내용이 바뀌면(crc 불일치) 다시 임베딩해서 새 행을 추가
+    - 추가는 SQLite 쓰기 잠금 안에서 해서 여러 워커 프로세스가 같은 파일에 써도 행 번호가 겹치지 않음
+    - 색인에서 빠진 행(내용이 바뀐 댓글의 이전 임베딩)이 많아지면 살아 있는 행만 새 세대 파일로 옮겨 정리
+      (읽는 쪽은 색인과 세대를 한 트랜잭션에서 읽으므로 정리 중에도 다른 행을 읽지 않음)
+    """
+
+    def __init__(self, model_name: str, dim: int, folder: str = DEFAULT_EMBEDDING_CACHE_DIR) -> None:
+        self.slug = re.sub(r"[^0-9A-Za-z_.-]+", "_", model_name)
+        self.dim = dim
+        self.folder = folder
+        self.index_path = os.path.join(folder, f"{self.slug}.sqlite3")
+
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "comment_id TEXT PRIMARY KEY, row INTEGER NOT NULL, text_crc INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def text_crc(text: str) -> int:
+        return zlib.crc32((text or "").encode("utf-8"))
+
+    def data_path(self, generation: int) -> str:
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self.folder, f"{self.slug}{suffix}.f32")
+
+    @staticmethod
+    def _generation(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _rows(self, generation: int):
+        """세대 파일의 전체 임베딩 (읽기 전용 memmap, 비어 있거나 정리로 지워졌으면 None)"""
+        import numpy as np
+
+        path = self.data_path(generation)
+        try:
+            count = os.path.getsize(path) // (4 * self.dim)
+            if count == 0:
+                return None
+            return np.memmap(path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        except OSError:
+            return None
+
+    def lookup(self, comment_ids: Sequence[str], texts: Sequence[str]) -> Tuple[Dict[str, int], int]:
+        """내용이 그대로인 댓글의 {comment_id: 행 번호} 와 그 행 번호가 가리키는 파일 세대"""
+        found: Dict[str, Tuple[int, int]] = {}
+        with self._connect() as conn:
+            generation = self._generation(conn)
+            for start in range(0, len(comment_ids), 500):
+                chunk = comment_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for comment_id, row, crc in conn.execute(
+                    f"SELECT comment_id, row, text_crc FROM embeddings WHERE comment_id IN ({placeholders})",
+                    chunk,
+                ):
+                    found[comment_id] = (row, crc)
+
+        crcs = {cid: self.text_crc(text) for cid, text in zip(comment_ids, texts) if cid in found}
+        return {cid: row for cid, (row, crc) in found.items() if crcs[cid] == crc}, generation
+
+    def get(self, comment_ids: Sequence[str], texts: Sequence[str]) -> Tuple[Any, List[int]]:
+        """
+        (vectors, missing) 반환.
+        vectors: (N, dim) 배열 (캐시에 없는 행은 0), missing: 새로 임베딩해야 하는 입력 위치 목록
+        """
+        import numpy as np
+
+        rows, generation = self.lookup(comment_ids, texts)
+        vectors = np.zeros((len(comment_ids), self.dim), dtype=np.float32)
+        stored = self._rows(generation)
+
+        positions = [i for i, cid in enumerate(comment_ids) if cid in rows]
+        if positions and stored is not None:
+            row_ids = np.array([rows[comment_ids[i]] for i in positions], dtype=np.int64)
+            valid = row_ids < len(stored)
+            vectors[np.array(positions)[valid]] = stored[row_ids[valid]]
+            cached = set(np.array(positions)[valid].tolist())
+        else:
+            cached = set()
+
+        missing = [i for i in range(len(comment_ids)) if i not in cached]
+        return vectors, missing
+
+    def add(self, comment_ids: Sequence[str], texts: Sequence[str], vectors) -> None:
+        """새 임베딩을 파일 끝에 추가하고 색인 갱신 (정리할 행이 많으면 이어서 정리)"""
+        import numpy as np
+
+        if not len(comment_ids):
+            return
+        data = np.ascontiguousarray(vectors, dtype=np.float32)
+        stale_path = None
+
+        with self._connect(immediate=True) as conn:
+            generation = self._generation(conn)
+            path = self.data_path(generation)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            first_row = size // (4 * self.dim)
+            with open(path, "ab") as f:
+                # 이전에 중간까지만 쓰인 행이 있으면 행 경계에 맞춰 이어 씀
+                f.truncate(first_row * 4 * self.dim)
+                f.write(data.tobytes())
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (comment_id, row, text_crc) VALUES (?, ?, ?)",
+                (
+                    (cid, first_row + i, self.text_crc(text))
+                    for i, (cid, text) in enumerate(zip(comment_ids, texts))
+                ),
+            )
+
+            live = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            orphaned = first_row + len(data) - live
+            if orphaned >= max(EMBEDDING_COMPACT_MIN_ROWS, live * EMBEDDING_COMPACT_RATIO):
+                self._compact(conn, generation)
+                stale_path = path
+
+        # 이전 세대 파일은 색인이 새 세대로 바뀐 뒤(커밋 후)에 삭제
+        if stale_path is not None:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+    def _compact(self, conn: sqlite3.Connection, generation: int) -> None:
+        """살아 있는 행만 다음 세대 파일로 옮기고 색인의 행 번호 / 세대를 갱신 (쓰기 잠금 안에서 호출)"""
+        import numpy as np
+
+        stored = self._rows(generation)
+        entries = conn.execute("SELECT comment_id, row FROM embeddings ORDER BY row").fetchall()
+        limit = len(stored) if stored is not None else 0
+        kept = [(cid, row) for cid, row in entries if row < limit]
+
+        new_path = self.data_path(generation + 1)
+        with open(new_path + ".part", "wb") as f:
+            for start in range(0, len(kept), EMBEDDING_COMPACT_CHUNK):
+                rows = np.array([row for _, row in kept[start:start + EMBEDDING_COMPACT_CHUNK]], dtype=np.int64)
+                f.write(np.ascontiguousarray(stored[rows], dtype=np.float32).tobytes())
+        os.replace(new_path + ".part", new_path)
+
+        conn.execute("DELETE FROM embeddings WHERE row >= ?", (limit,))
+        conn.executemany(
+            "UPDATE embeddings SET row = ? WHERE comment_id = ?",
+            ((i, cid) for i, (cid, _) in enumerate(kept)),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (generation + 1,)
+        )
+
+
+# -------------------------------
+# 미니배치 k-means (구면: 정규화 벡터 + 코사인 유사도)
+# -------------------------------
+def minibatch_kmeans(np, vectors, k: int, batch_size: int = 512, iterations: int = 100, seed: int = 0):
+    """
+    정규화된 벡터를 k 개로 묶는 미니배치 k-means.
+    - 초기 중심: k-means++ (표본에서 거리 비례 샘플링)
+    - 반복마다 미니배치를 가장 가까운 중심에 배정하고, 중심별 누적 개수에 반비례하는 학습률로 갱신
+    - 반환: (중심 (k, dim), 배정 (N,), 중심과의 코사인 유사도 (N,))
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+
+    sample = vectors[rng.choice(n, size=min(n, 20 * k), replace=False)]
+    centers = [sample[rng.integers(len(sample))]]
+    closest = 1.0 - sample @ centers[0]
+    for _ in range(1, k):
+        weights = np.maximum(closest, 0) ** 2
+        total = weights.sum()
+        pick = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centers.append(sample[pick])
+        closest = np.minimum(closest, 1.0 - sample @ sample[pick])
+    centers = np.array(centers, dtype=np.float32)
+
+    counts = np.zeros(k)
+    for _ in range(iterations):
+        batch = vectors[rng.integers(0, n, size=min(batch_size, n))]
+        assign = (batch @ centers.T).argmax(axis=1)
+
+        batch_counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, assign, batch)
+
+        touched = batch_counts > 0
+        counts += batch_counts
+        rate = (batch_counts[touched] / counts[touched])[:, None]
+        centers[touched] = (1 - rate) * centers[touched] + rate * (sums[touched] / batch_counts[touched][:, None])
+        centers /= np.maximum(np.linalg.norm(centers, axis=1, keepdims=True), 1e-12)
+
+    similarity = np.empty(n, dtype=np.float32)
+    labels = np.empty(n, dtype=np.int64)
+    for start in range(0, n, 4096):
+        scores = vectors[start:start + 4096] @ centers.T
+        labels[start:start + 4096] = scores.argmax(axis=1)
+        similarity[start:start + 4096] = scores.max(axis=1)
+    return centers, labels, similarity
+
+
+def choose_k(n: int, max_k: int = CLUSTER_MAX_K) -> int:
+    """댓글 수에 맞춘 클러스터 수 (sqrt(n/2), 2 ~ max_k)"""
+    return max(2, min(max_k, int((n / 2) ** 0.5)))
+
+
+# -------------------------------
+# 클러스터링 단계
+# -------------------------------
+def cluster_comments(
+    video_id: str,
+    store: Optional[CommentStore] = None,
+    k: Optional[int] = None,
+    max_comments: int = CLUSTER_MAX_COMMENTS,
+    representatives: int = REPRESENTATIVES_PER_CLUSTER,
+    engine: Optional[EmbeddingEngine] = None,
+    cache: Optional[EmbeddingCache] = None,
+) -> Dict[str, Any]:
+    """
+    저장된 댓글을 의미 기준으로 묶어 주제별 대표 댓글을 뽑음.
+    - 좋아요 많은 순으로 최대 max_comments 개, 같은 내용의 댓글은 하나만 사용
+    - 임베딩은 comment_id 기준으로 캐시해서 다시 실행하면 새 댓글(또는 내용이 바뀐 댓글)만 임베딩
+    - 반환: {"clusters": [{id, size, share, keywords, representatives}], "total", "embedded", "cached"}
+      (실패 시 {"error": ...})
+    """
+    # 저장소 / 임베딩 추론 / 클러스터링 오류도 예외 대신 error dict 로 반환
+    # (요약·창작 단계가 이 단계 결과를 기다리므로 예외가 나면 함께 취소됨)
+    try:
+        return _cluster_comments(video_id, store, k, max_comments, representatives, engine, cache)
+    except Exception as e:
+        return {"error": f"댓글 주제 분석 실패: {str(e)}"}
+
+
+def _cluster_comments(
+    video_id: str,
+    store: Optional[CommentStore],
+    k: Optional[int],
+    max_comments: int,
+    representatives: int,
+    engine: Optional[EmbeddingEngine],
+    cache: Optional[EmbeddingCache],
+) -> Dict[str, Any]:
+    import numpy as np
+
+    started = time.perf_counter()
+    store = store or CommentStore()
+    columns = store.read(video_id, ["comment_id", "text", "like_count"])
+
+    # 같은 내용(도배)은 좋아요가 가장 많은 댓글 하나만
+    likes = np.array([c or 0 for c in columns["like_count"]], dtype=np.int64)
+    picked: Dict[str, int] = {}
+    for i in np.argsort(-likes, kind="stable").tolist():
+        text = (columns["text"][i] or "").strip()
+        if len(text) >= 2 and text not in picked:
+            picked[text] = i
+            if len(picked) >= max_comments:
+                break
+    rows = list(picked.values())
+    if len(rows) < CLUSTER_MIN_COMMENTS:
+        return {"error": f"댓글이 너무 적어 주제를 묶지 않습니다. (고유 댓글 {len(rows)}개)"}
+
+    comment_ids = [columns["comment_id"][i] for i in rows]
+    texts = [columns["text"][i] for i in rows]
+
+    try:
+        engine = engine or get_embedding_engine()
+    except Exception as e:
+        return {"error": f"임베딩 모델 로드 실패: {str(e)}"}
+
+    # 캐시를 열거나 읽지 못하면(다른 워커의 쓰기 잠금 / 디스크 오류) 캐시 없이 전부 임베딩
+    try:
+        cache = cache or EmbeddingCache(engine.name, engine.dim)
+        vectors, missing = cache.get(comment_ids, texts)
+    except Exception as e:
+        print("임베딩 캐시 조회 실패:", e)
+        cache = None
+        vectors = np.zeros((len(rows), engine.dim), dtype=np.float32)
+        missing = list(range(len(rows)))
+
+    if missing:
+        fresh = engine.encode([texts[i] for i in missing])
+        vectors[missing] = fresh
+        if cache is not None:
+            try:
+                cache.add([comment_ids[i] for i in missing], [texts[i] for i in missing], fresh)
+            except Exception as e:
+                print("임베딩 캐시 저장 실패:", e)
+
+    k = min(k or choose_k(len(rows)), len(rows))
+    _, labels, similarity = minibatch_kmeans(np, vectors, k)
+
+    sizes = np.bincount(labels, minlength=k)
+    clusters = []
+    for cluster_id in np.argsort(-sizes, kind="stable").tolist():
+        members = np.flatnonzero(labels == cluster_id)
+        if not len(members):
+            continue
+        # 중심에 가까운 순 (동률이면 좋아요 많은 순)
+        member_likes = likes[[rows[m] for m in members]]
+        order = members[np.lexsort((-member_likes, -similarity[members]))]
+
+        words = Counter(
+            w for m in members.tolist() for w in set(TOKEN_PATTERN.findall(texts[m].lower()))
+            if w not in STOPWORDS and w != "\n"
+        )
+        clusters.append({
+            "id": len(clusters) + 1,
+            "size": int(len(members)),
+            "share": round(float(len(members) / len(rows)), 4),
+            "keywords": [w for w, _ in words.most_common(CLUSTER_KEYWORDS)],
+            "representatives": [
+                {"text": texts[m][:200], "like_count": int(likes[rows[m]])}
+                for m in order[:representatives].tolist()
+            ],
+        })
+
+    return {
+        "clusters": clusters,
+        "total": len(rows),
+        "embedded": len(missing),
+        "cached": len(rows) - len(missing),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def format_cluster_context(result: Dict[str, Any], max_clusters: int = CLUSTER_MAX_K) -> Optional[str]:
+    """VideoAnalyst 프롬프트에 넣을 댓글 주제 요약 (클러스터가 없으면 None)"""
+    clusters = result.get("clusters") if isinstance(result, dict) else None
+    if not clusters:
+        return None
+
+    lines = []
+    for cluster in clusters[:max_clusters]:
+        header = f"- 주제 {cluster['id']} (댓글 {cluster['size']}개, {cluster['share']:.0%})"
+        if cluster["keywords"]:
+            header += f" 키워드: {', '.join(cluster['keywords'])}"
+        lines.append(header)
+        lines.extend(f'    · "{rep["text"]}" (좋아요 {rep["like_count"]})' for rep in cluster["representatives"])
+    return "\n".join(lines)
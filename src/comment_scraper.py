@@ -1,54 +1,230 @@
 import os
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from .utils import get_video_id 
+from .utils import get_video_id
+from .clients import YOUTUBE_API_KEY, get_youtube_client
+from .quota import QuotaLimiter
+from .comment_store import CommentStore
+from .tracing import get_tracer
 
 load_dotenv()
-API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-def scrape_comments(url_or_id):
-    if not API_KEY:
+# 한 페이지당 최대 요청 개수 (YouTube Data API 최대값)
+PAGE_SIZE = 100
+
+# 기본 수집 상한 (앱 / 파이프라인 / 배치 기본값, 환경 변수로 변경 가능)
+# 전체 수집은 max_pages=None, max_comments=None 을 명시적으로 넘길 때만 (배치 --all-comments 등)
+DEFAULT_MAX_PAGES = int(os.getenv("COMMENT_MAX_PAGES", "10"))
+DEFAULT_MAX_COMMENTS = int(os.getenv("COMMENT_MAX_COMMENTS", "1000"))
+
+# 답글 병렬 수집 워커 수
+REPLY_WORKERS = int(os.getenv("YOUTUBE_REPLY_WORKERS", "8"))
+
+
+def _comment_row(comment, parent_id=None):
+    """API 응답의 comment 리소스를 한 행(dict)으로 변환"""
+    snippet = comment['snippet']
+    return {
+        'id': comment.get('id'),
+        'parent_id': parent_id,
+        'author': snippet.get('authorDisplayName'),
+        # 댓글 내용 (줄바꿈 제거)
+        'text': snippet.get('textOriginal', '').replace('\n', ' ').strip(),
+        'like_count': snippet.get('likeCount', 0),
+        'published_at': snippet.get('publishedAt'),
+        'updated_at': snippet.get('updatedAt'),
+    }
+
+
+def iter_replies(youtube, parent_id, limiter):
+    """comments().list 로 한 댓글의 답글을 페이지 단위로 끝까지 순회"""
+    request = youtube.comments().list(
+        part="snippet",
+        parentId=parent_id,
+        maxResults=PAGE_SIZE,
+        textFormat="plainText",
+    )
+    while request is not None:
+        response = limiter.execute(request)
+        for item in response.get('items', []):
+            yield _comment_row(item, parent_id=parent_id)
+        request = youtube.comments().list_next(request, response)
+
+
+def _fetch_replies(parent_id, limiter):
+    """워커 스레드용: 스레드 전용 클라이언트로 답글 전체를 리스트로 반환"""
+    return list(iter_replies(get_youtube_client(), parent_id, limiter))
+
+
+def iter_comments(youtube, video_id, max_pages=None, max_comments=None,
+                  include_replies=False, order="relevance", limiter=None,
+                  reply_workers=REPLY_WORKERS, since=None):
+    """
+    nextPageToken 을 따라가며 댓글을 한 개씩 흘려보내는 제너레이터.
+    - max_pages: 최대 commentThreads 페이지 수 (None 이면 끝까지)
+    - max_comments: 최대 댓글 수 (답글 포함, None 이면 제한 없음)
+    - since: 이 시각(ISO 8601) 이하로 작성된 최상위 댓글을 만나면 중단 (order="time" 전용, 증분 수집용)
+    - include_replies: 답글도 수집
+      (스레드에 포함된 5개를 넘으면 comments().list 를 워커 풀에서 병렬 요청)
+    - limiter: 요청마다 쿼터를 차감하는 QuotaLimiter (None 이면 새로 생성)
+    """
+    limiter = limiter or QuotaLimiter()
+    request = youtube.commentThreads().list(
+        part="snippet,replies" if include_replies else "snippet",
+        videoId=video_id,
+        maxResults=PAGE_SIZE,
+        textFormat="plainText",
+        order=order,
+    )
+
+    pool = ThreadPoolExecutor(max_workers=reply_workers) if include_replies else None
+    pending = set()
+    max_pending = reply_workers * 4  # 메모리에 쌓이는 답글 묶음 수 상한
+
+    def drain(block_until):
+        # 완료된 답글 묶음을 꺼냄 (진행 중 작업이 block_until 개 이하가 될 때까지 대기)
+        while pending and len(pending) > block_until:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield from future.result()
+        for future in [f for f in pending if f.done()]:
+            pending.discard(future)
+            yield from future.result()
+
+    pages = 0
+    count = 0
+    try:
+        while request is not None:
+            response = limiter.execute(request)
+            pages += 1
+
+            for item in response.get('items', []):
+                top_level = item['snippet']['topLevelComment']
+                if since and top_level['snippet'].get('publishedAt', '') <= since:
+                    # 최신순 정렬이므로 이후는 모두 이미 저장된 댓글
+                    request = None
+                    break
+                yield _comment_row(top_level)
+                count += 1
+                if max_comments and count >= max_comments:
+                    return
+
+                if not include_replies:
+                    continue
+
+                inline = item.get('replies', {}).get('comments', [])
+                if item['snippet'].get('totalReplyCount', 0) > len(inline):
+                    pending.add(pool.submit(_fetch_replies, top_level['id'], limiter))
+                    replies = drain(max_pending)
+                else:
+                    replies = (_comment_row(r, parent_id=top_level['id']) for r in inline)
+
+                for reply in replies:
+                    yield reply
+                    count += 1
+                    if max_comments and count >= max_comments:
+                        return
+
+            if request is None or (max_pages and pages >= max_pages):
+                break
+            request = youtube.commentThreads().list_next(request, response)
+
+        # 남은 답글 작업 마무리
+        for reply in drain(0):
+            yield reply
+            count += 1
+            if max_comments and count >= max_comments:
+                return
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scrape_comments(url_or_id, max_pages=DEFAULT_MAX_PAGES, max_comments=DEFAULT_MAX_COMMENTS,
+                    include_replies=False, order="relevance", limiter=None,
+                    store=None, incremental=True, tracer=None):
+    """
+    댓글을 페이지 단위로 끝까지 수집하여 댓글 저장소(SQLite)에 upsert 한 뒤,
+    KNIME 워크플로우용 CSV(data/comments_{video_id}.csv)로 내보낸다.
+    - 행을 리스트에 모으지 않고 배치 단위로 바로 기록하므로 댓글 수와 무관하게 메모리 사용량이 일정
+    - 기본은 DEFAULT_MAX_PAGES 페이지 / DEFAULT_MAX_COMMENTS 개까지, None 을 넘기면 끝까지 수집
+    - incremental=True 이고 이전 수집 기록이 있으면 최신순으로 받아 마지막 수집 이후 댓글만 추가
+      (이전 스레드에 새로 달린 답글은 전체 재수집(incremental=False) 때 반영)
+    - 증분 기준 시각은 최신순 수집을 max_pages / max_comments 제한 없이 끝까지 마쳤을 때만 전진
+      (개수 제한이 있거나 인기순으로 받은 수집 뒤에는 더 오래된 댓글이 빠져 있을 수 있음)
+    - limiter 를 넘기면 여러 실행이 같은 쿼터 버킷을 공유
+    - tracer 를 넘기면 수집/내보내기 시간, 댓글 수, 쿼터 사용량을 기록
+    """
+    with get_tracer(tracer).span("comments", video_id=str(url_or_id)) as record:
+        result = _scrape_comments(
+            url_or_id, max_pages, max_comments, include_replies, order,
+            limiter, store, incremental, record,
+        )
+        if result.startswith("[ERROR]"):
+            record["error"] = result
+        return result
+
+
+def _scrape_comments(url_or_id, max_pages, max_comments, include_replies, order,
+                     limiter, store, incremental, record):
+    if not YOUTUBE_API_KEY:
         return "[ERROR] .env 파일에 YOUTUBE_API_KEY가 없습니다."
 
     video_id = get_video_id(url_or_id)
     if not video_id:
         return "[ERROR] 유효한 유튜브 링크가 아닙니다."
 
+    # 폴더 생성
+    if not os.path.exists('data'):
+        os.makedirs('data')
+
+    save_path = f"data/comments_{video_id}.csv"
+
     try:
-        youtube = build('youtube', 'v3', developerKey=API_KEY, cache_discovery=False)
-        
-        # 댓글 요청
-        request = youtube.commentThreads().list(
-            part="snippet", 
-            videoId=video_id, 
-            maxResults=100,      # 상위 100개만 수집
-            textFormat="plainText",
-            order="relevance"    # 관련성 순 (인기 댓글 위주)
+        youtube = get_youtube_client()
+        limiter = limiter or QuotaLimiter()
+        used_before = limiter.used
+        store = store or CommentStore()
+
+        since = store.synced_until(video_id) if incremental else None
+        complete = incremental and max_pages is None and max_comments is None
+        if since or complete:
+            # 끝까지 받는 수집은 어떤 순서든 결과가 같으므로 최신순으로 받아 기준 시각을 남김
+            order = "time"
+
+        new_count = store.upsert(
+            video_id,
+            iter_comments(
+                youtube,
+                video_id,
+                max_pages=max_pages,
+                max_comments=max_comments,
+                include_replies=include_replies,
+                order=order,
+                limiter=limiter,
+                since=since,
+            ),
         )
-        response = request.execute()
-        
-        data = []
-        for item in response.get('items', []):
-            snippet = item['snippet']['topLevelComment']['snippet']
-            
-            # 댓글 내용만 추출
-            text = snippet['textOriginal'].replace('\n', ' ').strip()
-            data.append([text])
-            
-        if not data:
+
+        if complete:
+            store.mark_synced(video_id)
+
+        total = store.count(video_id)
+        quota_used = limiter.used - used_before
+        record.update(items=new_count, total=total, quota_units=quota_used, incremental=bool(since))
+        if not total:
             return "[ERROR] 댓글이 없거나 댓글 기능이 중지된 영상입니다."
 
-        # 폴더 생성
-        if not os.path.exists('data'):
-            os.makedirs('data')
-        
-        # 파일 저장: Comment 한 컬럼만
-        save_path = f"data/comments_{video_id}.csv"
-        df = pd.DataFrame(data, columns=['Comment'])
-        df.to_csv(save_path, index=False, encoding='utf-8-sig')
-        
-        return f"[SUCCESS] 댓글 {len(data)}개를 수집했습니다.\n파일: {save_path}"
-        
+        # KNIME 용 CSV 내보내기 (Comment 컬럼 + ID/작성자/좋아요/작성 시각)
+        store.export_csv(video_id, save_path)
+        record["bytes_out"] = os.path.getsize(save_path)
+
+        if since:
+            message = f"[SUCCESS] 새 댓글 {new_count}개를 수집했습니다. (누적 {total}개)"
+        else:
+            message = f"[SUCCESS] 댓글 {new_count}개를 수집했습니다."
+        return f"{message}\n파일: {save_path}\nAPI 쿼터: {quota_used} units 사용"
+
     except Exception as e:
         return f"[ERROR] 수집 실패: {str(e)}"
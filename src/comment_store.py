@@ -0,0 +1,257 @@
+import os
+import csv
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# 댓글 저장소 경로 (환경 변수로 덮어쓰기 가능)
+DEFAULT_STORE_PATH = os.getenv("COMMENT_STORE_PATH", os.path.join("data", "comments.sqlite3"))
+
+# 저장 컬럼 (comment_id 기준 upsert)
+COLUMNS = (
+    "comment_id",
+    "video_id",
+    "parent_id",
+    "author",
+    "text",
+    "like_count",
+    "published_at",
+    "updated_at",
+    "fetched_at",
+    "sentiment_label",
+    "sentiment_score",
+)
+
+# KNIME 워크플로우용 CSV 컬럼 (기존 Comment 컬럼을 맨 앞에 유지)
+CSV_COLUMNS = (
+    ("Comment", "text"),
+    ("CommentId", "comment_id"),
+    ("ParentId", "parent_id"),
+    ("Author", "author"),
+    ("LikeCount", "like_count"),
+    ("PublishedAt", "published_at"),
+    ("Sentiment", "sentiment_label"),
+    ("SentimentScore", "sentiment_score"),
+)
+
+UPSERT_BATCH_SIZE = 500
+
+
+class CommentStore:
+    """
+    댓글을 comment_id 기준으로 보관하는 SQLite 저장소.
+    - upsert: 이미 있는 댓글은 내용/좋아요 수만 갱신 (배치마다 짧은 트랜잭션으로 커밋)
+    - synced_until / mark_synced: 증분 수집 기준 시각 (최신순 전체 수집을 끝까지 마친 시점까지만 전진)
+    - read / iter_rows: 필요한 컬럼만 골라 읽기 (감성 분석, 통계, CSV 내보내기용)
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH) -> None:
+        self.path = path
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS comments (
+                    comment_id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    parent_id TEXT,
+                    author TEXT,
+                    text TEXT NOT NULL,
+                    like_count INTEGER NOT NULL DEFAULT 0,
+                    published_at TEXT,
+                    updated_at TEXT,
+                    fetched_at REAL NOT NULL,
+                    sentiment_label TEXT,
+                    sentiment_score REAL
+                )
+                """
+            )
+
+            # 감성 컬럼이 없던 이전 버전 DB 마이그레이션
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(comments)")}
+            for name, sql_type in (("sentiment_label", "TEXT"), ("sentiment_score", "REAL")):
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE comments ADD COLUMN {name} {sql_type}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_comments_video_published "
+                "ON comments(video_id, published_at)"
+            )
+            # 영상별 증분 수집 기준 시각 (이 시각까지의 최상위 댓글은 빠짐없이 저장됨)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_state (
+                    video_id TEXT PRIMARY KEY,
+                    synced_until TEXT NOT NULL,
+                    synced_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 호출할 때마다 새로 연결 (블록 종료 시 커밋 후 닫음)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _check_columns(columns: Sequence[str]) -> None:
+        unknown = [c for c in columns if c not in COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 컬럼: {unknown}")
+
+    # -------------------------------
+    # 쓰기
+    # -------------------------------
+    def upsert(self, video_id: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        scrape 결과 행(dict)을 배치 단위로 upsert. 전체를 메모리에 모으지 않는다.
+        rows 는 네트워크에서 페이지를 받아 오는 제너레이터일 수 있으므로 배치마다 따로 커밋해
+        다음 페이지를 기다리는 동안 쓰기 잠금을 잡고 있지 않음 (다른 수집 / 감성 저장이 막히지 않게)
+        반환값: 처리한 행 수
+        """
+        sql = """
+            INSERT INTO comments (comment_id, video_id, parent_id, author, text,
+                                  like_count, published_at, updated_at, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(comment_id) DO UPDATE SET
+                sentiment_label = CASE WHEN comments.text = excluded.text
+                                       THEN comments.sentiment_label END,
+                sentiment_score = CASE WHEN comments.text = excluded.text
+                                       THEN comments.sentiment_score END,
+                author = excluded.author,
+                text = excluded.text,
+                like_count = excluded.like_count,
+                updated_at = excluded.updated_at,
+                fetched_at = excluded.fetched_at
+        """
+        total = 0
+        batch: List[Tuple] = []
+
+        with self._connect() as conn:
+            for row in rows:
+                batch.append((
+                    row["id"],
+                    video_id,
+                    row.get("parent_id"),
+                    row.get("author"),
+                    row.get("text", ""),
+                    row.get("like_count") or 0,
+                    row.get("published_at"),
+                    row.get("updated_at"),
+                    time.time(),
+                ))
+                if len(batch) >= UPSERT_BATCH_SIZE:
+                    with conn:
+                        conn.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+
+            if batch:
+                with conn:
+                    conn.executemany(sql, batch)
+                total += len(batch)
+
+        return total
+
+    def set_sentiment(self, rows: Iterable[Tuple[str, str, float]]) -> None:
+        """(comment_id, label, score) 목록으로 감성 분석 결과 저장"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE comments SET sentiment_label = ?, sentiment_score = ? WHERE comment_id = ?",
+                ((label, score, comment_id) for comment_id, label, score in rows),
+            )
+
+    # -------------------------------
+    # 읽기
+    # -------------------------------
+    def latest_published_at(self, video_id: str) -> Optional[str]:
+        """저장된 최상위 댓글 중 가장 최근 작성 시각 (ISO 8601 문자열이라 사전순 비교 가능)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(published_at) FROM comments WHERE video_id = ? AND parent_id IS NULL",
+                (video_id,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def synced_until(self, video_id: str) -> Optional[str]:
+        """증분 수집 기준 시각 (최신순 전체 수집을 끝까지 마친 적이 없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT synced_until FROM scrape_state WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_synced(self, video_id: str) -> None:
+        """
+        최신순 수집을 중간에 끊기지 않고 끝까지 마친 뒤 호출.
+        저장된 최상위 댓글의 최근 작성 시각을 다음 증분 수집 기준으로 기록
+        """
+        latest = self.latest_published_at(video_id)
+        if latest is None:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO scrape_state (video_id, synced_until, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET "
+                "synced_until = excluded.synced_until, synced_at = excluded.synced_at",
+                (video_id, latest, time.time()),
+            )
+
+    def count(self, video_id: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM comments WHERE video_id = ?", (video_id,)
+            ).fetchone()[0]
+
+    def iter_rows(
+        self, video_id: str, columns: Sequence[str] = ("text",), batch_size: int = 1000
+    ) -> Iterator[Tuple]:
+        """선택한 컬럼만 튜플로 순회 (작성 시각 순, fetchmany 로 일정 메모리 유지)"""
+        self._check_columns(columns)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT {', '.join(columns)} FROM comments "
+                "WHERE video_id = ? ORDER BY published_at",
+                (video_id,),
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def read(self, video_id: str, columns: Sequence[str] = ("text",)) -> Dict[str, List[Any]]:
+        """선택한 컬럼만 컬럼별 리스트(dict of lists)로 반환 (행 → 컬럼 전치는 zip 으로 한 번에)"""
+        self._check_columns(columns)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM comments "
+                "WHERE video_id = ? ORDER BY published_at",
+                (video_id,),
+            ).fetchall()
+        if not rows:
+            return {c: [] for c in columns}
+        return {name: list(values) for name, values in zip(columns, zip(*rows))}
+
+    def export_csv(self, video_id: str, path: str) -> int:
+        """KNIME 워크플로우용 CSV 로 스트리밍 내보내기 (임시 파일에 쓴 뒤 교체). 반환값: 행 수"""
+        tmp_path = path + ".part"
+        count = 0
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow([header for header, _ in CSV_COLUMNS])
+            for row in self.iter_rows(video_id, [column for _, column in CSV_COLUMNS]):
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp_path, path)
+        return count
@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import sqlite3
+import hashlib
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# 작업 큐 설정 (환경 변수로 덮어쓰기 가능)
+DEFAULT_JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_REUSE_SECONDS = int(os.getenv("JOB_REUSE_SECONDS", "3600"))   # 같은 요청의 완료 결과 재사용 기간
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))    # 이 시간 동안 갱신 없는 running 작업은 재시도
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))  # 실행 중 작업의 updated_at 갱신 간격
+WORKER_PID_FILE = os.path.join("data", "job_workers.pid")
+WORKER_LOCK_FILE = os.path.join("data", "job_workers.lock")
+
+# 스트리밍 중간 결과는 이 간격 이상으로만 DB 에 기록
+PARTIAL_WRITE_INTERVAL = 0.5
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def make_job_key(video_id: str, options: Dict[str, Any]) -> str:
+    """
+    같은 영상 + 같은 옵션이면 같은 키 (refresh 는 키에 넣지 않음).
+    refresh 요청은 완료 결과를 재사용하지 않고, refresh 가 아닌 진행 중 작업에도 병합하지 않음 (submit 참고)
+    """
+    payload = {k: v for k, v in options.items() if k != "refresh"}
+    raw = json.dumps({"video_id": video_id, "options": payload}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """
+    SQLite 기반 분석 작업 큐.
+    - submit: 같은 요청이 대기/실행 중이면 그 작업 ID 를 그대로 돌려줌 (중복 요청 병합)
+    - claim / progress / finish / fail: 워커 프로세스가 작업을 가져가서 진행 상황과 결과를 기록
+      (작업을 가져간 워커만 기록 가능. heartbeat 로 오래 걸리는 단계 중에도 작업 소유를 유지)
+    - get: UI 가 상태와 (중간) 결과를 조회
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_DB_PATH) -> None:
+        self.path = path
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        # WAL 모드 전환은 트랜잭션 밖에서만 가능
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_key TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs(job_key, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        # immediate=True: 쓰기 잠금을 먼저 잡아서 조회 후 갱신이 원자적으로 이뤄지게 함
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    # -------------------------------
+    # UI 측
+    # -------------------------------
+    def submit(self, video_id: str, options: Optional[Dict[str, Any]] = None) -> str:
+        options = options or {}
+        job_key = make_job_key(video_id, options)
+        now = time.time()
+
+        with self._connect(immediate=True) as conn:
+            # 1) 같은 요청이 대기/실행 중이면 병합
+            #    (새로 생성 요청은 캐시된 응답을 쓰는 일반 작업에 합치지 않음)
+            row = None
+            for job_id, job_options in conn.execute(
+                "SELECT id, options FROM jobs WHERE job_key = ? AND status IN (?, ?) "
+                "ORDER BY created_at DESC",
+                (job_key, *ACTIVE_STATUSES),
+            ).fetchall():
+                if not options.get("refresh") or json.loads(job_options).get("refresh"):
+                    row = (job_id,)
+                    break
+
+            # 2) 최근에 끝난 같은 요청이 있으면 결과 재사용 (강제 재생성 요청 제외)
+            if row is None and not options.get("refresh"):
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE job_key = ? AND status = 'done' AND updated_at > ? "
+                    "ORDER BY updated_at DESC LIMIT 1",
+                    (job_key, now - JOB_REUSE_SECONDS),
+                ).fetchone()
+
+            if row is not None:
+                return row[0]
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, job_key, video_id, options, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, job_key, video_id, json.dumps(options), now, now),
+            )
+            return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, video_id, options, status, progress, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "id": row[0],
+            "video_id": row[1],
+            "options": json.loads(row[2]),
+            "status": row[3],
+            "progress": json.loads(row[4]),
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def position(self, job_id: str) -> int:
+        """대기열에서 앞에 있는 작업 수"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                "AND created_at < (SELECT created_at FROM jobs WHERE id = ?)",
+                (job_id,),
+            ).fetchone()[0]
+
+    # -------------------------------
+    # 워커 측
+    # -------------------------------
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """가장 오래된 대기 작업 하나를 running 으로 바꾸고 반환 (오래 멈춘 작업은 다시 대기열로)"""
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND updated_at < ?",
+                (now - JOB_STALE_SECONDS,),
+            )
+            row = conn.execute(
+                "SELECT id, video_id, options FROM jobs WHERE status = 'queued' "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, progress = '{}', updated_at = ? "
+                "WHERE id = ?",
+                (worker, now, row[0]),
+            )
+        return {"id": row[0], "video_id": row[1], "options": json.loads(row[2]), "worker": worker}
+
+    # 아래 기록 메서드는 모두 이 작업을 가져간 워커가 아직 실행 중일 때만 반영하고,
+    # 반영했는지(작업 소유를 유지하고 있는지) 여부를 반환
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """진행 이벤트 없이 오래 걸리는 단계 중에도 오래 멈춘 작업으로 보이지 않도록 updated_at 갱신"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            ).rowcount > 0
+
+    def progress(self, job_id: str, worker: str, name: str, data: Dict[str, Any]) -> bool:
+        """단계 결과를 progress 에 추가 (progress 는 이 작업의 워커만 수정)"""
+        with self._connect(immediate=True) as conn:
+            row = conn.execute(
+                "SELECT progress FROM jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return False
+            progress = json.loads(row[0])
+            progress[name] = data
+            conn.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(progress, ensure_ascii=False), time.time(), job_id),
+            )
+            return True
+
+    def finish(self, job_id: str, worker: str, result: Dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker),
+            ).rowcount > 0
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (error, time.time(), job_id, worker),
+            ).rowcount > 0
+
+
+# -------------------------------
+# 워커 프로세스
+# -------------------------------
+def run_job(queue: JobQueue, job: Dict[str, Any]) -> None:
+    """작업 하나 실행: 단계 결과는 progress 로, 최종 결과는 result 로 기록"""
+    # 분석 파이프라인(Gemini / YouTube SDK)은 워커 프로세스에서만 필요하므로
+    # UI 가 이 모듈을 import 할 때는 불러오지 않음
+    from .pipeline import analyze_video
+    from .tracing import Tracer
+
+    job_id, worker = job["id"], job["worker"]
+    last_partial_write = 0.0
+
+    def on_event(name: str, data: Dict[str, Any]) -> None:
+        nonlocal last_partial_write
+        if name == "creative_partial":
+            now = time.monotonic()
+            if now - last_partial_write < PARTIAL_WRITE_INTERVAL:
+                return
+            last_partial_write = now
+        queue.progress(job_id, worker, name, data)
+
+    # 댓글 수집 / CPU 감성 분석처럼 이벤트 없이 오래 걸리는 단계 동안에도 작업 소유를 유지
+    stopped = threading.Event()
+
+    def heartbeat() -> None:
+        while not stopped.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                if not queue.heartbeat(job_id, worker):
+                    break
+            except sqlite3.Error as e:
+                print(f"작업 heartbeat 실패: {job_id} ({e})")
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    tracer = Tracer(video_id=job["video_id"], job_id=job_id)
+    try:
+        result = analyze_video(
+            job["video_id"],
+            tracer=tracer,
+            on_event=on_event,
+            stream=True,
+            sentiment=True,
+            analytics=True,
+            **job["options"],
+        )
+        if not queue.finish(job_id, worker, result):
+            print(f"다른 워커가 가져간 작업이라 결과를 기록하지 않음: {job_id}")
+    except Exception as e:
+        queue.fail(job_id, worker, str(e))
+    finally:
+        stopped.set()
+        tracer.write_jsonl()
+
+
+def worker_loop(path: str = DEFAULT_JOB_DB_PATH, poll_interval: float = 0.5) -> None:
+    queue = JobQueue(path)
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    print(f"작업 워커 시작: {worker}")
+
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        print(f"작업 시작: {job['id']} ({job['video_id']})")
+        run_job(queue, job)
+
+
+def run_workers(workers: int = JOB_WORKERS, path: str = DEFAULT_JOB_DB_PATH) -> None:
+    """워커 프로세스 여러 개를 띄우고 종료될 때까지 대기"""
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(path,), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(*_):
+        for process in processes:
+            process.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        shutdown()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """프로세스 간 배타 잠금 (프로세스가 죽으면 OS 가 자동으로 해제)"""
+    with open(path, "a+") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def ensure_workers(workers: int = JOB_WORKERS, cwd: Optional[str] = None) -> Optional[int]:
+    """
+    워커 프로세스가 떠 있지 않으면 백그라운드로 실행 (Streamlit 서버에서 최초 1회 호출).
+    pid 파일 확인과 실행을 파일 잠금 안에서 하므로 서버 프로세스가 여러 개여도 한 번만 뜬다.
+    """
+    pid_path = os.path.join(cwd or ".", WORKER_PID_FILE)
+    os.makedirs(os.path.dirname(pid_path), exist_ok=True)
+
+    with _file_lock(os.path.join(cwd or ".", WORKER_LOCK_FILE)):
+        if os.path.exists(pid_path):
+            try:
+                with open(pid_path) as f:
+                    pid = int(f.read().strip())
+                if _pid_alive(pid):
+                    return pid
+            except ValueError:
+                pass
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.jobs", "--workers", str(workers)],
+            cwd=cwd,
+            start_new_session=True,
+        )
+        with open(pid_path, "w") as f:
+            f.write(str(process.pid))
+        return process.pid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="분석 작업 워커 실행")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="워커 프로세스 수")
+    args = parser.parse_args()
+    run_workers(args.workers)
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# 캐시 설정 (환경 변수로 덮어쓰기 가능)
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7일
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))   # 64MB
+
+
+def make_cache_key(
+    model_name: str,
+    generation_config: Dict[str, Any],
+    safety_settings: List[Dict[str, Any]],
+    prompt: str,
+) -> str:
+    """모델명 + 생성 설정 + safety 설정 + 프롬프트를 합친 sha256 해시"""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "generation_config": generation_config,
+            "safety_settings": safety_settings,
+            "prompt": prompt,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Gemini 응답 텍스트를 디스크(SQLite)에 저장하는 캐시.
+    - TTL 이 지난 항목은 조회 시 삭제
+    - 전체 크기가 max_bytes 를 넘으면 마지막 접근이 오래된 순(LRU)으로 삭제
+    - 캐시 오류는 분석을 막지 않도록 로그만 남기고 무시
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 스레드마다 별도 연결을 쓰도록 호출할 때마다 새로 연결 (블록 종료 시 커밋 후 닫음)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답 텍스트 반환 (없거나 만료되면 None)"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+
+                conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                )
+                return value
+        except Exception as e:
+            print("LLM 캐시 조회 에러:", e)
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """응답 텍스트 저장 후 용량 초과분 정리"""
+        try:
+            now = time.time()
+            size = len(value.encode("utf-8"))
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (key, value, size, now, now),
+                )
+                self._evict(conn, now)
+        except Exception as e:
+            print("LLM 캐시 저장 에러:", e)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        # 1) 만료 항목 삭제
+        conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+
+        # 2) 용량 초과 시 LRU 순으로 삭제
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self) -> None:
+        """캐시 전체 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+def open_llm_cache(path: str = DEFAULT_CACHE_PATH) -> Optional[LLMCache]:
+    """기본 LLM 캐시 생성. data/ 에 쓸 수 없거나 DB 가 잠겨 만들지 못하면 None (캐시 없이 진행)"""
+    try:
+        return LLMCache(path)
+    except Exception as e:
+        print("LLM 캐시 초기화 에러:", e)
+        return None
@@ -0,0 +1,265 @@
+import os
+import time
+import queue
+import random
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Gemini 호출 정책 설정 (환경 변수로 덮어쓰기 가능)
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))              # 모델 1개당 호출 마감 시간
+LLM_FALLBACK_DEADLINE_SECONDS = float(os.getenv("LLM_FALLBACK_DEADLINE_SECONDS", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1.0"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "16"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"                                      # 중복 요청(hedging) 사용 여부
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# 마감 시간 초과 / 재시도 소진 시 대신 쓸 모델
+FALLBACK_MODELS = {"gemini-2.5-pro": "gemini-2.5-flash"}
+
+# 일시적 오류로 보고 재시도하는 예외 (google.api_core / requests / 내장 예외 이름)
+TRANSIENT_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "BadGateway", "GatewayTimeout", "DeadlineExceeded", "Aborted", "RetryError",
+    "ConnectionError", "ConnectTimeout", "ReadTimeout", "Timeout", "TimeoutError",
+    "RemoteDisconnected", "ConnectionResetError",
+}
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CallDeadlineExceeded(TimeoutError):
+    """모델 호출이 마감 시간 안에 끝나지 않은 경우"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """재시도하면 성공할 수 있는 오류인지 (레이트 리밋 / 서버 오류 / 네트워크 오류)"""
+    if isinstance(error, CallDeadlineExceeded):
+        return False
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    return isinstance(code, int) and code in TRANSIENT_STATUS_CODES
+
+
+def _run_async(fn: Callable[..., Any], *args: Any) -> Future:
+    """
+    데몬 스레드에서 fn 실행. 마감 시간이 지나 기다리기를 포기한 호출이
+    공유 풀의 워커를 붙잡지 않도록 호출마다 스레드를 따로 씀
+    """
+    future: Future = Future()
+
+    def target() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+def iter_with_deadline(items: Iterable[Any], deadline_at: Optional[float], label: str = "") -> Iterator[Any]:
+    """
+    스트림 응답 조각을 데몬 스레드에서 읽어 deadline_at(time.monotonic 기준)까지만 기다림.
+    넘기면 CallDeadlineExceeded, 읽는 중 오류는 그대로 발생.
+    (포기한 스트림은 SDK 요청 타임아웃이 끝날 때까지 읽기 스레드가 마저 소비)
+    """
+    if deadline_at is None:
+        yield from items
+        return
+
+    chunks: "queue.Queue[Tuple[bool, Any]]" = queue.Queue()
+    end = object()
+
+    def reader() -> None:
+        try:
+            for item in items:
+                chunks.put((True, item))
+            chunks.put((True, end))
+        except BaseException as e:
+            chunks.put((False, e))
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        try:
+            ok, item = chunks.get(timeout=max(0.0, deadline_at - time.monotonic()))
+        except queue.Empty:
+            raise CallDeadlineExceeded(f"{label}: 스트림 수신 중 마감 시간 초과") from None
+        if not ok:
+            raise item
+        if item is end:
+            return
+        yield item
+
+
+class CallPolicy:
+    """
+    Gemini 호출 정책 (여러 스레드 / VideoAnalyst 가 공유).
+    - deadline: 모델별 호출 마감 시간 (재시도 포함). 넘기면 대체 모델(FALLBACK_MODELS)로 전환
+    - retry: 일시적 오류는 지수 백오프 + full jitter 로 재시도 (남은 마감 시간 안에서만)
+    - hedge: 모델별 최근 지연 시간의 p95 가 지나도 응답이 없으면 같은 요청을 한 번 더 보내
+      먼저 끝난 응답을 사용 (hedge=True 이고 표본이 hedge_min_samples 이상일 때만)
+    - 호출 결과는 info dict(model, attempts, hedged, fallback_from)로 돌려줘 계측에 기록
+      (deadline_at: 응답한 모델의 마감 시각. 스트림 수신도 이 시각까지만 기다림)
+    """
+
+    def __init__(
+        self,
+        deadline_s: Optional[float] = LLM_DEADLINE_SECONDS,
+        fallback_deadline_s: Optional[float] = LLM_FALLBACK_DEADLINE_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_s: float = LLM_RETRY_BASE_SECONDS,
+        retry_max_s: float = LLM_RETRY_MAX_SECONDS,
+        hedge: bool = LLM_HEDGE,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        fallbacks: Optional[Dict[str, str]] = None,
+        window: int = 200,
+    ) -> None:
+        self.deadline_s = deadline_s
+        self.fallback_deadline_s = fallback_deadline_s
+        self.max_retries = max_retries
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.fallbacks = FALLBACK_MODELS if fallbacks is None else fallbacks
+        self.window = window
+
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # 지연 시간 통계 (hedging 기준)
+    # -------------------------------
+    def observe(self, model_name: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(model_name, deque(maxlen=self.window)).append(seconds)
+
+    def latency_percentile(self, model_name: str, pct: float) -> Optional[float]:
+        """최근 성공 호출 지연 시간의 백분위 (표본이 hedge_min_samples 미만이면 None)"""
+        with self._lock:
+            samples = sorted(self._latencies.get(model_name, ()))
+        if len(samples) < max(1, self.hedge_min_samples):
+            return None
+        rank = max(1, -(-len(samples) * pct // 100))
+        return samples[int(rank) - 1]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_max_s, self.retry_base_s * (2 ** attempt)))
+
+    # -------------------------------
+    # 호출
+    # -------------------------------
+    def call(
+        self, model_name: str, fn: Callable[[str, Optional[float]], Any], hedge: Optional[bool] = None
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        fn(모델명, 남은 시간(초) 또는 None) 을 정책에 따라 실행하고 (응답, info) 반환.
+        마감 시간 초과 / 재시도 소진 시 대체 모델로 한 번 더 시도하고, 그래도 실패하면 마지막 예외를 발생
+        """
+        hedge = self.hedge if hedge is None else hedge
+        info: Dict[str, Any] = {"model": model_name, "attempts": 0, "hedged": False}
+
+        try:
+            return self._call_model(model_name, fn, self.deadline_s, hedge, info), info
+        except Exception as e:
+            fallback = self.fallbacks.get(model_name)
+            if fallback is None or not (isinstance(e, CallDeadlineExceeded) or is_transient(e)):
+                raise
+            info.update(model=fallback, fallback_from=model_name, fallback_reason=type(e).__name__)
+            return self._call_model(fallback, fn, self.fallback_deadline_s, hedge, info), info
+
+    def _call_model(
+        self, model_name: str, fn: Callable[[str, Optional[float]], Any],
+        deadline_s: Optional[float], hedge: bool, info: Dict[str, Any],
+    ) -> Any:
+        deadline_at = time.monotonic() + deadline_s if deadline_s else None
+        info["deadline_at"] = deadline_at
+        attempt = 0
+
+        while True:
+            try:
+                return self._attempt(model_name, fn, deadline_at, hedge, info)
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+                    raise CallDeadlineExceeded(f"{model_name}: 재시도 대기 중 마감 시간 초과") from e
+                time.sleep(delay)
+                attempt += 1
+
+    def _attempt(
+        self, model_name: str, fn: Callable[[str, Optional[float]], Any],
+        deadline_at: Optional[float], hedge: bool, info: Dict[str, Any],
+    ) -> Any:
+        """요청 1회 (필요하면 hedging 중복 요청 포함). 먼저 성공한 응답 반환"""
+        started = time.monotonic()
+
+        def remaining() -> Optional[float]:
+            return None if deadline_at is None else deadline_at - time.monotonic()
+
+        def launch() -> Future:
+            info["attempts"] += 1
+            return _run_async(fn, model_name, remaining())
+
+        if deadline_at is not None and remaining() <= 0:
+            raise CallDeadlineExceeded(f"{model_name}: 마감 시간 초과")
+
+        pending: List[Future] = [launch()]
+        hedge_at = None
+        if hedge:
+            threshold = self.latency_percentile(model_name, self.hedge_percentile)
+            if threshold is not None:
+                hedge_at = started + threshold
+        error: Optional[BaseException] = None
+
+        while pending:
+            wake = [t for t in (deadline_at, hedge_at) if t is not None]
+            timeout = max(0.0, min(wake) - time.monotonic()) if wake else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    self.observe(model_name, time.monotonic() - started)
+                    return future.result()
+                error = error or future.exception()
+
+            now = time.monotonic()
+            if deadline_at is not None and now >= deadline_at:
+                raise CallDeadlineExceeded(f"{model_name}: 마감 시간 초과")
+            if hedge_at is not None and now >= hedge_at:
+                # 느린 요청은 그대로 두고 같은 요청을 한 번만 더 보냄
+                hedge_at = None
+                if pending:
+                    info["hedged"] = True
+                    pending.append(launch())
+
+        raise error
+
+
+_default_policy: Optional[CallPolicy] = None
+_default_lock = threading.Lock()
+
+
+def get_call_policy() -> CallPolicy:
+    """프로세스 전체가 공유하는 기본 호출 정책 (모델별 지연 시간 통계를 함께 쌓음)"""
+    global _default_policy
+    if _default_policy is None:
+        with _default_lock:
+            if _default_policy is None:
+                _default_policy = CallPolicy()
+    return _default_policy
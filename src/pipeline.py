@@ -0,0 +1,243 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .utils import TranscriptSession, get_thumbnail_url, get_video_title
+from .agents import VideoAnalyst
+from .comment_scraper import DEFAULT_MAX_COMMENTS, DEFAULT_MAX_PAGES, scrape_comments
+from .comment_analytics import analyze_comments
+from .comment_clusters import cluster_comments, format_cluster_context
+from .llm_cache import LLMCache
+from .sentiment import score_comments
+from .quota import QuotaLimiter
+from .tracing import Tracer
+
+
+class StageLimits:
+    """
+    여러 영상을 동시에 처리할 때 단계별 동시 실행 수 상한.
+    - transcript: 자막 목록/다운로드/번역 요청
+    - comments: YouTube Data API 댓글 수집
+    - llm: Gemini 요청 (영상 1개당 요약 + 창작 동시 요청을 1슬롯으로 계산)
+    """
+
+    def __init__(self, transcript: int = 4, comments: int = 2, llm: int = 4) -> None:
+        self._semaphores = {
+            "transcript": threading.BoundedSemaphore(transcript),
+            "comments": threading.BoundedSemaphore(comments),
+            "llm": threading.BoundedSemaphore(llm),
+        }
+
+    @contextmanager
+    def slot(self, stage: str) -> Iterator[None]:
+        semaphore = self._semaphores[stage]
+        with semaphore:
+            yield
+
+
+class StageGraph:
+    """
+    의존 관계가 있는 단계들을 스레드로 실행하는 실행기.
+    - 입력(deps)이 없는 단계는 바로 함께 시작하고, 나머지는 입력이 모두 끝나는 즉시 시작
+    - 단계 함수는 입력 단계 결과를 deps 순서대로 위치 인자로 받음
+    - 전체 소요 시간은 단계 합이 아니라 가장 긴 경로에 가까움
+    - 단계에서 예외가 나면 새 단계는 시작하지 않고, 실행 중인 단계가 끝난 뒤 예외를 다시 발생
+    """
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, Callable[..., Any]] = {}
+        self._deps: Dict[str, List[str]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = ()) -> "StageGraph":
+        unknown = [d for d in deps if d not in self._stages]
+        if unknown:
+            raise ValueError(f"{name}: 먼저 등록되지 않은 입력 단계 {unknown}")
+        self._stages[name] = fn
+        self._deps[name] = list(deps)
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """모든 단계를 실행하고 {단계 이름: 결과} 반환"""
+        results: Dict[str, Any] = {}
+        pending = dict(self._deps)
+        running: Dict[Future, str] = {}
+        error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self._stages))) as pool:
+            while pending or running:
+                if error is None:
+                    ready = [n for n, deps in pending.items() if all(d in results for d in deps)]
+                    for name in ready:
+                        del pending[name]
+                        inputs = [results[d] for d in self._deps[name]]
+                        running[pool.submit(self._stages[name], *inputs)] = name
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException as e:
+                        error = error or e
+
+        if error is not None:
+            raise error
+        return results
+
+
+def analyze_video(
+    video_id: str,
+    limits: Optional[StageLimits] = None,
+    limiter: Optional[QuotaLimiter] = None,
+    llm_cache: Optional[LLMCache] = None,
+    refresh: bool = False,
+    max_comments: Optional[int] = DEFAULT_MAX_COMMENTS,
+    max_pages: Optional[int] = DEFAULT_MAX_PAGES,
+    include_replies: bool = False,
+    tracer: Optional[Tracer] = None,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    stream: bool = False,
+    sentiment: bool = False,
+    analytics: bool = False,
+    combined: bool = False,
+    clusters: bool = False,
+) -> Dict[str, Any]:
+    """
+    영상 하나에 대해 제목 / 썸네일 / 자막 / 댓글 수집 / 요약·창작 을 실행하고 결과를 dict 로 반환.
+    (Streamlit 없이 배치/백그라운드 작업에서 사용)
+    - limits / limiter / llm_cache 를 넘기면 여러 영상 처리 간에 공유
+    - 댓글은 기본 max_pages / max_comments 상한까지만 수집 (None 을 넘기면 전체)
+    - 독립적인 단계는 StageGraph 로 동시에 실행 (on_event 는 여러 스레드에서 호출될 수 있음)
+    - on_event(이름, 데이터): 단계 결과가 나올 때마다 호출 (진행 상황 표시용)
+    - stream=True 면 창작 결과 생성 중 on_event("creative_partial", 부분 dict) 도 호출
+    - sentiment=True 면 댓글 수집 후 감성 분포(label_counts)까지 계산
+    - analytics=True 면 저장된 댓글의 중복/키워드/좋아요 가중 감성/작성 시각 추이 집계
+    - combined=True 면 요약과 창작을 한 번의 Gemini 요청으로 생성 (자막 프롬프트 토큰 절약)
+    - clusters=True 면 댓글을 의미별 주제로 묶고, 요약/창작 프롬프트에 주제와 대표 댓글을 참고용으로 추가
+      (이 경우 요약/창작은 자막과 댓글 주제가 모두 준비된 뒤 시작)
+    - 감성/통계/주제 단계의 예외는 해당 결과의 {"error": ...} 로만 남기고 status 에는 반영하지 않음
+    - status: 요약과 창작이 모두 성공하면 "ok", 아니면 "error"
+    """
+    limits = limits or StageLimits()
+    tracer = tracer or Tracer(video_id=video_id)
+    started = time.perf_counter()
+
+    def emit(name: str, data: Dict[str, Any]) -> None:
+        if on_event is not None:
+            on_event(name, data)
+
+    result: Dict[str, Any] = {"video_id": video_id, "run_id": tracer.run_id}
+
+    # 제목 / 썸네일 / 자막 / 댓글은 서로 독립이므로 영상 ID 만 알면 함께 시작하고,
+    # 요약/창작은 자막이, 감성/댓글 분석은 댓글 수집이 끝나는 즉시 시작
+    def run_title() -> None:
+        with tracer.span("title", video_id=video_id):
+            result["title"] = get_video_title(video_id)
+        emit("title", {"title": result["title"]})
+
+    def run_thumbnail() -> None:
+        with tracer.span("thumbnail", video_id=video_id):
+            result["thumbnail"] = get_thumbnail_url(video_id)
+        emit("thumbnail", {"url": result["thumbnail"]})
+
+    # 자막은 세션에 한 번만 받아 두고 요약/창작이 공유
+    session = TranscriptSession()
+
+    def run_transcript() -> Optional[str]:
+        with limits.slot("transcript"):
+            text = session.get(video_id, tracer=tracer)
+        emit("transcript", {"chars": len(text) if text else 0})
+        return text
+
+    def run_comments() -> None:
+        with limits.slot("comments"):
+            result["comments"] = scrape_comments(
+                video_id,
+                max_pages=max_pages,
+                max_comments=max_comments,
+                include_replies=include_replies,
+                limiter=limiter,
+                tracer=tracer,
+            )
+        emit("comments", {"message": result["comments"]})
+
+    def optional(name: str, fn: Callable[..., None]) -> Callable[..., None]:
+        """
+        부가 단계(감성/통계/주제)는 실패해도 작업 전체를 실패시키지 않고
+        result[name] = {"error": ...} 로 남김 (요약/창작 결과는 그대로 유지)
+        """
+        def run(*inputs: Any) -> None:
+            try:
+                fn(*inputs)
+            except Exception as e:
+                result[name] = {"error": f"{type(e).__name__}: {e}"}
+                emit(name, result[name])
+        return run
+
+    def comments_ok() -> bool:
+        return "[ERROR]" not in result["comments"]
+
+    def run_sentiment(_: None) -> None:
+        if not (sentiment and comments_ok()):
+            return
+        with tracer.span("sentiment", video_id=video_id) as record:
+            scored = score_comments(video_id)
+            record["items"] = scored.get("scored", 0)
+        # 댓글별 라벨/점수는 CommentStore 에 저장되므로 결과에는 분포만 남김
+        if "error" in scored:
+            result["sentiment"] = {"error": scored["error"]}
+        else:
+            result["sentiment"] = {"label_counts": scored["label_counts"], "total": len(scored["labels"])}
+        emit("sentiment", result["sentiment"])
+
+    def run_analytics(_: None) -> None:
+        if not (analytics and comments_ok()):
+            return
+        with tracer.span("analytics", video_id=video_id) as record:
+            result["analytics"] = analyze_comments(video_id)
+            record["items"] = result["analytics"].get("total", 0)
+        emit("analytics", result["analytics"])
+
+    def run_clusters(_: None) -> None:
+        if not (clusters and comments_ok()):
+            return
+        with tracer.span("clusters", video_id=video_id) as record:
+            result["clusters"] = cluster_comments(video_id)
+            record["items"] = result["clusters"].get("embedded", 0)
+        emit("clusters", result["clusters"])
+
+    def run_llm(text: Optional[str], *_: None) -> None:
+        context = format_cluster_context(result["clusters"]) if "clusters" in result else None
+        analyst = VideoAnalyst(
+            transcript_session=session, llm_cache=llm_cache, refresh=refresh, tracer=tracer,
+            comment_context=context,
+        )
+        with limits.slot("llm"):
+            for name, res in analyst.analyze_concurrently(
+                video_id, text, stream=stream, combined=combined
+            ):
+                if name != "creative_partial":
+                    result[name] = res
+                emit(name, res)
+
+    graph = StageGraph()
+    graph.add("title", run_title)
+    graph.add("thumbnail", run_thumbnail)
+    graph.add("transcript", run_transcript)
+    graph.add("comments", run_comments)
+    # 감성 라벨이 저장된 뒤에 분석해야 좋아요 가중 감성이 포함됨
+    graph.add("sentiment", optional("sentiment", run_sentiment), deps=["comments"])
+    graph.add("analytics", optional("analytics", run_analytics), deps=["sentiment"])
+    graph.add("clusters", optional("clusters", run_clusters), deps=["comments"])
+    graph.add("llm", run_llm, deps=["transcript", "clusters"] if clusters else ["transcript"])
+    graph.run()
+
+    failed = [name for name in ("summary", "creative") if "error" in result.get(name, {})]
+    result["status"] = "error" if failed else "ok"
+    result["elapsed_s"] = round(time.perf_counter() - started, 2)
+    result["trace"] = tracer.records
+    return result
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# YouTube Data API 쿼터 설정 (환경 변수로 덮어쓰기 가능)
+# - list 요청 1회 = 1 unit, 프로젝트 기본 일일 쿼터 = 10,000 units
+DAILY_QUOTA_UNITS = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+QUOTA_RATE_PER_SEC = float(os.getenv("YOUTUBE_QUOTA_RATE", "20"))
+QUOTA_BURST = int(os.getenv("YOUTUBE_QUOTA_BURST", "40"))
+
+# 일일 사용량 기록 (모든 실행 / 작업 워커 / 배치 프로세스가 공유)
+DEFAULT_QUOTA_DB_PATH = os.getenv("YOUTUBE_QUOTA_DB_PATH", os.path.join("data", "youtube_quota.sqlite3"))
+# YouTube Data API 일일 쿼터는 태평양 시간 자정에 초기화
+QUOTA_TIMEZONE = "America/Los_Angeles"
+
+# 재시도 대상 에러 (403 은 reason 으로 구분)
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class QuotaExceededError(Exception):
+    """이번 실행 예산 또는 일일 쿼터를 모두 사용한 경우"""
+
+
+def _http_error_info(error):
+    """HttpError 에서 (status, reason) 추출. HttpError 가 아니면 (None, None)"""
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None)
+    if status is None:
+        return None, None
+
+    reason = None
+    try:
+        content = getattr(error, "content", b"") or b""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "ignore")
+        details = json.loads(content).get("error", {}).get("errors", [])
+        if details:
+            reason = details[0].get("reason")
+    except Exception:
+        pass
+    return int(status), reason
+
+
+def quota_day() -> str:
+    """쿼터 기준 날짜 (태평양 시간, 시간대 정보가 없으면 UTC-8 고정)"""
+    try:
+        from zoneinfo import ZoneInfo
+
+        tz = ZoneInfo(QUOTA_TIMEZONE)
+    except Exception:
+        tz = datetime.timezone(datetime.timedelta(hours=-8))
+    return datetime.datetime.now(tz).date().isoformat()
+
+
+class QuotaLedger:
+    """
+    날짜별 YouTube API 사용량을 SQLite 에 기록해 여러 프로세스가 하나의 일일 쿼터를 나눠 쓰게 함.
+    - reserve: 오늘 사용량 + units 가 daily_limit 이하일 때만 원자적으로 더함
+    - mark_exhausted: API 가 quotaExceeded 를 돌려주면 오늘 남은 쿼터를 0 으로 기록
+    """
+
+    def __init__(self, path: str = DEFAULT_QUOTA_DB_PATH, daily_limit: int = DAILY_QUOTA_UNITS) -> None:
+        self.path = path
+        self.daily_limit = daily_limit
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_usage (day TEXT PRIMARY KEY, units INTEGER NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE 로 조회 후 갱신을 원자적으로 (다른 프로세스와 경합해도 한도를 넘지 않음)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def used_today(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT units FROM quota_usage WHERE day = ?", (quota_day(),)).fetchone()
+        return row[0] if row else 0
+
+    def reserve(self, units: int) -> bool:
+        """오늘 쿼터에서 units 를 차감 (남은 쿼터가 부족하면 False)"""
+        day = quota_day()
+        with self._connect() as conn:
+            row = conn.execute("SELECT units FROM quota_usage WHERE day = ?", (day,)).fetchone()
+            used = row[0] if row else 0
+            if used + units > self.daily_limit:
+                return False
+            conn.execute(
+                "INSERT INTO quota_usage (day, units) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET units = units + excluded.units",
+                (day, units),
+            )
+            # 지난 날짜 기록 정리
+            conn.execute("DELETE FROM quota_usage WHERE day < date(?, '-30 days')", (day,))
+        return True
+
+    def mark_exhausted(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO quota_usage (day, units) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET units = MAX(units, excluded.units)",
+                (quota_day(), self.daily_limit),
+            )
+
+
+_default_ledger: Optional[QuotaLedger] = None
+_default_lock = threading.Lock()
+
+
+def get_quota_ledger() -> Optional[QuotaLedger]:
+    """
+    프로세스 공유 기본 일일 사용량 기록 (처음 사용할 때 생성).
+    data/ 에 쓸 수 없어 만들지 못하면 None (다음 호출에서 다시 시도, 그동안은 실행별 예산만 적용)
+    """
+    global _default_ledger
+    if _default_ledger is None:
+        with _default_lock:
+            if _default_ledger is None:
+                try:
+                    _default_ledger = QuotaLedger()
+                except Exception as e:
+                    print("YouTube 쿼터 기록 초기화 에러:", e)
+    return _default_ledger
+
+
+class QuotaLimiter:
+    """
+    YouTube Data API 쿼터 단위를 세는 토큰 버킷 (여러 스레드가 공유).
+    - rate: 초당 보충되는 단위 수 / burst: 한 번에 쓸 수 있는 최대 단위 수 (속도 제한은 인스턴스별)
+    - budget: 이번 실행에서 쓸 수 있는 최대 단위 수 (초과 시 QuotaExceededError)
+    - shared=True 면 요청마다 QuotaLedger 의 오늘 사용량에도 반영해서, 여러 실행 / 작업 워커 /
+      배치 프로세스를 합친 사용량이 DAILY_QUOTA_UNITS 를 넘으면 QuotaExceededError
+    - 403(rateLimit)/429/5xx 응답 시 모든 워커가 함께 지수 백오프
+    - used: 이번 실행에서 사용한 단위 수
+    """
+
+    def __init__(self, rate=QUOTA_RATE_PER_SEC, burst=QUOTA_BURST, budget=DAILY_QUOTA_UNITS, shared=True):
+        self.rate = rate
+        self.burst = burst
+        self.budget = budget
+        self.shared = shared
+        self.used = 0
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, units=1):
+        """units 만큼 토큰이 찰 때까지 대기 후 사용량에 반영"""
+        while True:
+            with self._lock:
+                if self.budget is not None and self.used + units > self.budget:
+                    raise QuotaExceededError(
+                        f"YouTube API 쿼터 예산({self.budget} units)을 모두 사용했습니다."
+                    )
+
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                wait = max(0.0, self._paused_until - now)
+                if not wait and self._tokens >= units:
+                    self._reserve_daily(units)
+                    self._tokens -= units
+                    self.used += units
+                    return
+                if not wait:
+                    wait = (units - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def _reserve_daily(self, units):
+        """프로세스 간 공유 일일 사용량에서 차감 (기록 DB 오류는 요청을 막지 않음)"""
+        ledger = get_quota_ledger() if self.shared else None
+        if ledger is None:
+            return
+        try:
+            reserved = ledger.reserve(units)
+        except sqlite3.Error as e:
+            print("YouTube 쿼터 기록 에러:", e)
+            return
+        if not reserved:
+            raise QuotaExceededError(
+                f"오늘 YouTube API 쿼터({ledger.daily_limit} units)를 모든 실행을 합쳐 모두 사용했습니다."
+            )
+
+    def pause(self, attempt):
+        """429/403 응답 시 지수 백오프 (+ 지터). 모든 워커가 같은 시점까지 대기"""
+        delay = min(30.0, (2 ** attempt) * 0.5) * (1 + random.random() * 0.5)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def execute(self, request, units=1, max_retries=5):
+        """쿼터를 확보한 뒤 googleapiclient 요청 실행 (일시적 오류는 백오프 후 재시도)"""
+        attempt = 0
+        while True:
+            self.acquire(units)
+            try:
+                return request.execute()
+            except Exception as e:
+                status, reason = _http_error_info(e)
+
+                if reason in QUOTA_REASONS:
+                    # 다른 프로세스도 오늘은 더 요청하지 않도록 기록
+                    ledger = get_quota_ledger() if self.shared else None
+                    if ledger is not None:
+                        try:
+                            ledger.mark_exhausted()
+                        except sqlite3.Error as e:
+                            print("YouTube 쿼터 기록 에러:", e)
+                    raise QuotaExceededError("YouTube API 일일 쿼터를 초과했습니다.") from e
+
+                retryable = status == 429 or (status is not None and status >= 500) or (
+                    status == 403 and reason in RETRYABLE_REASONS
+                )
+                if not retryable or attempt >= max_retries:
+                    raise
+
+                self.pause(attempt)
+                attempt += 1
@@ -0,0 +1,191 @@
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from .comment_store import CommentStore
+
+load_dotenv()
+
+# 허깅페이스에 공개되어 있는 감정분석 모델
+MODEL_NAME = "nlp04/korean_sentiment_analysis_kcelectra"
+
+# 로컬 모델 경로 (model_download.py 저장 위치, 환경 변수로 변경 가능)
+MODEL_PATH = os.getenv("SENTIMENT_MODEL_PATH", os.path.join("models", "korean_sentiment_kcelectra"))
+
+# 배치 추론 설정
+BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "64"))
+MAX_LENGTH = 128
+
+# 추론 백엔드: auto(ONNX 파일이 있으면 ONNX, 없으면 PyTorch) / onnx / torch
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "auto")
+
+# model_export.py 가 만드는 ONNX 파일 (모델 폴더 아래 onnx/)
+ONNX_DIR_NAME = "onnx"
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+def find_onnx_model(model_path: str = MODEL_PATH) -> Optional[str]:
+    """내보낸 ONNX 모델 경로 반환 (int8 양자화본 우선, 없으면 None)"""
+    onnx_dir = os.path.join(model_path, ONNX_DIR_NAME)
+    for file_name in (ONNX_INT8_FILE, ONNX_FP32_FILE):
+        path = os.path.join(onnx_dir, file_name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class SentimentEngine:
+    """
+    KcELECTRA 감성 분석 모델을 한 번만 로드해서 CPU 배치 추론하는 엔진.
+    - 길이순 정렬 후 배치를 만들어 배치별 최장 길이까지만 패딩 (동적 패딩)
+    - backend="auto" 면 model_export.py 로 만든 ONNX(int8 우선) 를 onnxruntime 으로,
+      없으면 원본 PyTorch 모델로 추론
+    - onnx_path 를 직접 넘기면 해당 ONNX 파일 사용 (벤치마크용)
+    - 결과는 입력 순서대로 {"label", "score"} 리스트로 반환
+    """
+
+    def __init__(self, model_path: str = MODEL_PATH, batch_size: int = BATCH_SIZE,
+                 max_length: int = MAX_LENGTH, backend: str = SENTIMENT_BACKEND,
+                 onnx_path: Optional[str] = None) -> None:
+        # transformers 등은 감성 분석을 쓸 때만 필요하므로 여기서 로드
+        from transformers import AutoConfig, AutoTokenizer
+
+        # 로컬 경로에 모델이 없으면 허깅페이스에서 직접 받음
+        source = model_path if os.path.isdir(model_path) else MODEL_NAME
+
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+
+        id2label = AutoConfig.from_pretrained(source).id2label
+        self.labels = [id2label[i] for i in range(len(id2label))]
+
+        if onnx_path is None and backend in ("auto", "onnx"):
+            onnx_path = find_onnx_model(model_path)
+            if onnx_path is None and backend == "onnx":
+                raise FileNotFoundError("ONNX 모델이 없습니다. model_export.py 를 먼저 실행하세요.")
+
+        if onnx_path is not None:
+            import onnxruntime
+
+            self.backend = "onnx"
+            self.model_file = onnx_path
+            self.session = onnxruntime.InferenceSession(
+                onnx_path, providers=["CPUExecutionProvider"]
+            )
+            self.input_names = {i.name for i in self.session.get_inputs()}
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            self.backend = "torch"
+            self.model_file = source
+            self.torch = torch
+            self.model = AutoModelForSequenceClassification.from_pretrained(source)
+            self.model.eval()
+
+    def _logits(self, batch: List[str]):
+        """배치 하나의 logits 를 numpy 배열로 반환"""
+        if self.backend == "onnx":
+            encoded = self.tokenizer(
+                batch, padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np",
+            )
+            feed = {k: v.astype("int64") for k, v in encoded.items() if k in self.input_names}
+            return self.session.run(None, feed)[0]
+
+        encoded = self.tokenizer(
+            batch, padding=True, truncation=True,
+            max_length=self.max_length, return_tensors="pt",
+        )
+        with self.torch.inference_mode():
+            return self.model(**encoded).logits.numpy()
+
+    def predict(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        import numpy as np
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+
+        # 비슷한 길이끼리 묶어야 패딩 낭비가 적음
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i] or ""))
+
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            logits = self._logits([texts[i] or "" for i in indices])
+
+            # softmax (수치 안정성을 위해 최댓값을 빼고 계산)
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            probs = exp / exp.sum(axis=-1, keepdims=True)
+            label_ids = probs.argmax(axis=-1)
+            scores = probs[np.arange(len(indices)), label_ids]
+
+            for i, score, label_id in zip(indices, scores.tolist(), label_ids.tolist()):
+                results[i] = {"label": self.labels[label_id], "score": score}
+
+        return results
+
+
+# 프로세스 전체에서 공유하는 엔진 (최초 호출 시 한 번만 로드)
+_ENGINE: Optional[SentimentEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_sentiment_engine(model_path: Optional[str] = None) -> SentimentEngine:
+    """감성 분석 엔진 싱글턴 반환 (model_path 는 최초 로드 시에만 적용)"""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = SentimentEngine(model_path or MODEL_PATH)
+    return _ENGINE
+
+
+def score_comments(video_id: str, store: Optional[CommentStore] = None,
+                   rescore: bool = False) -> Dict[str, Any]:
+    """
+    scrape_comments 로 저장된 댓글의 감성을 분석해서 저장소와 CSV 에 반영.
+    - rescore=False 면 아직 분석되지 않은 댓글만 추론
+    - 반환: 댓글별 comment_ids / labels / scores 와 라벨별 개수 (실패 시 {"error": ...})
+    """
+    store = store or CommentStore()
+
+    try:
+        engine = get_sentiment_engine()
+    except Exception as e:
+        return {"error": f"감성 분석 모델 로드 실패: {str(e)}"}
+
+    columns = store.read(video_id, ["comment_id", "text", "sentiment_label", "sentiment_score"])
+    if not columns["comment_id"]:
+        return {"error": "분석할 댓글이 없습니다."}
+
+    targets = [
+        i for i, label in enumerate(columns["sentiment_label"]) if rescore or label is None
+    ]
+    if targets:
+        # 토크나이저 / ONNX 런타임 / 저장소 오류도 예외 대신 error dict 로 반환
+        try:
+            predictions = engine.predict([columns["text"][i] for i in targets])
+            for i, pred in zip(targets, predictions):
+                columns["sentiment_label"][i] = pred["label"]
+                columns["sentiment_score"][i] = pred["score"]
+
+            store.set_sentiment(
+                (columns["comment_id"][i], columns["sentiment_label"][i], columns["sentiment_score"][i])
+                for i in targets
+            )
+            # KNIME 용 CSV 에도 감성 컬럼 반영
+            store.export_csv(video_id, f"data/comments_{video_id}.csv")
+        except Exception as e:
+            return {"error": f"감성 분석 실패: {str(e)}"}
+
+    return {
+        "comment_ids": columns["comment_id"],
+        "labels": columns["sentiment_label"],
+        "scores": columns["sentiment_score"],
+        "label_counts": dict(Counter(columns["sentiment_label"]).most_common()),
+        "scored": len(targets),
+    }
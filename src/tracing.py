@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# 설정 시 분석이 끝날 때마다 계측 기록을 이 파일에 JSON lines 로 추가
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+
+
+class Tracer:
+    """
+    분석 파이프라인 단계별 계측 기록기 (여러 스레드에서 공유 가능).
+
+    with tracer.span("transcript", video_id=video_id) as record:
+        ...
+        record["chars_out"] = len(text)
+
+    - 각 span 은 stage, started_at, wall_ms 와 호출 측이 채운 값
+      (bytes/chars in/out, prompt/response 토큰 수, cache_hit 등) 을 기록
+    - 생성 시 넘긴 context(video_id 등)는 모든 기록에 공통으로 포함
+    """
+
+    def __init__(self, **context: Any) -> None:
+        self.run_id = uuid.uuid4().hex[:12]
+        self.context = context
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        record: Dict[str, Any] = {"stage": stage, "started_at": time.time(), **attrs}
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._add(record)
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.records.append({"run_id": self.run_id, **self.context, **record})
+
+    def to_jsonl(self) -> str:
+        with self._lock:
+            records = list(self.records)
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+    def write_jsonl(self, path: Optional[str] = TRACE_LOG_PATH) -> None:
+        """집계용 JSON lines 파일에 이어 쓰기 (path 가 없으면 아무것도 안 함)"""
+        if not path:
+            return
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_jsonl())
+
+
+class _NullTracer(Tracer):
+    """계측을 쓰지 않을 때의 기본값: span 은 동작하지만 기록은 남기지 않음"""
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        pass
+
+
+NULL_TRACER = _NullTracer()
+
+
+def get_tracer(tracer: Optional[Tracer]) -> Tracer:
+    return tracer if tracer is not None else NULL_TRACER
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 캐시 설정 (환경 변수로 덮어쓰기 가능)
+DEFAULT_TRANSCRIPT_CACHE_PATH = os.getenv(
+    "TRANSCRIPT_CACHE_PATH", os.path.join("data", "transcripts.sqlite3")
+)
+DEFAULT_TTL_SECONDS = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))   # 30일
+NEGATIVE_TTL_SECONDS = int(os.getenv("TRANSCRIPT_NEGATIVE_TTL_SECONDS", str(6 * 3600)))     # 6시간
+
+
+class TranscriptCache:
+    """
+    자막 조회 결과를 디스크(SQLite)에 저장하는 캐시.
+    - 키: (video_id, 언어, 번역 여부)
+    - 정리 전 원본 구간 [(시작 초, 텍스트), ...] 과 선택된 언어 경로
+      (원본 언어, 수동/자동/대체 자막 여부, 번역 여부)를 함께 저장
+    - "자막 없음" 결과도 짧은 TTL 로 저장해서 같은 영상은 네트워크 요청 없이 바로 실패
+    - 캐시 오류는 분석을 막지 않도록 로그만 남기고 무시
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_TRANSCRIPT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: int = NEGATIVE_TTL_SECONDS,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    translate INTEGER NOT NULL,
+                    found INTEGER NOT NULL,
+                    path TEXT,
+                    segments TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, language, translate)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 스레드마다 별도 연결을 쓰도록 호출할 때마다 새로 연결 (블록 종료 시 커밋 후 닫음)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, video_id: str, language: str, translate: bool) -> Optional[Dict[str, Any]]:
+        """
+        캐시된 결과 반환 (없거나 만료되면 None)
+        - 자막이 있으면 {"found": True, "path": {...}, "segments": [(start, text), ...]}
+        - 자막 없음이면 {"found": False}
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT found, path, segments, created_at FROM transcripts "
+                    "WHERE video_id = ? AND language = ? AND translate = ?",
+                    (video_id, language, int(translate)),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                found, path, segments, created_at = row
+                ttl = self.ttl_seconds if found else self.negative_ttl_seconds
+                if time.time() - created_at > ttl:
+                    conn.execute(
+                        "DELETE FROM transcripts WHERE video_id = ? AND language = ? AND translate = ?",
+                        (video_id, language, int(translate)),
+                    )
+                    return None
+
+            if not found:
+                return {"found": False}
+            return {
+                "found": True,
+                "path": json.loads(path),
+                "segments": [tuple(seg) for seg in json.loads(segments)],
+            }
+        except Exception as e:
+            print("자막 캐시 조회 에러:", e)
+            return None
+
+    def set(
+        self,
+        video_id: str,
+        language: str,
+        translate: bool,
+        segments: Sequence[Tuple[float, str]],
+        path: Dict[str, Any],
+    ) -> None:
+        """원본 구간과 언어 경로 저장"""
+        self._write(video_id, language, translate, True, json.dumps(path),
+                    json.dumps([list(seg) for seg in segments], ensure_ascii=False))
+
+    def set_missing(self, video_id: str, language: str, translate: bool) -> None:
+        """자막 없음 결과 저장 (negative_ttl_seconds 동안 유지)"""
+        self._write(video_id, language, translate, False, None, None)
+
+    def _write(self, video_id: str, language: str, translate: bool, found: bool,
+               path: Optional[str], segments: Optional[str]) -> None:
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO transcripts
+                        (video_id, language, translate, found, path, segments, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (video_id, language, int(translate), int(found), path, segments, now),
+                )
+                # 만료 항목 정리
+                conn.execute(
+                    "DELETE FROM transcripts WHERE (found = 1 AND created_at < ?) "
+                    "OR (found = 0 AND created_at < ?)",
+                    (now - self.ttl_seconds, now - self.negative_ttl_seconds),
+                )
+        except Exception as e:
+            print("자막 캐시 저장 에러:", e)
+
+    def clear(self) -> None:
+        """캐시 전체 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM transcripts")
+
+
+_default_cache: Optional[TranscriptCache] = None
+_default_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """
+    프로세스 전체가 공유하는 기본 자막 캐시 (처음 사용할 때 생성).
+    data/ 에 쓸 수 없거나 DB 가 잠겨 만들지 못하면 None (다음 호출에서 다시 시도)
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                try:
+                    _default_cache = TranscriptCache()
+                except Exception as e:
+                    print("자막 캐시 초기화 에러:", e)
+    return _default_cache
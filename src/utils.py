@@ -1,29 +1,91 @@
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
-import requests
+import json
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from .clients import get_http_session, new_http_session
+from .transcript_cache import get_transcript_cache
+from .tracing import get_tracer
+
+_ytt_api = None
+_ytt_lock = threading.Lock()
+
+
+def get_transcript_api():
+    """
+    자막 API 클라이언트 (첫 사용 시 import / 생성).
+    자막 API 는 세션 헤더/쿠키를 직접 바꾸므로 공유 세션과 분리된 전용 keep-alive 세션 사용
+    """
+    global _ytt_api
+    if _ytt_api is None:
+        with _ytt_lock:
+            if _ytt_api is None:
+                from youtube_transcript_api import YouTubeTranscriptApi
+
+                _ytt_api = YouTubeTranscriptApi(http_client=new_http_session())
+    return _ytt_api
+
+
+# 유튜브 URL / ID 파서 (정규식 하나로 처리, 모듈 로드 시 한 번만 컴파일)
+# - 11자리 ID 만 들어온 경우
+# - watch?v= (v 가 다른 파라미터 뒤에 있어도), youtu.be/, shorts/, embed/, live/, v/ 경로
+# - www. / m. / music. 서브도메인, youtube-nocookie.com, 스킴 생략
+# ID 뒤에 ID 문자가 더 이어지면(12자 이상) 다른 경로로 보고 거부
+VIDEO_ID_PATTERN = re.compile(
+    r"^([0-9A-Za-z_-]{11})$"
+    r"|(?<![\w.-])(?:https?://)?(?:(?:www|m|music)\.)?"
+    r"(?:youtube(?:-nocookie)?\.com/(?:watch/?\?(?:[^#\s]*?&)?v=|(?:shorts|embed|live|v|e)/)|youtu\.be/)"
+    r"([0-9A-Za-z_-]{11})(?![0-9A-Za-z_-])",
+    re.IGNORECASE,
+)
+
+VIDEO_ID_CACHE_SIZE = 4096
+
+
+def _match_video_id(url):
+    if not isinstance(url, str):
+        return None
+    match = VIDEO_ID_PATTERN.search(url.strip())
+    return match.group(match.lastindex) if match else None
+
+
+@lru_cache(maxsize=VIDEO_ID_CACHE_SIZE)
+def _cached_video_id(url):
+    return _match_video_id(url)
 
-ytt_api = YouTubeTranscriptApi()
 
 def get_video_id(url):
-    """유튜브 URL에서 Video ID 추출"""
-    if not url:
+    """유튜브 URL에서 Video ID 추출 (같은 입력은 LRU 캐시에서 바로 반환, 실패 시 None)"""
+    if not url or not isinstance(url, str):
         return None
+    return _cached_video_id(url)
+
+
+def extract_video_ids(urls, unique=False):
+    """
+    URL 목록(스프레드시트 열 등)에서 Video ID 일괄 추출.
+    - 기본: 입력 순서대로 ID 목록 (인식 못한 칸 / 빈 칸 / 숫자는 None)
+    - unique=True: 인식한 ID 만 처음 나온 순서대로 중복 없이
+    반복되는 입력은 호출 안의 dict 로 한 번만 파싱 (공유 LRU 캐시를 밀어내지 않음)
+    """
+    memo = {}
+    ids = []
+    for url in urls:
+        try:
+            video_id = memo[url]
+        except KeyError:
+            video_id = memo[url] = _match_video_id(url)
+        except TypeError:
+            # dict / list 처럼 해시할 수 없는 값
+            video_id = None
+        ids.append(video_id)
+
+    if unique:
+        return list(dict.fromkeys(video_id for video_id in ids if video_id))
+    return ids
 
-    # 이미 11자리 ID만 들어온 경우
-    if len(url) == 11 and "http" not in url:
-        return url
-
-    patterns = [
-        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-        r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
-        r'(?:shorts\/)([0-9A-Za-z_-]{11})',
-    ]
-    for p in patterns:
-        match = re.search(p, url)
-        if match:
-            return match.group(1)
-    return None
 
 def get_video_title(video_id):
     """
@@ -39,7 +101,7 @@ def get_video_title(video_id):
             f"?url=https://www.youtube.com/watch?v={video_id}"
             "&format=json"
         )
-        resp = requests.get(oembed_url, timeout=5)
+        resp = get_http_session().get(oembed_url, timeout=5)
         resp.raise_for_status()
 
         data = resp.json()
@@ -48,61 +110,491 @@ def get_video_title(video_id):
         print("get_video_title 에러:", e)
         return None
 
-def get_robust_transcript(video_id):
+
+# 썸네일 후보 (고화질부터). maxresdefault 는 영상에 따라 없을 수 있음(404)
+THUMBNAIL_QUALITIES = ["maxresdefault", "hqdefault", "mqdefault"]
+
+
+def get_thumbnail_url(video_id):
+    """
+    실제로 존재하는 가장 높은 화질의 썸네일 URL 을 HEAD 요청으로 확인해서 반환.
+    모두 실패하면 None (화면에서는 후보를 순서대로 시도)
+    """
+    if not video_id:
+        return None
+
+    for quality in THUMBNAIL_QUALITIES:
+        url = f"https://img.youtube.com/vi/{video_id}/{quality}.jpg"
+        try:
+            resp = get_http_session().head(url, timeout=5)
+            if resp.status_code == 200:
+                return url
+        except Exception as e:
+            # 일시적인 오류일 수 있으므로 다음 화질 후보로 계속 시도
+            print("get_thumbnail_url 에러:", e)
+            continue
+    return None
+
+# 자막 자체가 없는 영상에서 나는 예외 (네트워크 오류와 달리 "자막 없음" 으로 캐시)
+NO_CAPTION_ERRORS = {"TranscriptsDisabled", "NoTranscriptFound", "NoTranscriptAvailable"}
+
+
+def _fetch_segments(video_id, language, translate, tracer, record):
     """
     TranscriptList를 직접 순회(Iterator)하여
-    - 한국어 수동 > 한국어 자동 > (없으면) 아무 자막이나
-    - 필요 시 한국어로 번역
-    - TextFormatter 로 텍스트 변환 처리하는 자막 추출 함수
+    - 지정 언어(기본: 한국어) 수동 > 자동 > (없으면) 아무 자막이나
+    - 필요 시(translate=True) 지정 언어로 번역
+    원본 구간 [(시작 초, 텍스트), ...] 과 선택된 언어 경로 dict 를 반환 (자막이 없으면 (None, None))
     """
-    try:
-        transcript_list = ytt_api.list(video_id)
+    with tracer.span("transcript.list", video_id=video_id):
+        transcript_list = get_transcript_api().list(video_id)
 
-        target_transcript = None
+    target_transcript = None
+    kind = None
 
-        # [전략 1] 한국어 탐색 (수동 우선, 없으면 자동)
+    # [전략 1] 지정 언어 탐색 (수동 우선, 없으면 자동)
+    try:
+        target_transcript = transcript_list.find_manually_created_transcript([language])
+        kind = "manual"
+    except Exception:
         try:
-            target_transcript = transcript_list.find_manually_created_transcript(['ko'])
+            target_transcript = transcript_list.find_generated_transcript([language])
+            kind = "generated"
         except Exception:
+            pass
+
+    # [전략 2] 지정 언어 없음 -> 리스트의 첫 번째(아무거나) 선택
+    if not target_transcript:
+        try:
+            target_transcript = next(iter(transcript_list))
+            kind = "fallback"
+        except StopIteration:
+            return None, None
+
+    path = {"source_language": str(target_transcript.language_code), "kind": kind, "translated": False}
+
+    # 지정 언어가 아니면 번역 시도
+    if translate and not path["source_language"].startswith(language):
+        if getattr(target_transcript, "is_translatable", False):
             try:
-                target_transcript = transcript_list.find_generated_transcript(['ko'])
+                target_transcript = target_transcript.translate(language)
+                path["translated"] = True
             except Exception:
+                # 번역 실패하면 그냥 원문 자막 사용
                 pass
 
-        # [전략 2] 한국어 없음 -> 리스트의 첫 번째(아무거나) 선택
-        if not target_transcript:
+    record.update(path)
+
+    # 번역 자막은 fetch 시점에 번역 요청이 나가므로 이 구간에 번역 시간이 포함됨
+    with tracer.span("transcript.fetch", video_id=video_id, translated=path["translated"]) as fetch_record:
+        fetched = target_transcript.fetch()
+        segments = [(snippet.start, snippet.text) for snippet in fetched]
+        fetch_record["segments"] = len(segments)
+        fetch_record["chars_out"] = sum(len(text) for _, text in segments)
+
+    return segments, path
+
+
+def get_transcript_index(video_id, language="ko", translate=True, tracer=None, clean=True, cache=None):
+    """
+    자막 구간별 텍스트와 시작 시각을 TranscriptIndex 로 반환 (실패 시 None)
+    - 자막 캐시(TranscriptCache)에 있으면 네트워크 요청 없이 저장된 원본 구간과 언어 경로 사용
+      ("자막 없음" 결과도 짧은 TTL 동안 캐시되어 바로 None 반환)
+    - cache=False 면 캐시를 쓰지 않음, None 이면 프로세스 공유 기본 캐시
+    - clean=True 면 clean_transcript 와 같은 규칙으로 구간별 중복 / 비발화 표시 / 추임새 제거
+    - tracer 를 넘기면 캐시 적중 여부와 목록 조회 / 자막 다운로드(번역 포함) 단계별 시간과 크기를 기록
+    """
+    tracer = get_tracer(tracer)
+    if cache is None:
+        # 기본 캐시를 만들 수 없으면 캐시 없이 진행
+        cache = get_transcript_cache() or False
+
+    with tracer.span("transcript", video_id=video_id, language=language) as record:
+        cached = cache.get(video_id, language, translate) if cache else None
+        record["cache_hit"] = cached is not None
+
+        if cached is not None:
+            if not cached["found"]:
+                record["chars_out"] = 0
+                return None
+            segments = cached["segments"]
+            record.update(cached["path"])
+        else:
             try:
-                target_transcript = next(iter(transcript_list))
-            except StopIteration:
-                target_transcript = None
-
-        # 3. 데이터 추출 및 번역
-        if target_transcript:
-            # 한국어가 아니면 번역 시도
-            if not str(target_transcript.language_code).startswith('ko'):
-                if getattr(target_transcript, "is_translatable", False):
-                    try:
-                        target_transcript = target_transcript.translate('ko')
-                    except Exception:
-                        # 번역 실패하면 그냥 원문 자막 사용
-                        pass
-    
-            fetched = target_transcript.fetch()
-
-            # TextFormatter 로 순수 텍스트 변환
-            formatter = TextFormatter()
-            text_data = formatter.format_transcript(fetched)
-
-            # 3만 자 제한
-            return text_data[:30000]
-
-        # 여기까지 왔는데도 못 구했으면 None
-        return None
+                segments, path = _fetch_segments(video_id, language, translate, tracer, record)
+            except Exception as e:
+                if type(e).__name__ in NO_CAPTION_ERRORS:
+                    segments = None
+                else:
+                    # 일시적인 오류일 수 있으므로 캐시하지 않음
+                    record["error"] = str(e)
+                    print(f"자막 추출 중 에러 발생: {e}")
+                    return None
 
-    except Exception as e:
-        print(f"자막 추출 중 에러 발생: {e}")
+            if not segments:
+                # 여기까지 왔는데도 못 구했으면 None
+                if cache:
+                    cache.set_missing(video_id, language, translate)
+                record["chars_out"] = 0
+                return None
+
+            if cache:
+                cache.set(video_id, language, translate, segments, path)
+
+        # 구간별 (시작 초, 텍스트) 로 색인 (TextFormatter 와 같은 줄 단위)
+        index = TranscriptIndex.from_segments(segments, clean=clean)
+
+        if clean:
+            record["chars_raw"] = index.raw_chars
+            record["clean_reduction"] = round(1 - len(index.text) / max(index.raw_chars, 1), 3)
+
+        record["segments"] = len(index)
+        record["chars_out"] = len(index.text)
+        record["bytes_out"] = len(index.text.encode("utf-8"))
+        return index
+
+
+def get_robust_transcript(video_id, language="ko", translate=True, max_chars=30000, tracer=None, clean=True,
+                          cache=None):
+    """
+    get_transcript_index 결과를 텍스트(한 줄 = 자막 한 구간)로 반환하는 자막 추출 함수
+    - max_chars=None 이면 자르지 않고 전체 자막 반환
+    """
+    index = get_transcript_index(
+        video_id, language=language, translate=translate, tracer=tracer, clean=clean, cache=cache
+    )
+    if index is None:
         return None
 
+    text_data = index.text
+    # 글자 수 제한 (기본 3만 자)
+    if max_chars is not None:
+        text_data = text_data[:max_chars]
+    return text_data
+
+
+class TranscriptIndex:
+    """
+    자막 구간 텍스트와 시작 시각(초)을 보관하는 색인.
+    - 시작 시각은 array('d') 로 연속 저장 (구간 수만큼 float 하나씩)
+    - 프롬프트에는 marked_text() 로 각 줄 앞에 [구간 번호] 를 붙여 보내고,
+      모델이 돌려준 구간 번호를 resolve_chapters() 로 실제 mm:ss 로 변환
+    - 시각 정보 없이 텍스트만 있는 자막은 from_text() 로 만들며 has_timestamps 가 False
+    """
+
+    __slots__ = ("texts", "starts", "raw_count", "raw_chars", "_text")
+
+    def __init__(self, texts, starts=None, raw_count=None, raw_chars=None):
+        self.texts = list(texts)
+        self.starts = array("d", starts or [])
+        self.raw_count = len(self.texts) if raw_count is None else raw_count
+        self._text = "\n".join(self.texts)
+        self.raw_chars = len(self._text) if raw_chars is None else raw_chars
+
+    @classmethod
+    def from_segments(cls, segments, clean=True):
+        """(시작 초, 텍스트) 목록으로 색인 생성 (clean=True 면 구간별 정리 후 남은 구간만 보관)"""
+        starts, texts = [], []
+        for start, text in segments:
+            starts.append(float(start))
+            texts.append(text.replace("\n", " ") if clean else text)
+
+        raw_count = len(texts)
+        raw_chars = sum(len(t) for t in texts) + max(raw_count - 1, 0)
+        if clean:
+            kept = _clean_lines(texts)
+            starts = [starts[i] for i, _ in kept]
+            texts = [line for _, line in kept]
+        return cls(texts, starts, raw_count=raw_count, raw_chars=raw_chars)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(text.splitlines() if text else [])
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def has_timestamps(self):
+        return len(self.starts) == len(self.texts) > 0
+
+    def marked_text(self):
+        """각 줄 앞에 구간 번호를 붙인 프롬프트용 텍스트 ("[12] 자막 내용")"""
+        return "\n".join(f"[{i}] {line}" for i, line in enumerate(self.texts))
+
+    def start_of(self, segment):
+        """구간 번호 → 시작 초 (범위를 벗어나면 가장 가까운 구간, 시각 정보가 없으면 None)"""
+        if not self.has_timestamps:
+            return None
+        segment = min(max(int(segment), 0), len(self.starts) - 1)
+        return self.starts[segment]
+
+    @staticmethod
+    def format_time(seconds):
+        seconds = int(seconds)
+        hours, rest = divmod(seconds, 3600)
+        minutes, secs = divmod(rest, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{secs:02d}"
+        return f"{minutes:02d}:{secs:02d}"
+
+    def resolve_chapters(self, chapters):
+        """
+        모델이 돌려준 챕터의 segment(구간 번호)를 실제 시각으로 변환해
+        time("mm:ss") / start_seconds 를 채우고 시작 시각 순으로 정렬.
+        구간 번호가 없거나 잘못된 챕터는 그대로 둔다.
+        """
+        if not isinstance(chapters, list) or not self.has_timestamps:
+            return chapters
+
+        resolved = []
+        for chap in chapters:
+            if not isinstance(chap, dict):
+                continue
+            chap = dict(chap)
+            try:
+                start = self.start_of(chap["segment"])
+            except (KeyError, TypeError, ValueError):
+                start = None
+            if start is not None:
+                chap["start_seconds"] = int(start)
+                chap["time"] = self.format_time(start)
+            resolved.append(chap)
+
+        resolved.sort(key=lambda c: c.get("start_seconds", float("inf")))
+        return resolved
+
+
+class TranscriptSession:
+    """
+    한 번의 분석 동안 자막을 한 번만 가져와 여러 에이전트가 공유하기 위한 캐시.
+    - 키: (video_id, 언어, 번역 여부)
+    - 자막은 자르지 않은 전체 구간 색인(TranscriptIndex)으로 보관 (길이 제한은 사용하는 쪽에서 적용)
+    - 이미 가지고 있는 자막은 put() 으로 넣어두면 네트워크 요청 없이 재사용
+    - 여러 스레드에서 동시에 get() 해도 실제 자막 요청은 키당 한 번만 나감
+    - cache: 세션 밖의 영구 자막 캐시 (None 이면 기본 캐시, False 면 사용 안 함)
+    """
+
+    def __init__(self, language="ko", translate=True, cache=None):
+        self.language = language
+        self.translate = translate
+        self.cache = cache
+        self._indexes = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key(self, video_id, language=None, translate=None):
+        return (
+            video_id,
+            language or self.language,
+            self.translate if translate is None else translate,
+        )
+
+    def put(self, video_id, text, language=None, translate=None):
+        """호출자가 이미 가진 자막을 세션에 등록 (같은 텍스트의 시각 정보 색인은 유지)"""
+        key = self._key(video_id, language, translate)
+        current = self._indexes.get(key)
+        if current is not None and current.text == text:
+            return
+        self._indexes[key] = TranscriptIndex.from_text(text) if text is not None else None
+
+    def get(self, video_id, language=None, translate=None, tracer=None):
+        """자막 텍스트 반환 (실패 시 None)"""
+        index = self.get_index(video_id, language, translate, tracer=tracer)
+        return index.text if index is not None else None
+
+    def get_index(self, video_id, language=None, translate=None, tracer=None):
+        """세션에 있으면 그대로, 없으면 한 번만 가져와서 저장 (실패 결과 None 도 저장)"""
+        key = self._key(video_id, language, translate)
+
+        with get_tracer(tracer).span("transcript.session", video_id=video_id) as record:
+            record["cache_hit"] = key in self._indexes
+            if record["cache_hit"]:
+                return self._indexes[key]
+
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+            with key_lock:
+                # 다른 스레드가 먼저 가져온 경우도 캐시 적중으로 기록
+                record["cache_hit"] = key in self._indexes
+                if not record["cache_hit"]:
+                    self._indexes[key] = get_transcript_index(
+                        video_id, language=key[1], translate=key[2], tracer=tracer, cache=self.cache
+                    )
+                return self._indexes[key]
+
+
+def estimate_tokens(text):
+    """
+    Gemini 토큰 수 대략 추정 (네트워크 없이 계산하기 위한 보수적 근사치)
+    - ASCII: 약 4글자당 1토큰
+    - 한글 등 비 ASCII: 글자당 약 0.7토큰
+    """
+    if not text:
+        return 0
+    ascii_count = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_count / 4 + (len(text) - ascii_count) * 0.7) + 1
+
+
+# -------------------------------
+# 자막 전처리 / 압축
+# -------------------------------
+# [음악], [박수], (웃음), ♪ 같은 비발화 표시
+NON_SPEECH_PATTERN = re.compile(
+    r"\[[^\]]{0,20}\]|\((?:음악|박수|웃음|환호|music|applause|laughter)[^)]{0,10}\)|[♪♫♬]+",
+    re.IGNORECASE,
+)
+# 독립된 단어로 쓰인 추임새만 제거 (조사/어미에 붙은 글자는 건드리지 않음)
+FILLER_PATTERN = re.compile(
+    r"(?<!\S)(?:음+|어+|으+|흠+|아+|에+|um+|uh+|erm|hmm+)[,.…~]*(?!\S)",
+    re.IGNORECASE,
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+TERM_PATTERN = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+
+
+def _strip_overlap(prev_words, words):
+    """자동 자막은 앞 줄 끝부분이 다음 줄 앞에 다시 나오므로 겹치는 접두 단어 제거"""
+    for k in range(min(len(prev_words), len(words)), 0, -1):
+        if prev_words[-k:] == words[:k]:
+            return words[k:]
+    return words
+
+
+def _clean_lines(lines):
+    """
+    자막 구간 텍스트 목록을 정리해서 남길 구간의 (원래 위치, 정리된 텍스트) 를 돌려줌.
+    - [음악]/[박수] 등 비발화 표시와 독립된 추임새 제거, 공백 정리
+    - 앞 구간과 겹치는 부분(롤링 자막) 및 최근 몇 구간과 똑같은 구간 제거
+      (중복 비교와 겹침 계산은 겹침을 떼기 전 구간 기준, 떼어 낸 결과는 출력에만 사용)
+    """
+    kept = []
+    prev_words = []
+    recent = []
+
+    for idx, raw in enumerate(lines):
+        line = NON_SPEECH_PATTERN.sub(" ", raw)
+        line = FILLER_PATTERN.sub(" ", line)
+        words = WHITESPACE_PATTERN.sub(" ", line).strip().split(" ")
+        words = [w for w in words if w]
+        if not words:
+            continue
+
+        full = " ".join(words)
+        if full in recent:
+            continue
+        recent = (recent + [full])[-3:]
+
+        stripped = _strip_overlap(prev_words, words)
+        prev_words = words
+        if stripped:
+            kept.append((idx, " ".join(stripped)))
+
+    return kept
+
+
+def clean_transcript(text):
+    """
+    TextFormatter 형식 텍스트(한 줄 = 자막 한 구간)를 프롬프트용으로 정리.
+    결과는 입력에만 의존 (같은 입력이면 항상 같은 출력)
+    """
+    if not text:
+        return text
+    return "\n".join(line for _, line in _clean_lines(text.splitlines()))
+
+
+def compress_transcript(text, max_tokens, tracer=None, blocks=8):
+    """
+    토큰 예산(max_tokens) 안으로 자막을 추출 요약 (줄 단위 선택, 원래 순서 유지).
+    - 점수: 줄에 포함된 단어들의 전체 빈도 평균 (자주 나오는 주제어를 담은 줄 우선)
+      너무 흔한 단어(전체 줄의 30% 이상에 등장)는 점수에서 제외
+    - 영상 전체 흐름이 남도록 자막을 blocks 개 구간으로 나눠 구간별로 예산을 배분
+    - 같은 입력이면 항상 같은 결과 (동점은 앞 줄 우선)
+    tracer 를 넘기면 압축 전/후 토큰 수와 감소율을 "transcript.compress" 로 기록
+    """
+    with get_tracer(tracer).span("transcript.compress", max_tokens=max_tokens) as record:
+        tokens_in = estimate_tokens(text)
+        record["tokens_in"] = tokens_in
+        record["chars_in"] = len(text) if text else 0
+
+        if not text or tokens_in <= max_tokens:
+            record["tokens_out"] = tokens_in
+            record["chars_out"] = record["chars_in"]
+            record["reduction"] = 0.0
+            return text
+
+        lines = text.splitlines()
+        line_terms = [set(TERM_PATTERN.findall(line.lower())) for line in lines]
+        line_tokens = [estimate_tokens(line) for line in lines]
+
+        doc_freq = Counter(term for terms in line_terms for term in terms)
+        common = max(2, int(len(lines) * 0.3))
+
+        def score(idx):
+            weights = [doc_freq[t] for t in line_terms[idx] if 1 < doc_freq[t] < common]
+            return sum(weights) / (len(line_terms[idx]) + 1)
+
+        # 구간별 예산은 원문 토큰 비율대로, 남은 예산은 다음 구간으로 이월
+        total = sum(line_tokens) or 1
+        size = max(1, -(-len(lines) // blocks))
+        selected = []
+        carry = 0.0
+
+        for start in range(0, len(lines), size):
+            block = range(start, min(start + size, len(lines)))
+            budget = max_tokens * sum(line_tokens[i] for i in block) / total + carry
+            for idx in sorted(block, key=lambda i: (-score(i), i)):
+                if line_tokens[idx] <= budget:
+                    selected.append(idx)
+                    budget -= line_tokens[idx]
+            carry = budget
+
+        result = "\n".join(lines[i] for i in sorted(selected))
+        record["tokens_out"] = estimate_tokens(result)
+        record["chars_out"] = len(result)
+        record["reduction"] = round(1 - record["tokens_out"] / tokens_in, 3)
+        return result
+
+
+def split_transcript(text, max_tokens):
+    """
+    자막을 줄 단위로 묶어 max_tokens 이하의 청크 리스트로 분할.
+    한 줄이 너무 길면 글자 단위로 다시 자른다.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line)
+
+        # 한 줄이 혼자서 한도를 넘는 경우: 글자 단위로 분할
+        if line_tokens > max_tokens:
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            step = max(1, int(len(line) * max_tokens / line_tokens))
+            for i in range(0, len(line), step):
+                chunks.append(line[i:i + step])
+            continue
+
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+
+        current.append(line)
+        current_tokens += line_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
+
 
 def clean_json_text(text):
     """JSON 파싱 전 마크다운 코드블럭(```` ```json`) 제거"""
@@ -116,4 +608,95 @@ def clean_json_text(text):
     if text.endswith("```"):
         text = text[:-3]
 
-    return text.strip()
\ No newline at end of file
+    return text.strip()
+
+def parse_partial_json(text):
+    """
+    스트리밍 중인(아직 닫히지 않은) JSON 문자열을 파싱 가능한 지점까지 닫아서 dict 로 반환.
+    - 값 문자열이 열려 있으면 지금까지 받은 내용까지 포함 (blog_post.content 등을 점진 표시)
+    - 키 문자열 / 숫자 / true·false·null 이 끊겨 있으면 마지막으로 완성된 값까지만 사용
+    - 아직 파싱할 내용이 없으면 None
+    """
+    text = clean_json_text(text)
+    start = text.find("{")
+    if start < 0:
+        return None
+    text = text[start:]
+
+    stack = []          # 열린 '{' / '['
+    expect_key = []     # 각 컨테이너에서 다음 문자열이 키인지 여부
+    in_string = False
+    string_is_key = False
+    escape_start = -1   # 진행 중인 이스케이프(\n, \uXXXX 등) 시작 위치
+    unicode_left = 0
+    in_primitive = False
+    safe_end, safe_closers = 0, None
+
+    def closers():
+        return "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+    end = len(text)
+    for i, ch in enumerate(text):
+        if in_string:
+            if unicode_left:
+                unicode_left -= 1
+                if not unicode_left:
+                    escape_start = -1
+            elif escape_start >= 0:
+                if ch == "u":
+                    unicode_left = 4
+                else:
+                    escape_start = -1
+            elif ch == "\\":
+                escape_start = i
+            elif ch == '"':
+                in_string = False
+                if not string_is_key:
+                    safe_end, safe_closers = i + 1, closers()
+            continue
+
+        if in_primitive:
+            if ch not in ",}] \t\r\n":
+                continue
+            in_primitive = False
+            safe_end, safe_closers = i, closers()
+
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and expect_key[-1]
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key.append(ch == "{")
+            safe_end, safe_closers = i + 1, closers()
+        elif ch in "}]":
+            if not stack:
+                return None
+            stack.pop()
+            expect_key.pop()
+            safe_end, safe_closers = i + 1, closers()
+            if not stack:
+                end = i + 1
+                break
+        elif ch == ":":
+            if expect_key:
+                expect_key[-1] = False
+        elif ch == ",":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+        elif not ch.isspace():
+            in_primitive = True
+
+    if not stack:
+        candidate = text[:end]
+    elif in_string and not string_is_key:
+        cut = escape_start if escape_start >= 0 else len(text)
+        candidate = text[:cut] + '"' + closers()
+    elif safe_closers is not None:
+        candidate = text[:safe_end] + safe_closers
+    else:
+        return None
+
+    try:
+        return json.loads(candidate)
+    except Exception:
+        return None